@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Analyze CCC traces
+
+Reads OTLP/JSON trace files written by 'ccc --trace FILE' (or collected
+from many machines) and prints latency percentiles per span name, plus
+each span's average share of its trace's root span.
+
+Usage:
+    python analyze_traces.py traces/*.jsonl [--root "ccc login"] [--json]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+
+def iter_spans(paths):
+    """Yield every span in the given files (OTLP/JSON, one request per line) or directories"""
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.json*')) if path.is_dir() else [path]
+        for file in files:
+            with open(file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"[WARN] Skipping malformed line in {file}", file=sys.stderr)
+                        continue
+                    for resource_spans in request.get('resourceSpans', []):
+                        for scope_spans in resource_spans.get('scopeSpans', []):
+                            yield from scope_spans.get('spans', [])
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def analyze(spans, root_name=None):
+    """
+    Aggregate span durations per name
+
+    Args:
+        spans: Iterable of OTLP/JSON spans
+        root_name: Only include traces whose root span has this name
+
+    Returns:
+        list: dicts with name, count, errors, p50_ms, p90_ms, p99_ms, max_ms
+              and share (mean fraction of the root span's duration), slowest p50 first
+    """
+    traces = {}
+    for span in spans:
+        traces.setdefault(span['traceId'], []).append(span)
+
+    durations = {}
+    shares = {}
+    errors = {}
+    for trace in traces.values():
+        root = next((s for s in trace if not s.get('parentSpanId')), None)
+        if root_name and (root is None or root['name'] != root_name):
+            continue
+        root_ms = duration_ms(root) if root else 0.0
+        for span in trace:
+            ms = duration_ms(span)
+            durations.setdefault(span['name'], []).append(ms)
+            if root_ms > 0:
+                shares.setdefault(span['name'], []).append(ms / root_ms)
+            if span.get('status', {}).get('code') == 2:
+                errors[span['name']] = errors.get(span['name'], 0) + 1
+
+    rows = []
+    for name, values in durations.items():
+        share = shares.get(name, [])
+        rows.append({
+            'name': name,
+            'count': len(values),
+            'errors': errors.get(name, 0),
+            'p50_ms': percentile(values, 0.50),
+            'p90_ms': percentile(values, 0.90),
+            'p99_ms': percentile(values, 0.99),
+            'max_ms': max(values),
+            'share': sum(share) / len(share) if share else None
+        })
+    rows.sort(key=lambda row: row['p50_ms'], reverse=True)
+    return rows
+
+
+def duration_ms(span):
+    return (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute latency percentiles across CCC traces')
+    parser.add_argument('paths', nargs='+', help='Trace files or directories')
+    parser.add_argument('--root', help="Only include traces whose root span has this name (e.g. 'ccc login')")
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    rows = analyze(iter_spans(args.paths), root_name=args.root)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    if not rows:
+        print("[INFO] No spans found")
+        return 1
+
+    print(f"{'Span':<44} {'Count':>6} {'Errors':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'Share':>6}")
+    print("-" * 104)
+    for row in rows:
+        share = f"{row['share'] * 100:5.1f}%" if row['share'] is not None else '     -'
+        print(f"{row['name'][:44]:<44} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9.1f} "
+              f"{row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f} {share:>6}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
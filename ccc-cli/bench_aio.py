@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent logins on one asyncio event loop
+
+Starts a local stub of the Cognito user pool and identity pool JSON APIs
+(with a fixed per-request latency), then compares sequential logins with
+CognitoAuthenticator against concurrent logins with
+cca.aio.AsyncCognitoAuthenticator. A ticker task measures how long the
+event loop is blocked while the logins run.
+
+Usage:
+    python bench_aio.py [--logins 200] [--concurrency 32] [--latency 50]
+"""
+
+import io
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cca.auth.identity as identity_module
+from cca.aio import AsyncCognitoAuthenticator
+from cca.auth.cognito import CognitoAuthenticator
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers InitiateAuth, GetId and GetCredentialsForIdentity after a fixed delay"""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+        operation = self.headers['X-Amz-Target'].split('.')[-1]
+        time.sleep(self.latency)
+
+        if operation == 'InitiateAuth':
+            username = body['AuthParameters'].get('USERNAME', 'refreshed')
+            id_token = f"{_b64({'alg': 'none'})}.{_b64({'sub': username, 'exp': int(time.time()) + 3600})}.sig"
+            response = {'AuthenticationResult': {'IdToken': id_token, 'AccessToken': 'access', 'RefreshToken': 'refresh'}}
+        elif operation == 'GetId':
+            response = {'IdentityId': 'us-east-1:00000000-0000-0000-0000-000000000000'}
+        else:
+            response = {'Credentials': {
+                'AccessKeyId': 'ASIASTUB', 'SecretKey': 'secret', 'SessionToken': 'token',
+                'Expiration': time.time() + 3600
+            }}
+
+        data = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-amz-json-1.1')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_authenticator(endpoint, pool_size):
+    import boto3
+    from botocore import UNSIGNED
+    from botocore.config import Config
+
+    config = {
+        'user_pool_id': 'us-east-1_stub', 'app_client_id': 'stub', 'identity_pool_id': 'us-east-1:stub',
+        'region': 'us-east-1',
+        # The stub has no quotas; keep the client-side throttle out of the measurement
+        'cognito_rate_limits': {'UserAuthentication': 100000, 'GetId': 100000, 'GetCredentialsForIdentity': 100000}
+    }
+    auth = CognitoAuthenticator(config)
+    client_config = Config(signature_version=UNSIGNED, max_pool_connections=pool_size, retries={'total_max_attempts': 1})
+    session = boto3.Session(region_name='us-east-1')
+    auth.cognito_client = session.client('cognito-idp', endpoint_url=endpoint, config=client_config)
+    auth.identity_client = session.client('cognito-identity', endpoint_url=endpoint, config=client_config)
+    return auth
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def bench_sync(auth, users):
+    samples = []
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for username, password in users:
+            t = time.perf_counter()
+            tokens = auth.authenticate(username, password)
+            auth.get_aws_credentials(tokens['IdToken'])
+            samples.append(time.perf_counter() - t)
+    return time.perf_counter() - start, samples
+
+
+async def bench_async(auth, users, concurrency):
+    lag = []
+    done = asyncio.Event()
+
+    async def ticker():
+        # Scheduling delay of a 5 ms sleep shows whether the loop is blocked
+        while not done.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag.append(time.perf_counter() - t - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    async with AsyncCognitoAuthenticator(authenticator=auth, max_concurrency=concurrency) as aio:
+        batch = await aio.authenticate_many(users)
+    done.set()
+    await tick
+    return batch, lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark asyncio logins against a local Cognito stub')
+    parser.add_argument('--logins', type=int, default=200, help='Concurrent logins (default: 200)')
+    parser.add_argument('--sequential', type=int, default=20, help='Sequential logins for the baseline (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=32, help='AsyncCognitoAuthenticator max_concurrency (default: 32)')
+    parser.add_argument('--latency', type=float, default=50, help='Stub latency per request in ms (default: 50)')
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        identity_module.IDENTITY_CACHE_FILE = Path(tmp) / 'identity-ids.json'
+        auth = make_authenticator(endpoint, args.concurrency)
+
+        print(f"Stub latency {args.latency:.0f} ms per request, 3 requests per login\n")
+
+        elapsed, samples = bench_sync(auth, [(f"seq-{i}", 'pw') for i in range(args.sequential)])
+        sync_rate = len(samples) / elapsed
+        print(f"{'sequential (sync)':<24} {len(samples):>5} logins  {sync_rate:8.1f} logins/s  "
+              f"p50 {percentile(samples, 0.5):7.1f} ms  p99 {percentile(samples, 0.99):7.1f} ms")
+
+        batch, lag = asyncio.run(bench_async(auth, [(f"aio-{i}", 'pw') for i in range(args.logins)], args.concurrency))
+        samples = [r['elapsed'] for r in batch['results']]
+        print(f"{'asyncio (cca.aio)':<24} {len(samples):>5} logins  {batch['throughput']:8.1f} logins/s  "
+              f"p50 {percentile(samples, 0.5):7.1f} ms  p99 {percentile(samples, 0.99):7.1f} ms  "
+              f"({batch['failed']} failed)")
+        print(f"\nEvent loop lag during async logins: p99 {percentile(lag, 0.99):.2f} ms, max {max(lag) * 1000:.2f} ms")
+        print(f"Speedup: {batch['throughput'] / sync_rate:.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
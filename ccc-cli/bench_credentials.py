@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: updating one profile in a large ~/.aws/credentials file
+
+Compares the previous configparser rewrite (parse every section, rebuild,
+write in place) against the incremental section editor in
+cca.auth.credentials, on a temporary file with 1,000 profiles.
+
+Usage:
+    python bench_credentials.py [--profiles 1000] [--iterations 200]
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import configparser
+from pathlib import Path
+
+import cca.auth.credentials as credentials_module
+
+
+def make_credentials(i):
+    return {
+        'AccessKeyId': f"ASIA{i:016d}",
+        'SecretAccessKey': 's' * 40,
+        'SessionToken': 't' * 800,
+        'Expiration': '2030-01-01T00:00:00+00:00'
+    }
+
+
+def build_file(path, profiles):
+    for i in range(profiles):
+        credentials_module.save_credentials(make_credentials(i), profile=f"profile-{i}")
+
+
+def save_with_configparser(path, credentials, profile):
+    """The pre-incremental implementation of save_credentials"""
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    config_content = {section: dict(parser.items(section)) for section in parser.sections()}
+
+    config_content[profile] = {
+        'aws_access_key_id': credentials['AccessKeyId'],
+        'aws_secret_access_key': credentials['SecretAccessKey'],
+        'aws_session_token': credentials['SessionToken'],
+        '# expires_at': credentials['Expiration']
+    }
+
+    parser = configparser.ConfigParser()
+    for section, values in config_content.items():
+        parser.add_section(section)
+        for key, value in values.items():
+            parser.set(section, key, value)
+
+    with open(path, 'w') as f:
+        parser.write(f)
+
+
+def bench(label, func, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    print(f"{label:<28} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark credentials file updates')
+    parser.add_argument('--profiles', type=int, default=1000, help='Profiles in the file (default: 1000)')
+    parser.add_argument('--iterations', type=int, default=200, help='Updates per method (default: 200)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'credentials'
+        credentials_module.CREDENTIALS_FILE = path
+        build_file(path, args.profiles)
+
+        size_kb = path.stat().st_size / 1024
+        print(f"Credentials file: {args.profiles} profiles, {size_kb:.0f} KB\n")
+
+        target = f"profile-{args.profiles // 2}"
+        baseline = bench(
+            'configparser rewrite',
+            lambda i: save_with_configparser(path, make_credentials(i), target),
+            args.iterations
+        )
+
+        improved = bench(
+            'incremental section edit',
+            lambda i: credentials_module.save_credentials(make_credentials(i), profile=target),
+            args.iterations
+        )
+
+        print(f"\nSpeedup: {baseline / improved:.1f}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,20 +28,64 @@ Example:
 
 __version__ = "0.2.3"
 
-# Core imports
-from .config import load_config, save_config, get_config_value, set_config_value
-from .auth import CognitoAuthenticator, save_credentials, remove_credentials
-
-# AWS operations imports
-from .aws import (
-    get_user_history,
-    format_events,
-    list_user_resources,
-    format_resources,
-    get_user_permissions,
-    test_permissions,
-    format_permissions
-)
+import logging
+
+# Library mode: silent unless the application configures logging
+# (the ccc CLI calls cca.log.enable_console_logging())
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# Public names are resolved lazily (PEP 562) so that importing the package
+# does not pull in boto3, botocore or requests until an API that needs them
+# is actually used.
+_LAZY_IMPORTS = {
+    # Configuration
+    'load_config': '.config',
+    'save_config': '.config',
+    'get_config_value': '.config',
+    'set_config_value': '.config',
+    'set_config_values': '.config',
+    'Config': '.config',
+    'get_config': '.config',
+    'list_profiles': '.config',
+    'get_profile_config': '.config',
+
+    # Authentication
+    'CognitoAuthenticator': '.auth',
+    'save_credentials': '.auth',
+    'remove_credentials': '.auth',
+
+    # Client pool
+    'get_session': '.clients',
+    'get_client': '.clients',
+
+    # Logging
+    'enable_console_logging': '.log',
+
+    # HTTP
+    'HttpTransport': '.transport',
+    'get_transport': '.transport',
+
+    # Asyncio
+    'AsyncCognitoAuthenticator': '.aio',
+
+    # AWS Operations
+    'get_user_history': '.aws',
+    'iter_user_history': '.aws',
+    'get_combined_history': '.aws',
+    'format_events': '.aws',
+    'HistoryStore': '.aws',
+    'list_user_resources': '.aws',
+    'format_resources': '.aws',
+    'get_user_permissions': '.aws',
+    'test_permissions': '.aws',
+    'format_permissions': '.aws',
+}
+
+
+from .lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, _LAZY_IMPORTS)
+
 
 __all__ = [
     # Version
@@ -52,15 +96,31 @@ __all__ = [
     'save_config',
     'get_config_value',
     'set_config_value',
+    'set_config_values',
+    'Config',
+    'get_config',
+    'list_profiles',
+    'get_profile_config',
 
     # Authentication
     'CognitoAuthenticator',
     'save_credentials',
     'remove_credentials',
 
+    # Client pool
+    'get_session',
+    'get_client',
+    'enable_console_logging',
+    'HttpTransport',
+    'get_transport',
+    'AsyncCognitoAuthenticator',
+
     # AWS Operations - CloudTrail
     'get_user_history',
+    'iter_user_history',
+    'get_combined_history',
     'format_events',
+    'HistoryStore',
 
     # AWS Operations - Resources
     'list_user_resources',
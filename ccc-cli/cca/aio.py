@@ -0,0 +1,161 @@
+"""
+Asyncio Authentication
+Async counterpart of CognitoAuthenticator for asyncio services.
+
+boto3 and requests are blocking, so every call runs on a dedicated thread
+pool and is awaited from the event loop; the loop keeps serving other
+tasks meanwhile. An asyncio.Semaphore per event loop bounds how many calls
+are in flight, and waiting callers are queued on the loop rather than on
+the pool, so they can be cancelled (or time out) before anything is sent.
+Once a request has been sent, cancelling the awaiting task returns
+immediately but the request itself still runs to completion on its thread.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from .tracing import propagate
+
+
+class AsyncCognitoAuthenticator:
+    """Asyncio wrapper around CognitoAuthenticator with bounded concurrency"""
+
+    def __init__(self, config=None, max_concurrency=None, timeout=None, authenticator=None):
+        """
+        Args:
+            config: Configuration dict (same keys as CognitoAuthenticator)
+            max_concurrency: Maximum calls in flight (default: config 'aio_concurrency' or 16)
+            timeout: Optional per-call timeout in seconds, applied while waiting
+                     for a slot and for the response
+            authenticator: CognitoAuthenticator to wrap (default: built from config)
+        """
+        if authenticator is None:
+            from .auth.cognito import CognitoAuthenticator
+            authenticator = CognitoAuthenticator(config)
+        self.sync = authenticator
+        self.max_concurrency = max_concurrency or self.sync.config.get('aio_concurrency', 16)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='cca-aio')
+        # asyncio primitives belong to one loop, so each loop gets its own
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+
+    def _semaphore(self, loop):
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(loop)
+
+        async def run():
+            async with semaphore:
+                return await loop.run_in_executor(self._executor, propagate(functools.partial(func, *args, **kwargs)))
+
+        if self.timeout is None:
+            return await run()
+        return await asyncio.wait_for(run(), self.timeout)
+
+    async def authenticate(self, username, password):
+        """
+        Authenticate user with Cognito using USER_PASSWORD_AUTH flow
+        Returns: dict with tokens (IdToken, AccessToken, RefreshToken)
+        """
+        return await self._run(self.sync.authenticate, username, password)
+
+    async def get_aws_credentials(self, id_token):
+        """
+        Exchange Cognito ID token for temporary AWS credentials
+        Returns: dict with AWS credentials
+        """
+        return await self._run(self.sync.get_aws_credentials, id_token)
+
+    async def refresh_credentials(self, refresh_token):
+        """Refresh Cognito tokens using a refresh token"""
+        return await self._run(self.sync.refresh_credentials, refresh_token)
+
+    async def register(self, email, password, first_name=None, last_name=None, lambda_url=None):
+        """
+        Register a new user via Lambda registration endpoint
+        Returns: dict with registration result
+        """
+        return await self._run(self.sync.register, email, password, first_name, last_name, lambda_url)
+
+    async def forgot_password(self, username):
+        """
+        Initiate forgot password flow
+        Returns: dict with CodeDeliveryDetails
+        """
+        return await self._run(self.sync.forgot_password, username)
+
+    async def confirm_forgot_password(self, username, code, new_password):
+        """Confirm forgot password with verification code"""
+        return await self._run(self.sync.confirm_forgot_password, username, code, new_password)
+
+    async def change_password(self, access_token, old_password, new_password):
+        """Change password (requires current password and access token)"""
+        return await self._run(self.sync.change_password, access_token, old_password, new_password)
+
+    async def login(self, username, password):
+        """
+        Authenticate and exchange the ID token for AWS credentials
+
+        Returns:
+            tuple: (tokens, credentials)
+        """
+        tokens = await self.authenticate(username, password)
+        credentials = await self.get_aws_credentials(tokens['IdToken'])
+        return tokens, credentials
+
+    async def authenticate_many(self, users):
+        """
+        Log in many users concurrently on the event loop
+
+        Args:
+            users: Iterable of (username, password) tuples
+
+        Returns:
+            dict with results (username, tokens, credentials, error, elapsed
+            per user, in input order), succeeded, failed, elapsed and throughput
+        """
+        async def run(username, password):
+            started = time.perf_counter()
+            result = {'username': username, 'tokens': None, 'credentials': None, 'error': None}
+            try:
+                result['tokens'], result['credentials'] = await self.login(username, password)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result['error'] = str(e)
+            result['elapsed'] = time.perf_counter() - started
+            return result
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run(username, password) for username, password in users))
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(1 for r in results if r['error'] is None)
+        return {
+            'results': list(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed': elapsed,
+            'throughput': len(results) / elapsed if elapsed > 0 else 0.0
+        }
+
+    def close(self):
+        """Shut down the worker threads (in-flight calls are allowed to finish)"""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -3,7 +3,61 @@ CCA Authentication Module
 Handles Cognito authentication and credential management.
 """
 
-from .cognito import CognitoAuthenticator
-from .credentials import save_credentials, remove_credentials
+# Resolved lazily so that importing cca.auth does not load boto3/requests
+_LAZY_IMPORTS = {
+    'CognitoAuthenticator': '.cognito',
+    'save_credentials': '.credentials',
+    'load_credentials': '.credentials',
+    'remove_credentials': '.credentials',
+    'save_credentials_batch': '.credentials',
+    'load_cached_credentials': '.cache',
+    'save_cached_credentials': '.cache',
+    'save_cached_credentials_batch': '.cache',
+    'remove_cached_credentials': '.cache',
+    'credentials_need_refresh': '.cache',
+    'to_credential_process': '.cache',
+    'DEFAULT_REFRESH_WINDOW': '.cache',
+    'CredentialRefresher': '.refresh',
+    'TokenBucket': '.throttle',
+    'Throttle': '.throttle',
+    'get_throttle': '.throttle',
+    'decode_jwt_claims': '.tokens',
+    'get_identity_claims': '.tokens',
+    'is_token_fresh': '.tokens',
+    'token_expires_in': '.tokens',
+    'verify_jwt': '.tokens',
+    'CognitoCredentialProvider': '.provider',
+    'create_cognito_session': '.provider',
+}
 
-__all__ = ['CognitoAuthenticator', 'save_credentials', 'remove_credentials']
+
+from ..lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, _LAZY_IMPORTS)
+
+
+__all__ = [
+    'CognitoAuthenticator',
+    'save_credentials',
+    'load_credentials',
+    'remove_credentials',
+    'save_credentials_batch',
+    'load_cached_credentials',
+    'save_cached_credentials',
+    'save_cached_credentials_batch',
+    'remove_cached_credentials',
+    'credentials_need_refresh',
+    'to_credential_process',
+    'DEFAULT_REFRESH_WINDOW',
+    'CredentialRefresher',
+    'TokenBucket',
+    'Throttle',
+    'get_throttle',
+    'decode_jwt_claims',
+    'get_identity_claims',
+    'is_token_fresh',
+    'token_expires_in',
+    'verify_jwt',
+    'CognitoCredentialProvider',
+    'create_cognito_session'
+]
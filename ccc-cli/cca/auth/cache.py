@@ -0,0 +1,143 @@
+"""
+Credentials Cache
+Keeps a local copy of the Cognito-federated AWS credentials in
+~/.ccc/credentials-cache.json so they can be served without a network call.
+
+Every profile shares the one file, so updates hold a cache-wide lock around
+the read-modify-write; otherwise concurrent refreshes of different profiles
+would drop each other's entries.
+"""
+
+import json
+from datetime import datetime, timezone, timedelta
+
+from ..config import CONFIG_DIR
+from ..fsutil import atomic_write, FileLock
+from ..tracing import get_tracer
+
+
+# Cache file path
+CACHE_FILE = CONFIG_DIR / "credentials-cache.json"
+
+# Refresh credentials when they are this close (in seconds) to expiring
+DEFAULT_REFRESH_WINDOW = 300
+
+
+def _lock_file():
+    return CACHE_FILE.parent / "locks" / "credentials-cache.lock"
+
+
+def _read_cache():
+    if not CACHE_FILE.exists():
+        return {}
+
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def load_cached_credentials(profile='cca'):
+    """
+    Load cached AWS credentials for a profile
+
+    Args:
+        profile: AWS profile name (default: 'cca')
+
+    Returns:
+        dict with AccessKeyId, SecretAccessKey, SessionToken, Expiration, or None
+    """
+    return _read_cache().get(profile)
+
+
+def save_cached_credentials(credentials, profile='cca'):
+    """
+    Save AWS credentials to the local cache
+
+    Args:
+        credentials: dict with AccessKeyId, SecretAccessKey, SessionToken, Expiration
+        profile: AWS profile name (default: 'cca')
+    """
+    save_cached_credentials_batch({profile: credentials})
+
+
+def save_cached_credentials_batch(credentials_by_profile):
+    """
+    Save AWS credentials for several profiles to the local cache with one write
+
+    Args:
+        credentials_by_profile: dict of profile name -> credentials dict
+    """
+    with get_tracer().span('save_cached_credentials', profiles=len(credentials_by_profile)), FileLock(_lock_file()):
+        cache = _read_cache()
+        for profile, credentials in credentials_by_profile.items():
+            cache[profile] = {
+                'AccessKeyId': credentials['AccessKeyId'],
+                'SecretAccessKey': credentials['SecretAccessKey'],
+                'SessionToken': credentials['SessionToken'],
+                'Expiration': credentials['Expiration']
+            }
+        atomic_write(CACHE_FILE, json.dumps(cache, indent=2))
+
+
+def remove_cached_credentials(profile='cca'):
+    """
+    Remove a profile from the local credentials cache
+
+    Args:
+        profile: AWS profile name (default: 'cca')
+    """
+    with FileLock(_lock_file()):
+        cache = _read_cache()
+        if cache.pop(profile, None) is not None:
+            atomic_write(CACHE_FILE, json.dumps(cache, indent=2))
+
+
+def credentials_expiry(credentials):
+    """Return the Expiration of a credentials dict as an aware datetime"""
+    expiration = datetime.fromisoformat(credentials['Expiration'])
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return expiration
+
+
+def credentials_need_refresh(credentials, window=DEFAULT_REFRESH_WINDOW):
+    """
+    Check whether credentials are missing or within `window` seconds of expiring
+
+    Args:
+        credentials: Cached credentials dict (or None)
+        window: Refresh window in seconds
+
+    Returns:
+        bool: True if the credentials should be refreshed
+    """
+    if not credentials or not credentials.get('Expiration'):
+        return True
+
+    try:
+        expiration = credentials_expiry(credentials)
+    except ValueError:
+        return True
+
+    return datetime.now(timezone.utc) + timedelta(seconds=window) >= expiration
+
+
+def to_credential_process(credentials):
+    """
+    Convert credentials to the AWS CLI credential_process JSON format
+
+    Args:
+        credentials: dict with AccessKeyId, SecretAccessKey, SessionToken, Expiration
+
+    Returns:
+        dict: credential_process payload (Version 1)
+    """
+    return {
+        'Version': 1,
+        'AccessKeyId': credentials['AccessKeyId'],
+        'SecretAccessKey': credentials['SecretAccessKey'],
+        'SessionToken': credentials['SessionToken'],
+        'Expiration': credentials['Expiration']
+    }
@@ -3,12 +3,46 @@ Cognito Authentication Module
 Handles Amazon Cognito authentication and AWS credential federation.
 """
 
-import boto3
-import requests
+import logging
 import json
+import time
 from datetime import datetime, timezone
+
+import botocore
 from botocore.exceptions import ClientError
 
+from ..clients import get_client
+from ..tracing import traced, propagate
+from .throttle import get_throttle
+from .tokens import decode_jwt_claims
+from .identity import get_cached_identity_id, cache_identity_id, forget_identity_id
+
+
+logger = logging.getLogger(__name__)
+
+# botocore releases whose URLLib3Session internals warm_up relies on: [min, max)
+WARM_UP_BOTOCORE = ((1, 29), (2, 0))
+
+
+def _warm_up_supported():
+    try:
+        version = tuple(int(part) for part in botocore.__version__.split('.')[:2])
+    except ValueError:
+        return False
+    return WARM_UP_BOTOCORE[0] <= version < WARM_UP_BOTOCORE[1]
+
+
+def _open_connection(client):
+    """Connect one pooled connection for a client, the way URLLib3Session picks a pool for a request"""
+    endpoint = client._endpoint
+    http = endpoint.http_session
+    manager = http._get_connection_manager(endpoint.host, http._proxy_config.proxy_url_for(endpoint.host))
+    pool = manager.connection_from_url(endpoint.host)
+    http._setup_ssl_cert(pool, endpoint.host, http._verify)
+    conn = pool._get_conn()
+    conn.connect()
+    pool._put_conn(conn)
+
 
 class CognitoAuthenticator:
     """Handles Cognito authentication and AWS credential management"""
@@ -21,19 +55,69 @@ class CognitoAuthenticator:
         self.region = self.config.get('region', 'us-east-1')
         self.profile = self.config.get('profile', 'cca')
 
+        # Cognito calls share per-region rate limits and throttling retries
+        self.throttle = get_throttle(self.region, self.config.get('cognito_rate_limits'))
+
+        # Clients come from the shared pool, so repeated instantiation is cheap
         if self.user_pool_id and self.app_client_id:
-            self.cognito_client = boto3.client('cognito-idp', region_name=self.region)
+            self.cognito_client = get_client('cognito-idp', region=self.region, signed=False)
         if self.identity_pool_id:
-            self.identity_client = boto3.client('cognito-identity', region_name=self.region)
+            self.identity_client = get_client('cognito-identity', region=self.region, signed=False)
+
+    def warm_up(self):
+        """
+        Open HTTPS connections to the Cognito endpoints ahead of the first call
+
+        Performs the DNS lookup, TCP connect and TLS handshake for each client
+        and parks the connection in the client's pool, where the next request
+        picks it up. Intended to run on a background thread while the user is
+        still typing; failures are logged at debug level and otherwise ignored
+        (the request will connect itself).
+
+        botocore has no public way to pre-open a connection, and a real API
+        call would count against the pool's quotas and show up as a failed
+        request, so this reaches into URLLib3Session. It only does so on the
+        botocore releases it was checked against (WARM_UP_BOTOCORE).
+
+        Returns:
+            int: Number of connections opened
+        """
+        if not _warm_up_supported():
+            logger.debug("Skipping connection warm-up: untested botocore %s", botocore.__version__)
+            return 0
+
+        opened = 0
+        for client in (getattr(self, 'cognito_client', None), getattr(self, 'identity_client', None)):
+            if client is None:
+                continue
+            try:
+                _open_connection(client)
+                opened += 1
+            except Exception as e:
+                logger.debug("Connection warm-up for %s failed: %s", client.meta.endpoint_url, e)
+        return opened
+
+    def _call(self, client, api, limiter=None, **kwargs):
+        """Call a Cognito API through the shared throttle (and an optional extra limiter)"""
+        if limiter:
+            limiter.acquire()
+        return self.throttle.call(api, getattr(client, api), **kwargs)
 
     def authenticate(self, username, password):
         """
         Authenticate user with Cognito using USER_PASSWORD_AUTH flow
         Returns: dict with tokens (IdToken, AccessToken, RefreshToken)
         """
+        logger.info("[AUTH] Authenticating with Cognito...")
+        tokens = self._authenticate(username, password)
+        logger.info("[OK] Authentication successful!")
+        return tokens
+
+    @traced('authenticate')
+    def _authenticate(self, username, password, limiter=None):
         try:
-            print(f"[AUTH] Authenticating with Cognito...")
-            response = self.cognito_client.initiate_auth(
+            response = self._call(
+                self.cognito_client, 'initiate_auth', limiter,
                 ClientId=self.app_client_id,
                 AuthFlow='USER_PASSWORD_AUTH',
                 AuthParameters={
@@ -43,9 +127,7 @@ class CognitoAuthenticator:
             )
 
             if 'AuthenticationResult' in response:
-                tokens = response['AuthenticationResult']
-                print(f"[OK] Authentication successful!")
-                return tokens
+                return response['AuthenticationResult']
             else:
                 raise Exception("Authentication did not return tokens")
 
@@ -65,32 +147,61 @@ class CognitoAuthenticator:
         Exchange Cognito ID token for temporary AWS credentials
         Returns: dict with AWS credentials
         """
+        logger.info("[AUTH] Exchanging Cognito token for AWS credentials...")
+        identity_id, credentials = self._get_aws_credentials(id_token)
+        logger.info("[AUTH] Identity ID: %s", identity_id, extra={'identity_id': identity_id})
+        logger.info("[OK] AWS credentials obtained!")
+        logger.info("[INFO] Credentials expire at: %s", credentials['Expiration'],
+                    extra={'expiration': credentials['Expiration']})
+        return credentials
+
+    @traced('get_aws_credentials')
+    def _get_aws_credentials(self, id_token, limiter=None):
+        logins = {
+            f'cognito-idp.{self.region}.amazonaws.com/{self.user_pool_id}': id_token
+        }
         try:
-            print(f"[AUTH] Exchanging Cognito token for AWS credentials...")
+            sub = decode_jwt_claims(id_token).get('sub')
+        except ValueError:
+            sub = None
 
-            # Get Identity ID
-            identity_response = self.identity_client.get_id(
-                IdentityPoolId=self.identity_pool_id,
-                Logins={
-                    f'cognito-idp.{self.region}.amazonaws.com/{self.user_pool_id}': id_token
-                }
-            )
-            identity_id = identity_response['IdentityId']
-            print(f"[AUTH] Identity ID: {identity_id}")
-
-            # Get credentials for identity
-            credentials_response = self.identity_client.get_credentials_for_identity(
-                IdentityId=identity_id,
-                Logins={
-                    f'cognito-idp.{self.region}.amazonaws.com/{self.user_pool_id}': id_token
-                }
-            )
+        try:
+            # The IdentityId of a user never changes, so reuse the cached one
+            identity_id = get_cached_identity_id(self.identity_pool_id, sub) if sub else None
+            if identity_id:
+                try:
+                    credentials_response = self._call(
+                        self.identity_client, 'get_credentials_for_identity', limiter,
+                        IdentityId=identity_id,
+                        Logins=logins
+                    )
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in ('ResourceNotFoundException', 'NotAuthorizedException'):
+                        raise
+                    # Stale or mismatched entry: look the identity up again
+                    forget_identity_id(self.identity_pool_id, sub)
+                    identity_id = None
+
+            if not identity_id:
+                # Get Identity ID
+                identity_response = self._call(
+                    self.identity_client, 'get_id', limiter,
+                    IdentityPoolId=self.identity_pool_id,
+                    Logins=logins
+                )
+                identity_id = identity_response['IdentityId']
+                if sub:
+                    cache_identity_id(self.identity_pool_id, sub, identity_id)
+
+                # Get credentials for identity
+                credentials_response = self._call(
+                    self.identity_client, 'get_credentials_for_identity', limiter,
+                    IdentityId=identity_id,
+                    Logins=logins
+                )
 
             credentials = credentials_response['Credentials']
-            print(f"[OK] AWS credentials obtained!")
-            print(f"[INFO] Credentials expire at: {credentials['Expiration']}")
-
-            return {
+            return identity_id, {
                 'AccessKeyId': credentials['AccessKeyId'],
                 'SecretAccessKey': credentials['SecretKey'],
                 'SessionToken': credentials['SessionToken'],
@@ -102,9 +213,16 @@ class CognitoAuthenticator:
 
     def refresh_credentials(self, refresh_token):
         """Refresh AWS credentials using refresh token"""
+        logger.info("[AUTH] Refreshing credentials...")
+        tokens = self._refresh(refresh_token)
+        logger.info("[OK] Credentials refreshed successfully!")
+        return tokens
+
+    @traced('refresh_tokens')
+    def _refresh(self, refresh_token, limiter=None):
         try:
-            print(f"[AUTH] Refreshing credentials...")
-            response = self.cognito_client.initiate_auth(
+            response = self._call(
+                self.cognito_client, 'initiate_auth', limiter,
                 ClientId=self.app_client_id,
                 AuthFlow='REFRESH_TOKEN_AUTH',
                 AuthParameters={
@@ -113,26 +231,102 @@ class CognitoAuthenticator:
             )
 
             if 'AuthenticationResult' in response:
-                tokens = response['AuthenticationResult']
-                print(f"[OK] Credentials refreshed successfully!")
-                return tokens
+                return response['AuthenticationResult']
             else:
                 raise Exception("Refresh did not return tokens")
 
         except ClientError as e:
             raise Exception(f"Failed to refresh credentials: {e.response['Error']['Message']}")
 
+    def authenticate_many(self, users, max_workers=None, rate_limit=None):
+        """
+        Authenticate many users and obtain AWS credentials for each, concurrently
+
+        Users are processed on a thread pool sharing this authenticator's
+        pooled Cognito clients. Every Cognito call (initiate_auth, get_id,
+        get_credentials_for_identity) first takes a token from a shared
+        batch rate limiter and then goes through the per-API throttle, so
+        the batch stays within the account's quotas.
+        A failure for one user is recorded in its result and does not
+        stop the batch.
+
+        Args:
+            users: Iterable of (username, password) tuples, or dicts with
+                   'username' and either 'password' or 'refresh_token'
+            max_workers: Worker threads (default: config 'batch_concurrency' or 8)
+            rate_limit: Maximum Cognito requests per second across the batch
+                        (default: config 'auth_rate_limit' or 25)
+
+        Returns:
+            dict with:
+                results: list (in input order) of dicts with username, tokens,
+                         credentials, error (None on success) and elapsed seconds
+                succeeded, failed: counts
+                elapsed: wall time in seconds
+                throughput: users per second
+                throttle_wait: total seconds spent waiting on the batch rate limiter
+                throttle: per-API throttle metrics (see Throttle.metrics)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from .throttle import TokenBucket
+
+        entries = [dict(username=u[0], password=u[1]) if isinstance(u, (tuple, list)) else dict(u) for u in users]
+        max_workers = max_workers or self.config.get('batch_concurrency', 8)
+        limiter = TokenBucket(rate_limit or self.config.get('auth_rate_limit', 25))
+
+        def run(entry):
+            started = time.perf_counter()
+            result = {'username': entry.get('username'), 'tokens': None, 'credentials': None, 'error': None}
+            try:
+                if entry.get('password') is not None:
+                    tokens = self._authenticate(entry['username'], entry['password'], limiter)
+                elif entry.get('refresh_token'):
+                    tokens = self._refresh(entry['refresh_token'], limiter)
+                else:
+                    raise Exception("A password or refresh token is required")
+                result['tokens'] = tokens
+                result['credentials'] = self._get_aws_credentials(tokens['IdToken'], limiter)[1]
+            except Exception as e:
+                result['error'] = str(e)
+            result['elapsed'] = time.perf_counter() - started
+            return result
+
+        started = time.perf_counter()
+        if entries:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(entries)))) as executor:
+                results = list(executor.map(propagate(run), entries))
+        else:
+            results = []
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(1 for r in results if r['error'] is None)
+        return {
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed': elapsed,
+            'throughput': len(results) / elapsed if elapsed > 0 else 0.0,
+            'throttle_wait': limiter.waited,
+            'throttle': self.throttle.metrics()
+        }
+
     def register(self, email, password, first_name=None, last_name=None, lambda_url=None):
         """
         Register a new user via Lambda registration endpoint
         Returns: dict with registration result
         """
+        logger.info("[REGISTER] Submitting registration request...")
+        result = self._register(email, password, first_name, last_name, lambda_url)
+        logger.info("[OK] Registration submitted successfully!")
+        return result
+
+    def _register(self, email, password, first_name=None, last_name=None, lambda_url=None):
         if not lambda_url:
             raise Exception("Lambda URL is required for registration. Please set 'lambda_url' in config or pass as parameter.")
 
-        try:
-            print(f"[REGISTER] Submitting registration request...")
+        from ..transport import get_transport, TransportError
 
+        try:
             # Build registration data
             data = {
                 'email': email,
@@ -145,32 +339,91 @@ class CognitoAuthenticator:
             if last_name:
                 data['last_name'] = last_name
 
-            # Call Lambda registration endpoint
-            response = requests.post(
+            # Call Lambda registration endpoint over the shared, pooled transport.
+            # Each request emails the administrators and the endpoint does not
+            # deduplicate, so it is sent once and never retried.
+            status_code, response_data = get_transport(self.config).post_json(
                 f"{lambda_url}register",
-                json=data,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
+                data,
+                idempotent=False
             )
 
-            response_data = response.json()
-
-            if response.status_code == 200:
-                print(f"[OK] Registration submitted successfully!")
+            if status_code == 200:
                 return response_data
             else:
                 error_msg = response_data.get('error', 'Registration failed')
                 raise Exception(error_msg)
 
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
             raise Exception(f"Network error during registration: {e}")
         except json.JSONDecodeError:
             raise Exception("Invalid response from registration service")
         except Exception as e:
-            if "Lambda URL is required" in str(e):
-                raise
             raise Exception(f"Registration failed: {e}")
 
+    def register_many(self, users, lambda_url=None, max_workers=None):
+        """
+        Register many users concurrently over the shared HTTP transport
+
+        A failure for one user is recorded in its result and does not stop
+        the batch.
+
+        Args:
+            users: Iterable of dicts with 'email', 'password' and optional
+                   'first_name' / 'last_name'
+            lambda_url: Registration endpoint (default: config 'lambda_url')
+            max_workers: Worker threads (default: config 'batch_concurrency' or 8)
+
+        Returns:
+            dict with:
+                results: list (in input order) of dicts with email, result,
+                         error (None on success) and elapsed seconds
+                succeeded, failed: counts
+                elapsed: wall time in seconds
+                throughput: registrations per second
+                transport: HTTP transport metrics (see HttpTransport.metrics)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from ..transport import get_transport
+
+        users = list(users)
+        lambda_url = lambda_url or self.config.get('lambda_url')
+        if not lambda_url:
+            raise Exception("Lambda URL is required for registration. Please set 'lambda_url' in config or pass as parameter.")
+        max_workers = max_workers or self.config.get('batch_concurrency', 8)
+
+        def run(user):
+            started = time.perf_counter()
+            result = {'email': user.get('email'), 'result': None, 'error': None}
+            try:
+                result['result'] = self._register(
+                    user['email'], user['password'],
+                    user.get('first_name'), user.get('last_name'),
+                    lambda_url
+                )
+            except Exception as e:
+                result['error'] = str(e)
+            result['elapsed'] = time.perf_counter() - started
+            return result
+
+        started = time.perf_counter()
+        if users:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(users)))) as executor:
+                results = list(executor.map(propagate(run), users))
+        else:
+            results = []
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(1 for r in results if r['error'] is None)
+        return {
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed': elapsed,
+            'throughput': len(results) / elapsed if elapsed > 0 else 0.0,
+            'transport': get_transport(self.config).metrics()
+        }
+
     def forgot_password(self, username):
         """
         Initiate forgot password flow
@@ -178,15 +431,16 @@ class CognitoAuthenticator:
         Returns: dict with CodeDeliveryDetails
         """
         try:
-            print(f"[FORGOT-PASSWORD] Initiating forgot password flow...")
+            logger.info("[FORGOT-PASSWORD] Initiating forgot password flow...")
 
-            response = self.cognito_client.forgot_password(
+            response = self._call(
+                self.cognito_client, 'forgot_password',
                 ClientId=self.app_client_id,
                 Username=username
             )
 
-            print(f"[OK] Verification code sent to your email!")
-            print(f"[INFO] Destination: {response['CodeDeliveryDetails'].get('Destination', 'your email')}")
+            logger.info("[OK] Verification code sent to your email!")
+            logger.info("[INFO] Destination: %s", response['CodeDeliveryDetails'].get('Destination', 'your email'))
 
             return response['CodeDeliveryDetails']
 
@@ -207,17 +461,18 @@ class CognitoAuthenticator:
         Sets the new password
         """
         try:
-            print(f"[CONFIRM-PASSWORD] Confirming new password...")
+            logger.info("[CONFIRM-PASSWORD] Confirming new password...")
 
-            self.cognito_client.confirm_forgot_password(
+            self._call(
+                self.cognito_client, 'confirm_forgot_password',
                 ClientId=self.app_client_id,
                 Username=username,
                 ConfirmationCode=code,
                 Password=new_password
             )
 
-            print(f"[OK] Password changed successfully!")
-            print(f"[INFO] You can now login with your new password")
+            logger.info("[OK] Password changed successfully!")
+            logger.info("[INFO] You can now login with your new password")
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -237,16 +492,17 @@ class CognitoAuthenticator:
         Change password (requires current password and access token)
         """
         try:
-            print(f"[CHANGE-PASSWORD] Changing password...")
+            logger.info("[CHANGE-PASSWORD] Changing password...")
 
-            self.cognito_client.change_password(
+            self._call(
+                self.cognito_client, 'change_password',
                 AccessToken=access_token,
                 PreviousPassword=old_password,
                 ProposedPassword=new_password
             )
 
-            print(f"[OK] Password changed successfully!")
-            print(f"[INFO] You can continue using your current session")
+            logger.info("[OK] Password changed successfully!")
+            logger.info("[INFO] You can continue using your current session")
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
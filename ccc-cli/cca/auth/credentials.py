@@ -1,16 +1,151 @@
 """
 AWS Credentials Management
 Handles saving and loading AWS credentials to/from ~/.aws/credentials file.
+
+Profiles are edited in place: only the byte range of the target section
+is replaced, so other profiles, comments and formatting are preserved and
+the cost does not depend on how many profiles the file holds beyond a
+single scan. Edits hold an advisory lock and are published atomically
+via rename, so concurrent logins for different profiles do not race.
 """
 
-import os
-import configparser
+import logging
+import re
 from pathlib import Path
 
+from ..clients import invalidate
+from ..fsutil import atomic_write, FileLock
+from ..tracing import get_tracer
+
+
+logger = logging.getLogger(__name__)
+
 
 # Configuration file paths
 CREDENTIALS_FILE = Path.home() / ".aws" / "credentials"
 
+# Comment written after each profile's keys
+_EXPIRES_MARKER = b'# expires_at ='
+
+# Section header, e.g. "[cca]"
+_SECTION_RE = re.compile(rb'^[ \t]*\[([^\]\r\n]*)\][ \t]*\r?$', re.MULTILINE)
+
+
+def _lock_file():
+    return CREDENTIALS_FILE.parent / ".credentials.lock"
+
+
+def _read():
+    try:
+        return CREDENTIALS_FILE.read_bytes()
+    except FileNotFoundError:
+        return b''
+
+
+def _write(data):
+    # Follow a symlinked credentials file instead of replacing the link
+    atomic_write(CREDENTIALS_FILE.resolve(), data, mode=0o600)
+
+
+def _newline(data):
+    return b'\r\n' if b'\r\n' in data else b'\n'
+
+
+def _line_end(data, pos):
+    """Offset just past the line that contains pos (including its newline)"""
+    index = data.find(b'\n', pos)
+    return len(data) if index == -1 else index + 1
+
+
+def _find_section(data, profile):
+    """
+    Locate a profile's section
+
+    The section runs from its header to the end of its last key/value or
+    continuation line (the '# expires_at' line written with it counts as
+    part of it). Comments and blank lines after that are left alone: they
+    usually describe the next section.
+
+    Returns:
+        tuple: (start, end) byte offsets of the section, or None if absent
+    """
+    name = profile.encode('utf-8')
+    headers = list(_SECTION_RE.finditer(data))
+    for index, match in enumerate(headers):
+        if match.group(1).strip() != name:
+            continue
+        limit = headers[index + 1].start() if index + 1 < len(headers) else len(data)
+        end = pos = _line_end(data, match.end())
+        while pos < limit:
+            line_end = _line_end(data, pos)
+            line = data[pos:line_end].strip()
+            if line and (not line.startswith((b'#', b';')) or line.startswith(_EXPIRES_MARKER)):
+                end = line_end
+            pos = line_end
+        return match.start(), end
+    return None
+
+
+def _render_section(profile, credentials, newline=b'\n'):
+    lines = [
+        f"[{profile}]",
+        f"aws_access_key_id = {credentials['AccessKeyId']}",
+        f"aws_secret_access_key = {credentials['SecretAccessKey']}",
+        f"aws_session_token = {credentials['SessionToken']}",
+        f"# expires_at = {credentials['Expiration']}",
+        ""
+    ]
+    return newline.join(line.encode('utf-8') for line in lines)
+
+
+def _replace_section(data, profile, block):
+    """Return data with the profile's section replaced by block (appended if absent)"""
+    span = _find_section(data, profile)
+    if span is not None:
+        start, end = span
+        return data[:start] + block + data[end:]
+
+    if not data:
+        return block
+    newline = _newline(data)
+    if not data.endswith(newline):
+        data += newline
+    if not data.endswith(newline * 2):
+        data += newline
+    return data + block
+
+
+def load_credentials(profile='cca'):
+    """
+    Read a profile's credentials back from ~/.aws/credentials
+
+    Args:
+        profile: AWS profile name (default: 'cca')
+
+    Returns:
+        dict with AccessKeyId, SecretAccessKey, SessionToken and Expiration
+        (None for keys that are absent), or None if the profile is missing
+    """
+    data = _read()
+    span = _find_section(data, profile)
+    if span is None:
+        return None
+
+    values = {}
+    for line in data[span[0]:span[1]].decode('utf-8', 'replace').splitlines()[1:]:
+        line = line.strip()
+        if line.startswith(_EXPIRES_MARKER.decode()):
+            values['expires_at'] = line[len(_EXPIRES_MARKER):].strip()
+        elif '=' in line and not line.startswith(('#', ';')):
+            key, value = line.split('=', 1)
+            values[key.strip().lower()] = value.strip()
+    return {
+        'AccessKeyId': values.get('aws_access_key_id'),
+        'SecretAccessKey': values.get('aws_secret_access_key'),
+        'SessionToken': values.get('aws_session_token'),
+        'Expiration': values.get('expires_at')
+    }
+
 
 def save_credentials(credentials, profile='cca'):
     """
@@ -21,45 +156,45 @@ def save_credentials(credentials, profile='cca'):
         profile: AWS profile name (default: 'cca')
     """
     # Ensure .aws directory exists
-    credentials_dir = CREDENTIALS_FILE.parent
-    credentials_dir.mkdir(parents=True, exist_ok=True)
+    CREDENTIALS_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    # Read existing credentials file
-    config_content = {}
-    if CREDENTIALS_FILE.exists():
-        try:
-            parser = configparser.ConfigParser()
-            parser.read(CREDENTIALS_FILE)
-            config_content = {section: dict(parser.items(section)) for section in parser.sections()}
-        except Exception as e:
-            print(f"[WARN] Could not read existing credentials file: {e}")
-
-    # Update profile
-    config_content[profile] = {
-        'aws_access_key_id': credentials['AccessKeyId'],
-        'aws_secret_access_key': credentials['SecretAccessKey'],
-        'aws_session_token': credentials['SessionToken'],
-        '# expires_at': credentials['Expiration']
-    }
+    with get_tracer().span('save_credentials', profiles=1), FileLock(_lock_file()):
+        data = _read()
+        block = _render_section(profile, credentials, _newline(data))
+        _write(_replace_section(data, profile, block))
 
-    # Write credentials file
-    parser = configparser.ConfigParser()
-    for section, values in config_content.items():
-        parser.add_section(section)
-        for key, value in values.items():
-            parser.set(section, key, value)
+    # Sessions built from the old keys must not be reused
+    invalidate(profile)
 
-    with open(CREDENTIALS_FILE, 'w') as f:
-        parser.write(f)
+    logger.info("[OK] Credentials saved to %s", CREDENTIALS_FILE, extra={'path': str(CREDENTIALS_FILE)})
+    logger.info("[OK] AWS Profile: %s", profile, extra={'profile': profile})
 
-    # Set restrictive permissions (Unix-like systems)
-    try:
-        os.chmod(CREDENTIALS_FILE, 0o600)
-    except Exception:
-        pass
 
-    print(f"[OK] Credentials saved to {CREDENTIALS_FILE}")
-    print(f"[OK] AWS Profile: {profile}")
+def save_credentials_batch(credentials_by_profile):
+    """
+    Save AWS credentials for several profiles with a single file update
+
+    Args:
+        credentials_by_profile: dict of profile name -> credentials dict
+    """
+    if not credentials_by_profile:
+        return
+
+    CREDENTIALS_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    with get_tracer().span('save_credentials', profiles=len(credentials_by_profile)), FileLock(_lock_file()):
+        data = _read()
+        newline = _newline(data)
+        for profile, credentials in credentials_by_profile.items():
+            data = _replace_section(data, profile, _render_section(profile, credentials, newline))
+        _write(data)
+
+    for profile in credentials_by_profile:
+        invalidate(profile)
+
+    logger.info("[OK] Credentials saved to %s", CREDENTIALS_FILE, extra={'path': str(CREDENTIALS_FILE)})
+    logger.info("[OK] AWS Profiles: %s", ', '.join(credentials_by_profile),
+                extra={'profiles': list(credentials_by_profile)})
 
 
 def remove_credentials(profile='cca'):
@@ -71,18 +206,23 @@ def remove_credentials(profile='cca'):
     """
     if CREDENTIALS_FILE.exists():
         try:
-            parser = configparser.ConfigParser()
-            parser.read(CREDENTIALS_FILE)
-
-            if parser.has_section(profile):
-                parser.remove_section(profile)
-
-                with open(CREDENTIALS_FILE, 'w') as f:
-                    parser.write(f)
-
-                print(f"[OK] Removed profile '{profile}' from {CREDENTIALS_FILE}")
-                return True
+            with FileLock(_lock_file()):
+                data = _read()
+                span = _find_section(data, profile)
+                if span is None:
+                    return False
+
+                start, end = span
+                before, after = data[:start], data[end:]
+                if not before or before.endswith(_newline(data) * 2):
+                    # Don't leave a double blank line where the section was
+                    after = after.lstrip(b'\r\n')
+                _write(before + after)
+
+            invalidate(profile)
+            logger.info("[OK] Removed profile '%s' from %s", profile, CREDENTIALS_FILE)
+            return True
         except Exception as e:
-            print(f"[WARN] Could not remove credentials: {e}")
+            logger.warning("[WARN] Could not remove credentials: %s", e)
             return False
     return False
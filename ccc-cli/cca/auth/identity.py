@@ -0,0 +1,102 @@
+"""
+Identity ID Cache
+Remembers the Cognito IdentityId of each (identity pool, user sub) in
+~/.ccc/identity-ids.json. The mapping never changes for a user, so the
+credential exchange can skip the get_id round trip after the first login.
+"""
+
+import logging
+import json
+import threading
+
+from ..config import CONFIG_DIR
+from ..fsutil import atomic_write, FileLock
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cache file path
+IDENTITY_CACHE_FILE = CONFIG_DIR / "identity-ids.json"
+
+_lock = threading.Lock()
+_memory = None      # "identity_pool_id|sub" -> IdentityId, loaded on first use
+
+
+def _key(identity_pool_id, sub):
+    return f"{identity_pool_id}|{sub}"
+
+
+def _read():
+    try:
+        with open(IDENTITY_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _update(key, identity_id):
+    global _memory
+    # Re-read under the lock so concurrent processes do not drop each other's entries
+    IDENTITY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(IDENTITY_CACHE_FILE.with_name(IDENTITY_CACHE_FILE.name + '.lock')):
+        data = _read()
+        if identity_id is None:
+            if data.pop(key, None) is None:
+                _memory = data
+                return
+        else:
+            data[key] = identity_id
+        atomic_write(IDENTITY_CACHE_FILE, json.dumps(data, indent=2))
+    _memory = data
+
+
+def get_cached_identity_id(identity_pool_id, sub):
+    """
+    Look up the cached IdentityId of a user
+
+    Args:
+        identity_pool_id: Cognito Identity Pool ID
+        sub: The user's 'sub' claim
+
+    Returns:
+        str: IdentityId, or None if not cached
+    """
+    global _memory
+    with _lock:
+        if _memory is None:
+            _memory = _read()
+        return _memory.get(_key(identity_pool_id, sub))
+
+
+def cache_identity_id(identity_pool_id, sub, identity_id):
+    """
+    Remember a user's IdentityId
+
+    Args:
+        identity_pool_id: Cognito Identity Pool ID
+        sub: The user's 'sub' claim
+        identity_id: IdentityId returned by get_id
+    """
+    with _lock:
+        if _memory is not None and _memory.get(_key(identity_pool_id, sub)) == identity_id:
+            return
+        try:
+            _update(_key(identity_pool_id, sub), identity_id)
+        except Exception as e:
+            logger.warning("[WARN] Could not cache Identity ID: %s", e)
+
+
+def forget_identity_id(identity_pool_id, sub):
+    """
+    Drop a cached IdentityId (e.g. after Cognito rejected it)
+
+    Args:
+        identity_pool_id: Cognito Identity Pool ID
+        sub: The user's 'sub' claim
+    """
+    with _lock:
+        try:
+            _update(_key(identity_pool_id, sub), None)
+        except Exception as e:
+            logger.warning("[WARN] Could not update Identity ID cache: %s", e)
@@ -0,0 +1,108 @@
+"""
+Botocore Credentials Provider
+Plugs Cognito-federated AWS credentials directly into a botocore/boto3
+session. Credentials live in memory and are refreshed by botocore's
+RefreshableCredentials (which serializes refreshes with a lock) through
+CognitoAuthenticator, so long-running services never touch
+~/.aws/credentials on the hot path.
+"""
+
+from botocore.credentials import CredentialProvider, RefreshableCredentials
+from botocore.session import get_session as get_botocore_session
+
+from .tokens import is_token_fresh
+
+
+class CognitoCredentialProvider(CredentialProvider):
+    """Botocore credential provider backed by a CognitoAuthenticator"""
+
+    METHOD = 'cca-cognito'
+    CANONICAL_NAME = 'CcaCognito'
+
+    # Reuse a stored ID token only if it is valid for at least this long (seconds)
+    ID_TOKEN_MARGIN = 60
+
+    def __init__(self, authenticator, refresh_token=None, id_token=None):
+        """
+        Args:
+            authenticator: CognitoAuthenticator for the user/identity pool
+            refresh_token: Cognito refresh token (from 'ccc login' or authenticate())
+            id_token: Optional still-valid ID token, used for the first exchange
+        """
+        super().__init__()
+        if not refresh_token and not id_token:
+            raise Exception("A refresh token or ID token is required")
+        self.authenticator = authenticator
+        self._refresh_token = refresh_token
+        self._id_token = id_token
+
+    def _fetch_metadata(self):
+        id_token = self._id_token
+        if not is_token_fresh(id_token, self.ID_TOKEN_MARGIN):
+            if not self._refresh_token:
+                raise Exception("ID token expired and no refresh token is available")
+            tokens = self.authenticator.refresh_credentials(self._refresh_token)
+            id_token = tokens['IdToken']
+            if tokens.get('RefreshToken'):
+                self._refresh_token = tokens['RefreshToken']
+        self._id_token = id_token
+
+        credentials = self.authenticator.get_aws_credentials(id_token)
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration']
+        }
+
+    def load(self):
+        """
+        Returns:
+            RefreshableCredentials that call back into Cognito before they expire
+        """
+        return RefreshableCredentials.create_from_metadata(
+            metadata=self._fetch_metadata(),
+            refresh_using=self._fetch_metadata,
+            method=self.METHOD
+        )
+
+
+def create_cognito_session(config=None, authenticator=None, refresh_token=None, id_token=None, region=None):
+    """
+    Create a boto3 Session whose credentials come straight from Cognito
+
+    Args:
+        config: Configuration dict (default: load_config()); its 'tokens'
+                supply the refresh/ID tokens when not given explicitly
+        authenticator: CognitoAuthenticator to use (default: built from config)
+        refresh_token: Cognito refresh token
+        id_token: Optional still-valid ID token
+        region: Region for AWS clients (default: the authenticator's region)
+
+    Returns:
+        boto3.Session
+
+    Example:
+        session = create_cognito_session()
+        s3 = session.client('s3')   # refreshed transparently, no file I/O
+    """
+    import boto3
+
+    if config is None:
+        from ..config import load_config
+        config = load_config()
+    if authenticator is None:
+        from .cognito import CognitoAuthenticator
+        authenticator = CognitoAuthenticator(config)
+
+    tokens = config.get('tokens', {})
+    provider = CognitoCredentialProvider(
+        authenticator,
+        refresh_token=refresh_token or tokens.get('refresh_token'),
+        id_token=id_token or tokens.get('id_token')
+    )
+
+    botocore_session = get_botocore_session()
+    botocore_session.get_component('credential_provider').insert_before('env', provider)
+
+    return boto3.Session(botocore_session=botocore_session, region_name=region or authenticator.region)
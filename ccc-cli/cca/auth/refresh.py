@@ -0,0 +1,252 @@
+"""
+Credential Refresh Engine
+Refreshes Cognito-federated AWS credentials ahead of their Expiration.
+
+Refreshes are single-flight: a thread lock serializes callers inside one
+process and a per-profile lock file under ~/.ccc/locks serializes
+processes, so when many jobs start together only one of them calls
+REFRESH_TOKEN_AUTH and the others pick up its result from the cache.
+Each refresher draws a random jitter on top of the refresh window so that
+a fleet does not hit the deadline at the same instant.
+"""
+
+import random
+import threading
+from datetime import datetime, timezone, timedelta
+
+from ..config import CONFIG_DIR, load_config, save_config, get_profile_config
+from ..fsutil import FileLock
+from ..tracing import get_tracer, traced
+from .tokens import is_token_fresh
+from .cache import (
+    DEFAULT_REFRESH_WINDOW,
+    load_cached_credentials,
+    save_cached_credentials,
+    credentials_expiry
+)
+
+
+# Per-profile lock files
+LOCK_DIR = CONFIG_DIR / "locks"
+
+# Maximum random delay (in seconds) added on top of the refresh window
+DEFAULT_REFRESH_JITTER = 60
+
+# Wait before retrying a failed background refresh (seconds)
+REFRESH_RETRY_DELAY = 30
+
+
+class CredentialRefresher:
+    """Expiry-aware, single-flight refresh of the credentials for one profile"""
+
+    def __init__(self, config, refresh_window=None, jitter=None, authenticator=None, name=None):
+        """
+        Args:
+            config: Configuration dict (must contain tokens from 'ccc login')
+            refresh_window: Refresh when credentials expire within this many seconds
+            jitter: Maximum random extra lead time in seconds
+            authenticator: CognitoAuthenticator to reuse (created on first refresh if omitted)
+            name: Named profile under config['profiles'] to refresh instead of
+                  the top-level settings; its tokens are read from and saved
+                  back to that profile
+
+        Raises:
+            KeyError: If the named profile is not defined
+        """
+        self.name = name
+        self.config = get_profile_config(config, name) if name else config
+        self.profile = self.config.get('profile', 'cca')
+        self.refresh_window = refresh_window if refresh_window is not None else self.config.get(
+            'refresh_window', DEFAULT_REFRESH_WINDOW)
+        self.jitter = jitter if jitter is not None else self.config.get('refresh_jitter', DEFAULT_REFRESH_JITTER)
+        self._authenticator = authenticator
+
+        self.credentials = load_cached_credentials(self.profile)
+        self.refresh_count = 0
+        self.refresh_errors = 0
+        self.last_refresh = None
+        self.last_error = None
+
+        self._lead = self._draw_lead()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def authenticator(self):
+        if self._authenticator is None:
+            from .cognito import CognitoAuthenticator
+            self._authenticator = CognitoAuthenticator(self.config)
+        return self._authenticator
+
+    @property
+    def lock_file(self):
+        return LOCK_DIR / f"{self.profile}.lock"
+
+    def _draw_lead(self):
+        return self.refresh_window + random.uniform(0, self.jitter)
+
+    def refresh_at(self, credentials, lead=None):
+        """
+        Time at which credentials should be refreshed
+
+        Returns:
+            datetime, or None if the credentials are missing or unreadable
+        """
+        if not credentials:
+            return None
+        try:
+            expiration = credentials_expiry(credentials)
+        except (KeyError, ValueError):
+            return None
+        return expiration - timedelta(seconds=self._lead if lead is None else lead)
+
+    def is_due(self, credentials, lead=None):
+        """Check whether credentials are missing or past their refresh time"""
+        deadline = self.refresh_at(credentials, lead)
+        return deadline is None or datetime.now(timezone.utc) >= deadline
+
+    def _reusable(self, cached, seen, force):
+        """Check whether cached credentials can be returned instead of refreshing"""
+        if not cached:
+            return False
+        if not force:
+            return not self.is_due(cached)
+        # Forced refresh: only reuse what another caller refreshed since we looked
+        return cached.get('Expiration') != seen and not self.is_due(cached, lead=self.refresh_window)
+
+    def get_credentials(self, force=False):
+        """
+        Return credentials, refreshing them first if they are due
+
+        Args:
+            force: Refresh even if the credentials are not due yet, unless
+                   another caller refreshes them while we wait for the lock
+
+        Returns:
+            dict with AccessKeyId, SecretAccessKey, SessionToken, Expiration
+        """
+        credentials = self.credentials
+        if not force and not self.is_due(credentials):
+            return credentials
+        seen = (credentials or {}).get('Expiration')
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            cached = load_cached_credentials(self.profile)
+            if self._reusable(cached, seen, force):
+                self.credentials = cached
+                return cached
+
+            lock = FileLock(self.lock_file)
+            with get_tracer().span('refresh_lock_wait'):
+                lock.acquire()
+            try:
+                # Another process may have refreshed while we waited
+                cached = load_cached_credentials(self.profile)
+                if self._reusable(cached, seen, force):
+                    self.credentials = cached
+                    return cached
+
+                try:
+                    self._refresh_locked(force)
+                except Exception as e:
+                    self.refresh_errors += 1
+                    self.last_error = str(e)
+                    raise
+            finally:
+                lock.release()
+
+            return self.credentials
+
+    @traced('refresh')
+    def _refresh_locked(self, force=False):
+        # Another process may have rotated the refresh token since we loaded the config
+        latest = self._stored_tokens(load_config())
+        if latest and latest.get('refresh_token'):
+            self.config['tokens'] = latest
+
+        stored = self.config.get('tokens') or {}
+        auth = self.authenticator
+
+        if not force and is_token_fresh(stored.get('id_token'), self.refresh_window):
+            # The ID token outlives the AWS credentials' refresh window, so the
+            # REFRESH_TOKEN_AUTH round trip can be skipped
+            id_token = stored['id_token']
+        else:
+            if not stored.get('refresh_token'):
+                raise Exception("No refresh token found. Please run 'ccc login' first.")
+
+            tokens = auth.refresh_credentials(stored['refresh_token'])
+            id_token = tokens['IdToken']
+
+            stored['id_token'] = tokens['IdToken']
+            stored['access_token'] = tokens['AccessToken']
+            # Note: Refresh token might not be returned (reuse existing one)
+            if 'RefreshToken' in tokens:
+                stored['refresh_token'] = tokens['RefreshToken']
+            stored['retrieved_at'] = datetime.now(timezone.utc).isoformat()
+            self.config['tokens'] = stored
+            self._save_tokens(stored)
+
+        credentials = auth.get_aws_credentials(id_token)
+        save_cached_credentials(credentials, profile=self.profile)
+
+        self.credentials = credentials
+        self.refresh_count += 1
+        self.last_refresh = datetime.now(timezone.utc).isoformat()
+        self._lead = self._draw_lead()
+
+    def _stored_tokens(self, config):
+        if self.name:
+            return config.get('profiles', {}).get(self.name, {}).get('tokens')
+        return config.get('tokens')
+
+    def _save_tokens(self, tokens):
+        if not self.name:
+            save_config(self.config)
+            return
+        # self.config is the flattened profile view: write back into the full config
+        config = load_config()
+        config.setdefault('profiles', {}).setdefault(self.name, {})['tokens'] = tokens
+        save_config(config)
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = self.refresh_at(self.credentials)
+            delay = 0 if deadline is None else (deadline - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            try:
+                self.get_credentials()
+            except Exception:
+                self._stop.wait(REFRESH_RETRY_DELAY)
+                continue
+            # Window longer than the credential lifetime: don't spin
+            if self.is_due(self.credentials):
+                self._stop.wait(REFRESH_RETRY_DELAY)
+
+    def start(self):
+        """Start refreshing proactively on a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ccc-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self):
+        return {
+            'profile': self.profile,
+            'expiration': (self.credentials or {}).get('Expiration'),
+            'refresh_window': self.refresh_window,
+            'refresh_count': self.refresh_count,
+            'refresh_errors': self.refresh_errors,
+            'last_refresh': self.last_refresh,
+            'last_error': self.last_error
+        }
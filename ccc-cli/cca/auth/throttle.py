@@ -0,0 +1,251 @@
+"""
+Request Throttling
+Client-side rate limiting and retry for Cognito API calls, so bursts of
+logins stay within the account's per-second request quotas and ride out
+throttling and transient network or service errors instead of failing.
+"""
+
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    Tokens are added continuously at `rate` per second up to `capacity`;
+    each call consumes one. Callers block until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: Sustained requests per second
+            capacity: Maximum burst size (default: max(1, rate))
+        """
+        if rate <= 0:
+            raise Exception("Rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Totals across all callers, for reporting
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens without blocking
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Block until tokens are available, then take them
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens)
+            if not delay:
+                if waited:
+                    with self._lock:
+                        self.waited += waited
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+# Default requests per second for each Cognito quota category. These are
+# the documented per-account defaults; raise them in the config
+# ('cognito_rate_limits') if the account has higher quotas.
+DEFAULT_RATE_LIMITS = {
+    'UserAuthentication': 120,      # InitiateAuth
+    'UserAccountRecovery': 30,      # ForgotPassword, ConfirmForgotPassword
+    'UserUpdate': 25,               # ChangePassword
+    'GetId': 25,
+    'GetCredentialsForIdentity': 200,
+}
+
+# Quota category of each throttled API
+API_CATEGORIES = {
+    'initiate_auth': 'UserAuthentication',
+    'forgot_password': 'UserAccountRecovery',
+    'confirm_forgot_password': 'UserAccountRecovery',
+    'change_password': 'UserUpdate',
+    'get_id': 'GetId',
+    'get_credentials_for_identity': 'GetCredentialsForIdentity',
+}
+
+# Error codes that mean "slow down" rather than "request is wrong"
+THROTTLE_ERRORS = {
+    'TooManyRequestsException',
+    'LimitExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+
+# Service-side error codes worth retrying (besides any HTTP 5xx response)
+TRANSIENT_ERRORS = {
+    'InternalErrorException',
+    'InternalFailure',
+    'ServiceUnavailable',
+}
+
+
+def _retry_reason(error):
+    """
+    Classify a failed call
+
+    Returns:
+        str: 'throttled', 'transient' (connection errors, timeouts, 5xx) or
+             None if the call should not be retried
+    """
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        if code in THROTTLE_ERRORS:
+            return 'throttled'
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        if code in TRANSIENT_ERRORS or status >= 500:
+            return 'transient'
+        return None
+    # EndpointConnectionError, ConnectTimeoutError, ConnectionClosedError, ReadTimeoutError, ...
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return 'transient'
+    return None
+
+
+class Throttle:
+    """
+    Per-API rate limiting and retry for Cognito calls
+
+    Each call first takes a token from its quota category's bucket, then
+    runs; throttling errors and transient failures (connection errors,
+    timeouts, 5xx responses) are retried with exponential backoff and full
+    jitter (a random delay between 0 and min(max_delay, base_delay * 2**n)).
+    Botocore's own retries are disabled for the Cognito clients (see
+    cca.clients), so this is the only retry layer. Counters for every API
+    are available from metrics().
+    """
+
+    def __init__(self, rate_limits=None, max_attempts=5, base_delay=0.1, max_delay=5.0):
+        """
+        Args:
+            rate_limits: dict of quota category -> requests per second,
+                         overriding DEFAULT_RATE_LIMITS
+            max_attempts: Attempts per call before a throttling or transient error is raised
+            base_delay: Backoff base in seconds
+            max_delay: Backoff cap in seconds
+        """
+        rates = dict(DEFAULT_RATE_LIMITS)
+        rates.update(rate_limits or {})
+        self.buckets = {category: TokenBucket(rate) for category, rate in rates.items()}
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _record(self, api, **values):
+        with self._lock:
+            metrics = self._metrics.setdefault(api, {
+                'calls': 0, 'throttled': 0, 'transient': 0, 'retries': 0, 'failures': 0,
+                'rate_wait': 0.0, 'backoff_wait': 0.0
+            })
+            for key, value in values.items():
+                metrics[key] += value
+
+    def backoff(self, attempt):
+        """Full-jitter delay in seconds before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, api, method, **kwargs):
+        """
+        Call a Cognito client method under the API's rate limit, retrying throttles and transient errors
+
+        Args:
+            api: Client method name (e.g. 'initiate_auth'), used for the bucket and metrics
+            method: Bound client method to call
+            **kwargs: Request parameters
+
+        Returns:
+            The method's response
+
+        Raises:
+            botocore.exceptions.ClientError: Other errors immediately, throttling
+                and transient errors once max_attempts is reached
+            botocore.exceptions.BotoCoreError: Connection errors and timeouts
+                once max_attempts is reached
+        """
+        bucket = self.buckets.get(API_CATEGORIES.get(api))
+        for attempt in range(self.max_attempts):
+            rate_wait = bucket.acquire() if bucket else 0.0
+            self._record(api, calls=1, rate_wait=rate_wait)
+            try:
+                return method(**kwargs)
+            except Exception as e:
+                reason = _retry_reason(e)
+                if reason is None:
+                    raise
+                self._record(api, **{reason: 1})
+                if attempt + 1 >= self.max_attempts:
+                    self._record(api, failures=1)
+                    raise
+                delay = self.backoff(attempt)
+                self._record(api, retries=1, backoff_wait=delay)
+                time.sleep(delay)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: api -> {calls, throttled, transient, retries, failures, rate_wait, backoff_wait}
+        """
+        with self._lock:
+            return {api: dict(values) for api, values in self._metrics.items()}
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(region, rate_limits=None):
+    """
+    Get the process-wide Throttle for a region
+
+    Cognito quotas apply per account and region, so every authenticator in
+    the process shares one Throttle per region. rate_limits only take
+    effect when the region's Throttle is first created.
+
+    Args:
+        region: AWS region name
+        rate_limits: Optional dict of quota category -> requests per second
+
+    Returns:
+        Throttle
+    """
+    with _throttles_lock:
+        throttle = _throttles.get(region)
+        if throttle is None:
+            throttle = Throttle(rate_limits)
+            _throttles[region] = throttle
+        return throttle
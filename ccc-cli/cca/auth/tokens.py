@@ -0,0 +1,271 @@
+"""
+Cognito Token Introspection
+Decodes the claims of Cognito ID/access tokens locally and verifies their
+RS256 signatures against the user pool's JWKS, which is cached in memory
+and under ~/.ccc/jwks so a network round trip is only needed once a day.
+"""
+
+import json
+import time
+import hmac
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ..config import CONFIG_DIR
+from ..fsutil import atomic_write
+
+
+# JWKS cache directory and lifetime (seconds)
+JWKS_CACHE_DIR = CONFIG_DIR / "jwks"
+JWKS_TTL = 24 * 60 * 60
+
+# Verified tokens remembered in memory (least recently used are dropped first)
+MAX_VERIFIED_TOKENS = 256
+
+# ASN.1 DigestInfo prefix for SHA-256 (RFC 8017, section 9.2)
+_SHA256_DIGEST_INFO = bytes.fromhex('3031300d060960864801650304020105000420')
+
+_jwks_lock = threading.Lock()
+_jwks_memory = {}       # user_pool_id -> (fetched_at, jwks)
+_verified_lock = threading.Lock()
+_verified_tokens = OrderedDict()    # (token, user_pool_id, app_client_id) -> claims
+
+
+def _remember_verified(key, claims):
+    now = time.time()
+    with _verified_lock:
+        _verified_tokens[key] = claims
+        _verified_tokens.move_to_end(key)
+        # Expired tokens can never be served again; then trim to the size limit
+        for stale in [k for k, c in _verified_tokens.items() if c.get('exp', 0) <= now]:
+            del _verified_tokens[stale]
+        while len(_verified_tokens) > MAX_VERIFIED_TOKENS:
+            _verified_tokens.popitem(last=False)
+
+
+def _recall_verified(key):
+    with _verified_lock:
+        claims = _verified_tokens.get(key)
+        if claims is not None:
+            _verified_tokens.move_to_end(key)
+        return claims
+
+
+def _b64url_decode(value):
+    value += '=' * (-len(value) % 4)
+    return base64.urlsafe_b64decode(value.encode('ascii'))
+
+
+def _split(token):
+    parts = token.split('.')
+    if len(parts) != 3:
+        raise ValueError("Malformed JWT: expected 3 segments")
+    return parts
+
+
+def decode_jwt_header(token):
+    """
+    Decode the header of a JWT without verifying it
+
+    Returns:
+        dict: Header (alg, kid, ...)
+    """
+    return json.loads(_b64url_decode(_split(token)[0]))
+
+
+def decode_jwt_claims(token):
+    """
+    Decode the claims of a JWT without verifying its signature
+
+    Args:
+        token: Encoded JWT (e.g. config['tokens']['id_token'])
+
+    Returns:
+        dict: Claims (exp, sub, email, cognito:groups, ...)
+    """
+    return json.loads(_b64url_decode(_split(token)[1]))
+
+
+def token_expires_in(token):
+    """
+    Seconds until a JWT expires (negative if already expired, None if unreadable)
+    """
+    try:
+        return decode_jwt_claims(token)['exp'] - time.time()
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def is_token_fresh(token, margin=0):
+    """
+    Check whether a JWT is still valid for at least `margin` seconds
+
+    Args:
+        token: Encoded JWT (or None)
+        margin: Required remaining lifetime in seconds
+
+    Returns:
+        bool
+    """
+    if not token:
+        return False
+    remaining = token_expires_in(token)
+    return remaining is not None and remaining > margin
+
+
+def get_identity_claims(token):
+    """
+    Extract the commonly used identity claims from an ID token
+
+    Returns:
+        dict: {'sub', 'email', 'groups', 'exp'}
+    """
+    claims = decode_jwt_claims(token)
+    return {
+        'sub': claims.get('sub'),
+        'email': claims.get('email'),
+        'groups': claims.get('cognito:groups', []),
+        'exp': claims.get('exp')
+    }
+
+
+def _issuer(region, user_pool_id):
+    return f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+
+def get_jwks(region, user_pool_id, allow_fetch=True, refresh=False):
+    """
+    Get the JSON Web Key Set of a Cognito user pool
+
+    Looks in memory, then in ~/.ccc/jwks/, and downloads it only when both
+    are missing or older than JWKS_TTL (or when refresh=True).
+
+    Args:
+        region: AWS region of the user pool
+        user_pool_id: Cognito User Pool ID
+        allow_fetch: If False, never go to the network
+        refresh: Ignore cached copies (e.g. after a key rotation)
+
+    Returns:
+        dict: JWKS, or None if not cached and fetching is not allowed
+    """
+    now = time.time()
+    cache_file = JWKS_CACHE_DIR / f"{user_pool_id}.json"
+
+    with _jwks_lock:
+        if not refresh:
+            cached = _jwks_memory.get(user_pool_id)
+            if cached and now - cached[0] < JWKS_TTL:
+                return cached[1]
+
+            if cache_file.exists():
+                try:
+                    with open(cache_file, 'r') as f:
+                        stored = json.load(f)
+                    if now - stored['fetched_at'] < JWKS_TTL:
+                        _jwks_memory[user_pool_id] = (stored['fetched_at'], stored['jwks'])
+                        return stored['jwks']
+                except Exception:
+                    pass
+
+        if not allow_fetch:
+            return None
+
+        import requests
+
+        try:
+            response = requests.get(f"{_issuer(region, user_pool_id)}/.well-known/jwks.json", timeout=10)
+            response.raise_for_status()
+            jwks = response.json()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to download JWKS: {e}")
+
+        _jwks_memory[user_pool_id] = (now, jwks)
+        atomic_write(cache_file, json.dumps({'fetched_at': now, 'jwks': jwks}), mode=0o644)
+        return jwks
+
+
+def _rsa_verify(message, signature, n, e):
+    """Verify an RSASSA-PKCS1-v1_5 SHA-256 signature (RS256)"""
+    k = (n.bit_length() + 7) // 8
+    if len(signature) != k:
+        return False
+    encoded = pow(int.from_bytes(signature, 'big'), e, n).to_bytes(k, 'big')
+    digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    expected = b'\x00\x01' + b'\xff' * (k - len(digest_info) - 3) + b'\x00' + digest_info
+    return hmac.compare_digest(encoded, expected)
+
+
+def verify_jwt(token, region, user_pool_id, app_client_id=None, allow_fetch=True):
+    """
+    Verify a Cognito JWT and return its claims
+
+    Checks the RS256 signature against the user pool's JWKS, the issuer,
+    token_use ('id' or 'access'), the expiry and, when app_client_id is
+    given, the audience (ID tokens) or client_id (access tokens). Verified
+    tokens are remembered in memory (up to MAX_VERIFIED_TOKENS), so repeated
+    checks of the same token only re-check its expiry.
+
+    Args:
+        token: Encoded JWT
+        region: AWS region of the user pool
+        user_pool_id: Cognito User Pool ID
+        app_client_id: Expected app client ID (optional)
+        allow_fetch: If False, only verify against an already cached JWKS
+
+    Returns:
+        dict: Verified claims
+
+    Raises:
+        Exception: If the token is invalid, expired, or cannot be verified
+    """
+    cache_key = (token, user_pool_id, app_client_id)
+    claims = _recall_verified(cache_key)
+    if claims is None:
+        header_b64, payload_b64, signature_b64 = _split(token)
+        header = decode_jwt_header(token)
+        if header.get('alg') != 'RS256':
+            raise Exception(f"Unsupported token algorithm: {header.get('alg')}")
+
+        jwks = get_jwks(region, user_pool_id, allow_fetch=allow_fetch)
+        if jwks is None:
+            raise Exception("Signing keys are not cached; verification needs network access")
+
+        key = next((k for k in jwks.get('keys', []) if k.get('kid') == header.get('kid')), None)
+        if key is None and allow_fetch:
+            # Keys may have been rotated since the JWKS was cached
+            jwks = get_jwks(region, user_pool_id, refresh=True)
+            key = next((k for k in jwks.get('keys', []) if k.get('kid') == header.get('kid')), None)
+        if key is None:
+            raise Exception("Token was signed with an unknown key")
+
+        n = int.from_bytes(_b64url_decode(key['n']), 'big')
+        e = int.from_bytes(_b64url_decode(key['e']), 'big')
+        message = f"{header_b64}.{payload_b64}".encode('ascii')
+        if not _rsa_verify(message, _b64url_decode(signature_b64), n, e):
+            raise Exception("Invalid token signature")
+
+        claims = decode_jwt_claims(token)
+        if claims.get('iss') != _issuer(region, user_pool_id):
+            raise Exception("Token was issued by a different user pool")
+
+        if claims.get('token_use') not in ('id', 'access'):
+            raise Exception(f"Unexpected token_use: {claims.get('token_use')}")
+
+        if app_client_id:
+            audience = claims.get('aud') if claims.get('token_use') == 'id' else claims.get('client_id')
+            if audience != app_client_id:
+                raise Exception("Token was issued for a different app client")
+
+        if claims.get('exp', 0) <= time.time():
+            raise Exception("Token has expired")
+        _remember_verified(cache_key, claims)
+
+    elif claims.get('exp', 0) <= time.time():
+        with _verified_lock:
+            _verified_tokens.pop(cache_key, None)
+        raise Exception("Token has expired")
+
+    return claims
@@ -3,13 +3,32 @@ CCA AWS Operations Module
 Provides AWS operations for CloudTrail, resources, and permissions.
 """
 
-from .cloudtrail import get_user_history, format_events
-from .resources import list_user_resources, format_resources
-from .permissions import get_user_permissions, test_permissions, format_permissions
+# Resolved lazily so that importing cca.aws does not load botocore
+_LAZY_IMPORTS = {
+    'get_user_history': '.cloudtrail',
+    'iter_user_history': '.cloudtrail',
+    'get_combined_history': '.cloudtrail',
+    'format_events': '.cloudtrail',
+    'HistoryStore': '.history',
+    'list_user_resources': '.resources',
+    'format_resources': '.resources',
+    'get_user_permissions': '.permissions',
+    'test_permissions': '.permissions',
+    'format_permissions': '.permissions',
+}
+
+
+from ..lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, _LAZY_IMPORTS)
+
 
 __all__ = [
     'get_user_history',
+    'iter_user_history',
+    'get_combined_history',
     'format_events',
+    'HistoryStore',
     'list_user_resources',
     'format_resources',
     'get_user_permissions',
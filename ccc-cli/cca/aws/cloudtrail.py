@@ -3,132 +3,682 @@ CloudTrail Operations
 Provides functions to query CloudTrail and CloudWatch Logs for user activity history.
 """
 
+import logging
 import json
+import math
 import time
+import heapq
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from botocore.exceptions import ClientError
 
+from ..auth.throttle import TokenBucket
+from ..clients import get_client
+from ..tracing import propagate
 
-def get_user_history(session, username, days=7, limit=50):
+
+logger = logging.getLogger(__name__)
+
+
+# CloudTrail LookupEvents returns at most 50 events per page
+CLOUDTRAIL_MAX_PAGE_SIZE = 50
+
+# CloudTrail allows 2 LookupEvents requests per second per account and region
+LOOKUP_EVENTS_TPS = 2
+
+# Upper bound on time shards queried in parallel
+MAX_SHARDS = 8
+
+_lookup_lock = threading.Lock()
+_lookup_buckets = {}
+_lookup_latency = 1.0     # Moving average of LookupEvents round trips (seconds)
+
+# CloudWatch Logs group that receives the CloudTrail trail for CCA users
+LOG_GROUP_NAME = '/aws/cloudtrail/cca-users'
+
+# Logs Insights returns at most 10000 rows per query
+INSIGHTS_MAX_RESULTS = 10000
+
+# Windows (days) and expected event counts from which Logs Insights is used
+INSIGHTS_MIN_DAYS = 14
+INSIGHTS_MIN_EVENTS = 1000
+
+# Seconds to wait for a Logs Insights query
+INSIGHTS_TIMEOUT = 60
+
+
+def _cloudtrail_event(event):
+    """Convert a CloudTrail LookupEvents event to the common format"""
+    return {
+        'time': event['EventTime'],
+        'event_name': event['EventName'],
+        'resources': event.get('Resources', []),
+        'error_code': event.get('ErrorCode', ''),
+        'event_id': event['EventId'],
+        'source': 'CloudTrail'
+    }
+
+
+def _log_event(log_event):
+    """Convert a CloudWatch Logs CloudTrail record to the common format (None if unparseable)"""
+    try:
+        event_data = json.loads(log_event['message'])
+    except json.JSONDecodeError:
+        return None
+    return {
+        'time': datetime.fromtimestamp(log_event['timestamp'] / 1000, tz=timezone.utc),
+        'event_name': event_data.get('eventName', 'Unknown'),
+        'resources': event_data.get('resources', []),
+        'error_code': event_data.get('errorCode', ''),
+        'event_id': event_data.get('eventID', 'N/A'),
+        'source': 'CloudWatch Logs'
+    }
+
+
+def _lookup_bucket(region):
+    """Process-wide LookupEvents rate limiter for a region (the quota is per account and region)"""
+    with _lookup_lock:
+        bucket = _lookup_buckets.get(region)
+        if bucket is None:
+            bucket = _lookup_buckets[region] = TokenBucket(LOOKUP_EVENTS_TPS)
+        return bucket
+
+
+def _record_lookup_latency(latency):
+    global _lookup_latency
+    with _lookup_lock:
+        _lookup_latency = 0.8 * _lookup_latency + 0.2 * latency
+
+
+def shard_count(days, rate=LOOKUP_EVENTS_TPS):
     """
-    Get user activity history from CloudTrail and CloudWatch Logs (hybrid approach).
-    Tries CloudTrail first for recent events, falls back to CloudWatch Logs.
+    Number of time shards worth querying in parallel for a window
+
+    A single NextToken chain issues about 1/latency requests per second, so
+    rate * latency chains are enough to use the whole LookupEvents quota;
+    more would only queue on the rate limiter. The latency is a moving
+    average of the lookups made so far. Shards are at least a day long.
+
+    Args:
+        days: Window length in days
+        rate: LookupEvents requests per second allowed
+
+    Returns:
+        int: Shard count (1 means query sequentially)
+    """
+    with _lookup_lock:
+        latency = _lookup_latency
+    return max(1, min(MAX_SHARDS, int(days), math.ceil(rate * latency)))
+
+
+def _iter_cloudtrail_pages(cloudtrail, username, start_time, end_time, page_size):
+    """Yield pages of common-format events for one time range, following NextToken"""
+    bucket = _lookup_bucket(cloudtrail.meta.region_name)
+    params = {
+        'LookupAttributes': [
+            {
+                'AttributeKey': 'Username',
+                'AttributeValue': username
+            }
+        ],
+        'StartTime': start_time,
+        'EndTime': end_time,
+        'MaxResults': max(1, min(page_size, CLOUDTRAIL_MAX_PAGE_SIZE))
+    }
+
+    while True:
+        bucket.acquire()
+        started = time.monotonic()
+        response = cloudtrail.lookup_events(**params)
+        _record_lookup_latency(time.monotonic() - started)
+        yield [_cloudtrail_event(event) for event in response.get('Events', [])]
+
+        next_token = response.get('NextToken')
+        if not next_token:
+            return
+        params['NextToken'] = next_token
+
+
+def iter_cloudtrail_events(session, username, start_time, end_time=None, page_size=CLOUDTRAIL_MAX_PAGE_SIZE):
+    """
+    Stream a user's CloudTrail events, newest first, following NextToken
+
+    Pages are requested only as the caller consumes events, so stopping
+    early skips the remaining pages and memory holds at most one page.
 
     Args:
         session: boto3 Session object
         username: Username to filter events
-        days: Number of days to look back
-        limit: Maximum number of events to return
+        start_time: Oldest event time (datetime)
+        end_time: Newest event time (default: now)
+        page_size: Events per LookupEvents call (at most 50)
+
+    Yields:
+        dict: Event in the common format
+    """
+    cloudtrail = get_client('cloudtrail', session=session)
+    for page in _iter_cloudtrail_pages(cloudtrail, username, start_time,
+                                       end_time or datetime.now(timezone.utc), page_size):
+        yield from page
+
+
+def _put(out, item, stop):
+    """Put an item on a bounded queue unless the consumer has gone away"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(out):
+    """Yield the events of a shard's queue until its end marker, re-raising its error"""
+    while True:
+        page = out.get()
+        if page is None:
+            return
+        if isinstance(page, BaseException):
+            raise page
+        yield from page
+
+
+def iter_sharded_cloudtrail_events(session, username, start_time, end_time=None, shards=None,
+                                   page_size=CLOUDTRAIL_MAX_PAGE_SIZE):
+    """
+    Stream a user's CloudTrail events, newest first, querying time shards in parallel
+
+    The window is split into equal time shards, each paginated by its own
+    NextToken chain in a worker thread, and a heap-based k-way merge yields
+    the events in strict time order. Every lookup takes a token from the
+    region's LookupEvents rate limiter (2 requests per second), and each
+    shard buffers at most one page ahead of the consumer.
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        start_time: Oldest event time (datetime)
+        end_time: Newest event time (default: now)
+        shards: Number of shards (default: shard_count() for the window)
+        page_size: Events per LookupEvents call (at most 50)
+
+    Yields:
+        dict: Event in the common format
+    """
+    end_time = end_time or datetime.now(timezone.utc)
+    if shards is None:
+        shards = shard_count((end_time - start_time) / timedelta(days=1))
+    if shards <= 1:
+        yield from iter_cloudtrail_events(session, username, start_time, end_time, page_size)
+        return
+
+    cloudtrail = get_client('cloudtrail', session=session)
+    step = (end_time - start_time) / shards
+    bounds = [end_time - step * i for i in range(shards)] + [start_time]
+    queues = [queue.Queue(maxsize=1) for _ in range(shards)]
+    stop = threading.Event()
+
+    def produce(index):
+        newest, oldest = bounds[index], bounds[index + 1]
+        try:
+            for page in _iter_cloudtrail_pages(cloudtrail, username, oldest, newest, page_size):
+                if index:
+                    # Events at a shard boundary are returned by the newer shard as well
+                    page = [event for event in page if event['time'] < newest]
+                if page and not _put(queues[index], page, stop):
+                    return
+            _put(queues[index], None, stop)
+        except BaseException as e:
+            _put(queues[index], e, stop)
+
+    executor = ThreadPoolExecutor(max_workers=shards, thread_name_prefix='cca-cloudtrail')
+    try:
+        for index in range(shards):
+            executor.submit(propagate(produce), index)
+        yield from heapq.merge(*[_drain(out) for out in queues], key=lambda event: event['time'], reverse=True)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def iter_cloudwatch_events(session, username, start_time, end_time=None, page_size=CLOUDTRAIL_MAX_PAGE_SIZE,
+                           log_group_name=LOG_GROUP_NAME):
+    """
+    Stream a user's CloudTrail records from CloudWatch Logs, oldest first, following nextToken
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        start_time: Oldest event time (datetime)
+        end_time: Newest event time (default: now)
+        page_size: Events per FilterLogEvents call
+        log_group_name: Log group the trail delivers to
+
+    Yields:
+        dict: Event in the common format
+    """
+    logs = get_client('logs', session=session)
+    params = {
+        'logGroupName': log_group_name,
+        # Time range in milliseconds
+        'startTime': int(start_time.timestamp() * 1000),
+        'endTime': int((end_time or datetime.now(timezone.utc)).timestamp() * 1000),
+        # Filter pattern to match events for this user
+        'filterPattern': f'{{ $.userIdentity.arn = "*{username}*" }}',
+        'limit': page_size
+    }
+
+    while True:
+        response = logs.filter_log_events(**params)
+        for log_event in response.get('events', []):
+            event = _log_event(log_event)
+            if event is not None:
+                yield event
+
+        # Pages can be empty while the search continues, so only the token ends it
+        next_token = response.get('nextToken')
+        if not next_token:
+            return
+        params['nextToken'] = next_token
+
+
+def _insights_string(value):
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _insights_event(row):
+    """Convert a Logs Insights result row to the common format"""
+    fields = {field['field']: field['value'] for field in row}
+    resources = []
+    if fields.get('resources.0.ARN'):
+        resources.append({'ResourceType': fields.get('resources.0.type', ''), 'ResourceName': fields['resources.0.ARN']})
+    return {
+        'time': datetime.strptime(fields['@timestamp'], '%Y-%m-%d %H:%M:%S.%f').replace(tzinfo=timezone.utc),
+        'event_name': fields.get('eventName', 'Unknown'),
+        'resources': resources,
+        'error_code': fields.get('errorCode', ''),
+        'event_id': fields.get('eventID', 'N/A'),
+        'source': 'CloudWatch Logs Insights'
+    }
+
+
+def iter_insights_events(session, username, start_time, end_time=None, limit=None,
+                         log_group_name=LOG_GROUP_NAME, timeout=INSIGHTS_TIMEOUT):
+    """
+    Query a user's CloudTrail records with CloudWatch Logs Insights, newest first
+
+    The user filter, projection, sort and limit all run server-side, so a
+    long window costs one query instead of many FilterLogEvents pages.
+    Results are polled with a delay that grows from 0.1s to 2s.
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        start_time: Oldest event time (datetime)
+        end_time: Newest event time (default: now)
+        limit: Maximum number of events (at most 10000, the Insights limit)
+        log_group_name: Log group the trail delivers to
+        timeout: Seconds to wait for the query before cancelling it
+
+    Yields:
+        dict: Event in the common format
+
+    Raises:
+        Exception: If the query fails, is cancelled or times out
+    """
+    logs = get_client('logs', session=session)
+    requested = limit
+    limit = min(limit or INSIGHTS_MAX_RESULTS, INSIGHTS_MAX_RESULTS)
+    query = (
+        "fields @timestamp, eventName, eventID, errorCode, resources.0.ARN, resources.0.type"
+        f" | filter userIdentity.arn like {_insights_string(username)}"
+        " | sort @timestamp desc"
+        f" | limit {limit}"
+    )
+    query_id = logs.start_query(
+        logGroupName=log_group_name,
+        startTime=int(start_time.timestamp()),
+        endTime=int((end_time or datetime.now(timezone.utc)).timestamp()),
+        queryString=query,
+        limit=limit
+    )['queryId']
+
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        response = logs.get_query_results(queryId=query_id)
+        status = response['status']
+        if status == 'Complete':
+            break
+        if status not in ('Scheduled', 'Running'):
+            raise Exception(f"Logs Insights query {status.lower()}")
+        if time.monotonic() + delay > deadline:
+            try:
+                logs.stop_query(queryId=query_id)
+            except ClientError:
+                pass
+            raise Exception(f"Logs Insights query did not finish within {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 1.5, 2.0)
+
+    statistics = response.get('statistics', {})
+    logger.debug("Logs Insights scanned %s records (%s bytes)",
+                 statistics.get('recordsScanned'), statistics.get('bytesScanned'))
+    results = response.get('results', [])
+    if len(results) >= INSIGHTS_MAX_RESULTS and (requested is None or requested > INSIGHTS_MAX_RESULTS):
+        logger.warning("[WARN] Logs Insights returned its maximum of %d events; older events were left out",
+                       INSIGHTS_MAX_RESULTS)
+    for row in results:
+        yield _insights_event(row)
+
+
+def _iter_insights_window(session, username, start_time, end_time):
+    """
+    Stream every Logs Insights event in a window, newest first
+
+    A query returns at most INSIGHTS_MAX_RESULTS events, so a full result is
+    followed by another query that ends at the second of the oldest event
+    seen; events of that second which were already yielded are skipped.
+
+    Raises:
+        Exception: If a query fails, or a single second holds more events
+                   than one query can return
+    """
+    skip = set()
+    while True:
+        count = 0
+        tail_second, tail_ids = None, set()
+        for event in iter_insights_events(session, username, start_time, end_time, INSIGHTS_MAX_RESULTS):
+            count += 1
+            second = int(event['time'].timestamp())
+            if second != tail_second:
+                tail_second, tail_ids = second, set()
+            tail_ids.add(event['event_id'])
+            if event['event_id'] not in skip:
+                yield event
+        if count < INSIGHTS_MAX_RESULTS:
+            return
+        if tail_second >= int(end_time.timestamp()):
+            raise Exception(f"More than {INSIGHTS_MAX_RESULTS} Logs Insights events within one second; "
+                            "older events cannot be read")
+        end_time = datetime.fromtimestamp(tail_second, tz=timezone.utc)
+        skip = tail_ids
+
+
+def use_insights(start_time, end_time, limit=None):
+    """
+    Whether a CloudWatch Logs lookup should use Logs Insights
+
+    FilterLogEvents pages through every matching record in order, which
+    is fine for short windows; weeks of logs or thousands of expected events
+    are cheaper as one Insights query.
+
+    Args:
+        start_time: Oldest event time
+        end_time: Newest event time
+        limit: Number of events the caller expects to consume (None: all)
 
     Returns:
-        tuple: (events list, source string)
+        bool
     """
-    events = []
-    source = None
+    return end_time - start_time >= timedelta(days=INSIGHTS_MIN_DAYS) or (limit or 0) >= INSIGHTS_MIN_EVENTS
 
-    # Try CloudTrail first (recent events, fast)
+
+def iter_log_events(session, username, start_time, end_time=None, page_size=CLOUDTRAIL_MAX_PAGE_SIZE,
+                    limit=None, backend='auto'):
+    """
+    Stream a user's CloudTrail records from CloudWatch Logs with the best-suited API
+
+    Insights yields the newest `limit` events (or, without a limit, every
+    event, querying again past its per-query cap) newest first;
+    FilterLogEvents yields every event in the window, oldest first.
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        start_time: Oldest event time (datetime)
+        end_time: Newest event time (default: now)
+        page_size: Events per FilterLogEvents call
+        limit: Number of events the caller expects to consume (None: all)
+        backend: 'insights', 'filter' or 'auto' (Insights for large windows
+                 or limits, see use_insights; FilterLogEvents if Insights
+                 fails before returning anything)
+
+    Yields:
+        dict: Event in the common format
+    """
+    end_time = end_time or datetime.now(timezone.utc)
+    if backend == 'filter' or (backend == 'auto' and not use_insights(start_time, end_time, limit)):
+        yield from iter_cloudwatch_events(session, username, start_time, end_time, page_size)
+        return
+
+    yielded = False
     try:
-        start_time = datetime.now(timezone.utc) - timedelta(days=days)
-
-        print("[INFO] Fetching events from CloudTrail...")
-        cloudtrail = session.client('cloudtrail')
-
-        response = cloudtrail.lookup_events(
-            LookupAttributes=[
-                {
-                    'AttributeKey': 'Username',
-                    'AttributeValue': username
-                }
-            ],
-            StartTime=start_time,
-            MaxResults=limit
+        if limit is None:
+            events = _iter_insights_window(session, username, start_time, end_time)
+        else:
+            events = iter_insights_events(session, username, start_time, end_time, limit)
+        for event in events:
+            yielded = True
+            yield event
+        return
+    except Exception as e:
+        if yielded or backend == 'insights':
+            raise
+        logger.warning("[WARN] Logs Insights unavailable: %s, using FilterLogEvents...", e)
+    yield from iter_cloudwatch_events(session, username, start_time, end_time, page_size)
+
+
+def _log_cloudwatch_error(e):
+    """Report a CloudWatch Logs failure"""
+    if not isinstance(e, ClientError):
+        logger.warning("[WARN] CloudWatch Logs unavailable: %s", e)
+        return
+    error_code = e.response['Error']['Code']
+    if error_code == 'ResourceNotFoundException':
+        logger.warning("[WARN] CloudWatch Logs group not found")
+    elif error_code == 'AccessDeniedException':
+        logger.error(
+            "[ERROR] Access denied to CloudWatch Logs\n\n"
+            "Your IAM role does not have permission to view CloudWatch Logs.\n"
+            "\nRequired IAM permissions:\n"
+            "  - logs:FilterLogEvents\n"
+            "  - logs:GetLogEvents\n"
+            "  - logs:StartQuery, logs:GetQueryResults (Logs Insights, for long windows)"
         )
+    else:
+        logger.warning("[WARN] CloudWatch Logs error: %s", error_code)
+
+
+def iter_user_history(session, username, days=7, page_size=CLOUDTRAIL_MAX_PAGE_SIZE, shards=None, limit=None):
+    """
+    Stream user activity over the whole `days` window (hybrid approach)
 
-        ct_events = response.get('Events', [])
-
-        if ct_events:
-            # Convert CloudTrail events to common format
-            for event in ct_events:
-                events.append({
-                    'time': event['EventTime'],
-                    'event_name': event['EventName'],
-                    'resources': event.get('Resources', []),
-                    'error_code': event.get('ErrorCode', ''),
-                    'event_id': event['EventId'],
-                    'source': 'CloudTrail'
-                })
-            source = 'CloudTrail'
-            print(f"[OK] Retrieved {len(events)} events from CloudTrail\n")
+    Streams from CloudTrail and falls back to CloudWatch Logs when
+    CloudTrail fails or has no events for the user. Events are fetched a
+    page at a time as the caller iterates, so callers can stop early (e.g.
+    with itertools.islice) and memory stays flat however large the window.
 
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        days: Number of days to look back
+        page_size: Events per API call
+        shards: CloudTrail time shards queried in parallel (default: adapt
+                to the window and the LookupEvents rate limit)
+        limit: Number of events the caller expects to consume (None: all);
+               large windows or limits use Logs Insights for the fallback
+
+    Yields:
+        dict: Event in the common format (its 'source' names the backend)
+    """
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(days=days)
+
+    # Try CloudTrail first (recent events, fast)
+    yielded = False
+    try:
+        logger.info("[INFO] Fetching events from CloudTrail...")
+        for event in iter_sharded_cloudtrail_events(session, username, start_time, end_time, shards, page_size):
+            yielded = True
+            yield event
     except ClientError as e:
         error_code = e.response['Error']['Code']
+        if yielded:
+            # Switching sources now would repeat events; end the stream here
+            logger.warning("[WARN] CloudTrail error: %s, history is incomplete", error_code)
+            return
         if error_code == 'AccessDeniedException':
-            print("[INFO] CloudTrail access denied, trying CloudWatch Logs...\n")
+            logger.info("[INFO] CloudTrail access denied, trying CloudWatch Logs...\n")
         else:
-            print(f"[WARN] CloudTrail error: {error_code}, trying CloudWatch Logs...\n")
+            logger.warning("[WARN] CloudTrail error: %s, trying CloudWatch Logs...\n", error_code)
     except Exception as e:
-        print(f"[WARN] CloudTrail unavailable: {e}, trying CloudWatch Logs...\n")
+        if yielded:
+            logger.warning("[WARN] CloudTrail unavailable: %s, history is incomplete", e)
+            return
+        logger.warning("[WARN] CloudTrail unavailable: %s, trying CloudWatch Logs...\n", e)
+
+    if yielded:
+        return
 
     # Fallback to CloudWatch Logs if CloudTrail failed or returned no events
-    if not events:
+    try:
+        logger.info("[INFO] Fetching events from CloudWatch Logs...")
+        yield from iter_log_events(session, username, start_time, end_time, page_size, limit)
+    except Exception as e:
+        _log_cloudwatch_error(e)
+
+
+def get_user_history(session, username, days=7, limit=50, mode='hybrid'):
+    """
+    Get user activity history from CloudTrail and CloudWatch Logs (hybrid approach).
+    Tries CloudTrail first for recent events, falls back to CloudWatch Logs.
+
+    Follows pagination across the whole window until `limit` events are
+    collected (see iter_user_history to stream instead).
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        days: Number of days to look back
+        limit: Maximum number of events to return
+        mode: 'hybrid' (CloudTrail, then CloudWatch Logs as a fallback) or
+              'combined' (both at once, see get_combined_history)
+
+    Returns:
+        tuple: (events list, source string)
+    """
+    if mode == 'combined':
+        return get_combined_history(session, username, days=days, limit=limit)
+    if mode != 'hybrid':
+        raise Exception(f"Unknown history mode: {mode}")
+
+    # A single page is cheapest fetched sequentially; larger limits are sharded
+    stream = iter_user_history(session, username, days=days, page_size=min(limit, CLOUDTRAIL_MAX_PAGE_SIZE),
+                               shards=1 if limit <= CLOUDTRAIL_MAX_PAGE_SIZE else None, limit=limit)
+    try:
+        first = next(stream, None) if limit > 0 else None
+        if first is None:
+            events = []
+        elif first['source'] == 'CloudWatch Logs':
+            # FilterLogEvents returns the oldest events first (CloudTrail and
+            # Insights are newest first), so read the window and keep the newest
+            events = heapq.nlargest(limit, itertools.chain([first], stream), key=lambda event: event['time'])
+        else:
+            events = [first] + list(itertools.islice(stream, limit - 1))
+    finally:
+        stream.close()
+
+    source = events[0]['source'] if events else None
+    if events:
+        logger.info("[OK] Retrieved %s events from %s\n", len(events), source,
+                    extra={'source': source, 'events': len(events)})
+    return events, source
+
+
+def _richness(event):
+    """How much detail an event record carries (used to pick between duplicates)"""
+    return (bool(event['event_id'] and event['event_id'] != 'N/A')
+            + bool(event['event_name'] and event['event_name'] != 'Unknown')
+            + bool(event['error_code'])
+            + len(event['resources'] or []))
+
+
+def get_combined_history(session, username, days=7, limit=50):
+    """
+    Get user activity history from CloudTrail and CloudWatch Logs at the same time
+
+    Both backends are queried concurrently (so the wall time is that of the
+    slower one) for their newest `limit` events each, and the results are
+    merged by event_id. When both return an event, the record with more detail is
+    kept; every event lists the backends that returned it in 'sources'.
+
+    Args:
+        session: boto3 Session object
+        username: Username to filter events
+        days: Number of days to look back
+        limit: Maximum number of events to return
+
+    Returns:
+        tuple: (events list, newest first; source string naming the backends that returned events)
+    """
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(days=days)
+    page_size = min(limit, CLOUDTRAIL_MAX_PAGE_SIZE)
+
+    def fetch(name, stream):
         try:
-            print("[INFO] Fetching events from CloudWatch Logs...")
-            logs = session.client('logs')
-
-            log_group_name = '/aws/cloudtrail/cca-users'
-
-            # Calculate time range in milliseconds
-            start_time = datetime.now(timezone.utc) - timedelta(days=days)
-            start_time_ms = int(start_time.timestamp() * 1000)
-            end_time_ms = int(time.time() * 1000)
-
-            # Filter pattern to match events for this user
-            filter_pattern = f'{{ $.userIdentity.arn = "*{username}*" }}'
-
-            response = logs.filter_log_events(
-                logGroupName=log_group_name,
-                startTime=start_time_ms,
-                endTime=end_time_ms,
-                filterPattern=filter_pattern,
-                limit=limit
-            )
-
-            log_events = response.get('events', [])
-
-            if log_events:
-                # Parse CloudWatch Logs events
-                for log_event in log_events:
-                    try:
-                        event_data = json.loads(log_event['message'])
-                        events.append({
-                            'time': datetime.fromtimestamp(log_event['timestamp'] / 1000, tz=timezone.utc),
-                            'event_name': event_data.get('eventName', 'Unknown'),
-                            'resources': event_data.get('resources', []),
-                            'error_code': event_data.get('errorCode', ''),
-                            'event_id': event_data.get('eventID', 'N/A'),
-                            'source': 'CloudWatch Logs'
-                        })
-                    except json.JSONDecodeError:
-                        continue
-
-                source = 'CloudWatch Logs'
-                print(f"[OK] Retrieved {len(events)} events from CloudWatch Logs\n")
-
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code == 'ResourceNotFoundException':
-                print("[WARN] CloudWatch Logs group not found")
-            elif error_code == 'AccessDeniedException':
-                print("[ERROR] Access denied to CloudWatch Logs\n")
-                print("Your IAM role does not have permission to view CloudWatch Logs.")
-                print("\nRequired IAM permissions:")
-                print("  - logs:FilterLogEvents")
-                print("  - logs:GetLogEvents")
-            else:
-                print(f"[WARN] CloudWatch Logs error: {error_code}")
+            if name == 'CloudTrail':
+                return list(itertools.islice(stream, limit))
+            # FilterLogEvents returns the oldest events first (Insights is already
+            # sorted and limited), so read the window and keep the newest
+            return heapq.nlargest(limit, stream, key=lambda event: event['time'])
         except Exception as e:
-            print(f"[WARN] CloudWatch Logs unavailable: {e}")
-
+            if name == 'CloudWatch Logs':
+                _log_cloudwatch_error(e)
+            elif isinstance(e, ClientError):
+                logger.warning("[WARN] CloudTrail error: %s", e.response['Error']['Code'])
+            else:
+                logger.warning("[WARN] CloudTrail unavailable: %s", e)
+            return []
+        finally:
+            stream.close()
+
+    logger.info("[INFO] Fetching events from CloudTrail and CloudWatch Logs...")
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='cca-history') as executor:
+        cloudtrail_events = executor.submit(propagate(fetch), 'CloudTrail', iter_sharded_cloudtrail_events(
+            session, username, start_time, end_time,
+            shards=1 if limit <= CLOUDTRAIL_MAX_PAGE_SIZE else None, page_size=page_size))
+        logs_events = executor.submit(propagate(fetch), 'CloudWatch Logs', iter_log_events(
+            session, username, start_time, end_time, page_size, limit))
+        results = cloudtrail_events.result() + logs_events.result()
+
+    merged = {}
+    for index, event in enumerate(results):
+        # Records without an ID cannot be matched, so keep each of them
+        key = event['event_id'] if event['event_id'] != 'N/A' else ('unmatched', index)
+        existing = merged.get(key)
+        if existing is None:
+            event['sources'] = [event['source']]
+            merged[key] = event
+            continue
+        sources = existing['sources'] + [event['source']]
+        if _richness(event) > _richness(existing):
+            merged[key] = event
+        merged[key]['sources'] = sources
+
+    events = sorted(merged.values(), key=lambda event: event['time'], reverse=True)[:limit]
+
+    found = [name for name in ('CloudTrail', 'CloudWatch Logs', 'CloudWatch Logs Insights')
+             if any(name in event['sources'] for event in events)]
+    source = ' + '.join(found) if found else None
+    if events:
+        logger.info("[OK] Retrieved %s events from %s\n", len(events), source,
+                    extra={'source': source, 'events': len(events)})
     return events, source
 
 
@@ -176,7 +726,7 @@ def format_events(events, limit=50, verbose=False):
 
         if verbose:
             output.append(f"  Event ID: {event['event_id']}")
-            output.append(f"  Source: {event['source']}")
+            output.append(f"  Source: {', '.join(event.get('sources') or [event['source']])}")
             if error_code:
                 output.append(f"  Error: {error_code}")
             output.append("")
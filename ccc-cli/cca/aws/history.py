@@ -0,0 +1,228 @@
+"""
+History Index
+Local SQLite store of user activity events in ~/.ccc/history.db.
+
+Events are keyed by event_id and indexed by time, event name and error
+code. sync() only fetches what the store does not cover yet: events newer
+than the last sync (minus CloudTrail's delivery delay) and, when a longer
+window is requested than before, the older gap. Queries are then answered
+locally. The database runs in WAL mode so a query never waits on a sync
+in another process.
+"""
+
+import logging
+import json
+import sqlite3
+from datetime import datetime, timezone, timedelta
+
+from ..config import CONFIG_DIR
+from .cloudtrail import (
+    CLOUDTRAIL_MAX_PAGE_SIZE, iter_sharded_cloudtrail_events, iter_log_events
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Database path
+HISTORY_DB = CONFIG_DIR / "history.db"
+
+# CloudTrail delivers events up to ~15 minutes after they happen, so each
+# sync re-reads this much before the previous one
+SYNC_OVERLAP = timedelta(minutes=15)
+
+# Events written per transaction
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    scope TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    event_name TEXT NOT NULL,
+    error_code TEXT NOT NULL,
+    resources TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (scope, event_id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (scope, time);
+CREATE INDEX IF NOT EXISTS idx_events_name ON events (scope, event_name, time);
+CREATE INDEX IF NOT EXISTS idx_events_error ON events (scope, error_code, time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    oldest REAL NOT NULL,
+    synced_to REAL NOT NULL
+);
+"""
+
+
+def _scope(session, username):
+    """Events are stored per region and user"""
+    return f"{getattr(session, 'region_name', None) or 'default'}/{username}"
+
+
+class HistoryStore:
+    """SQLite index of user activity events with incremental sync"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Database file (default: ~/.ccc/history.db)
+        """
+        self.path = path or HISTORY_DB
+        if path is None:
+            HISTORY_DB.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _state(self, scope):
+        return self.conn.execute("SELECT oldest, synced_to FROM sync_state WHERE scope = ?", (scope,)).fetchone()
+
+    def _insert(self, scope, events):
+        rows = []
+        for event in events:
+            event_time = event['time'].timestamp()
+            event_id = event['event_id']
+            if not event_id or event_id == 'N/A':
+                # CloudWatch Logs records without an ID are keyed by what they contain
+                event_id = f"N/A:{event_time}:{event['event_name']}"
+            rows.append((scope, event_id, event_time, event['event_name'], event['error_code'] or '',
+                         json.dumps(event['resources'] or [], default=str), event['source']))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def _fetch(self, session, username, start_time, end_time, page_size, fallback_on_empty=False):
+        """
+        Stream a whole range from CloudTrail, or from CloudWatch Logs if
+        CloudTrail fails before returning anything
+
+        With fallback_on_empty (ranges the store has never covered), CloudWatch
+        Logs is also tried when CloudTrail has no events; as CloudTrail did
+        answer, a CloudWatch Logs failure before any event then just means
+        no events.
+        """
+        yielded = False
+        try:
+            for event in iter_sharded_cloudtrail_events(session, username, start_time, end_time,
+                                                        page_size=page_size):
+                yielded = True
+                yield event
+        except Exception as e:
+            if yielded:
+                raise
+            logger.warning("[WARN] CloudTrail unavailable: %s, trying CloudWatch Logs...", e)
+            # Without a limit, CloudWatch Logs returns every event in the range (see iter_log_events)
+            yield from iter_log_events(session, username, start_time, end_time, page_size)
+            return
+        if yielded or not fallback_on_empty:
+            return
+
+        try:
+            for event in iter_log_events(session, username, start_time, end_time, page_size):
+                yielded = True
+                yield event
+        except Exception as e:
+            if yielded:
+                raise
+            logger.debug("CloudWatch Logs fallback failed after an empty CloudTrail result: %s", e)
+
+    def sync(self, session, username, days=7, page_size=CLOUDTRAIL_MAX_PAGE_SIZE):
+        """
+        Bring the store up to date for the last `days` days
+
+        Args:
+            session: boto3 Session object
+            username: Username to filter events
+            days: Number of days the store should cover
+            page_size: Events per API call
+
+        Returns:
+            int: Number of events fetched
+
+        Raises:
+            Exception: If a backend call fails or cannot return a whole range
+                       (events fetched so far are kept, but the sync position
+                       is not advanced)
+        """
+        scope = _scope(session, username)
+        now = datetime.now(timezone.utc)
+        start_time = now - timedelta(days=days)
+        state = self._state(scope)
+
+        # (start, end, new): new ranges were never covered; the last one is
+        # only re-read for recent events, which are usually none
+        ranges = []
+        if state is None:
+            ranges.append((start_time, now, True))
+        else:
+            oldest = datetime.fromtimestamp(state[0], tz=timezone.utc)
+            synced_to = datetime.fromtimestamp(state[1], tz=timezone.utc)
+            if start_time < oldest:
+                ranges.append((start_time, oldest, True))
+            ranges.append((max(start_time, synced_to - SYNC_OVERLAP), now, False))
+
+        fetched = 0
+        for range_start, range_end, new in ranges:
+            batch = []
+            for event in self._fetch(session, username, range_start, range_end, page_size, fallback_on_empty=new):
+                batch.append(event)
+                if len(batch) >= BATCH_SIZE:
+                    fetched += self._insert(scope, batch)
+                    batch = []
+            fetched += self._insert(scope, batch)
+
+        oldest = min(start_time.timestamp(), state[0]) if state else start_time.timestamp()
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (scope, oldest, now.timestamp()))
+        logger.debug("Synced %d events for %s", fetched, scope)
+        return fetched
+
+    def query(self, session, username, days=7, limit=50, event_name=None, errors_only=False):
+        """
+        Read events from the store, newest first
+
+        Args:
+            session: boto3 Session object (for its region)
+            username: Username the events belong to
+            days: Number of days to look back
+            limit: Maximum number of events to return
+            event_name: Only return events with this name
+            errors_only: Only return failed calls
+
+        Returns:
+            list: Events in the common format
+        """
+        sql = "SELECT event_id, time, event_name, error_code, resources, source FROM events WHERE scope = ? AND time >= ?"
+        params = [_scope(session, username), (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()]
+        if event_name:
+            sql += " AND event_name = ?"
+            params.append(event_name)
+        if errors_only:
+            sql += " AND error_code != ''"
+        sql += " ORDER BY time DESC LIMIT ?"
+        params.append(limit)
+
+        return [
+            {
+                'time': datetime.fromtimestamp(event_time, tz=timezone.utc),
+                'event_name': name,
+                'resources': json.loads(resources),
+                'error_code': error_code,
+                'event_id': event_id,
+                'source': source
+            }
+            for event_id, event_time, name, error_code, resources, source in self.conn.execute(sql, params)
+        ]
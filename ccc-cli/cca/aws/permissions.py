@@ -6,6 +6,8 @@ Provides functions to inspect user permissions and test common AWS actions.
 import json
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from ..clients import get_client
+
 
 def get_user_permissions(session, verbose=False):
     """
@@ -29,8 +31,8 @@ def get_user_permissions(session, verbose=False):
         }
     """
     try:
-        sts = session.client('sts')
-        iam = session.client('iam')
+        sts = get_client('sts', session=session)
+        iam = get_client('iam', session=session)
 
         # Get caller identity
         identity = sts.get_caller_identity()
@@ -164,27 +166,27 @@ def test_permissions(session):
             operation = action.split(':')[1]
 
             if service == 'ec2' and operation == 'DescribeInstances':
-                ec2 = session.client('ec2')
+                ec2 = get_client('ec2', session=session)
                 ec2.describe_instances(MaxResults=5)
                 result = "[+] Allowed"
             elif service == 's3' and operation == 'ListAllMyBuckets':
-                s3 = session.client('s3')
+                s3 = get_client('s3', session=session)
                 s3.list_buckets()
                 result = "[+] Allowed"
             elif service == 'lambda' and operation == 'ListFunctions':
-                lambda_client = session.client('lambda')
+                lambda_client = get_client('lambda', session=session)
                 lambda_client.list_functions(MaxItems=5)
                 result = "[+] Allowed"
             elif service == 'dynamodb' and operation == 'ListTables':
-                dynamodb = session.client('dynamodb')
+                dynamodb = get_client('dynamodb', session=session)
                 dynamodb.list_tables(Limit=5)
                 result = "[+] Allowed"
             elif service == 'cloudwatch' and operation == 'DescribeAlarms':
-                cloudwatch = session.client('cloudwatch')
+                cloudwatch = get_client('cloudwatch', session=session)
                 cloudwatch.describe_alarms(MaxRecords=5)
                 result = "[+] Allowed"
             elif service == 'iam' and operation == 'GetUser':
-                iam = session.client('iam')
+                iam = get_client('iam', session=session)
                 iam.get_user()
                 result = "[+] Allowed"
             elif service == 'iam' and operation == 'CreateUser':
@@ -3,9 +3,15 @@ AWS Resources Operations
 Provides functions to list and query AWS resources using Resource Groups Tagging API.
 """
 
+import logging
 import json
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from ..clients import get_client
+
+
+logger = logging.getLogger(__name__)
+
 
 def list_user_resources(session, username=None, filter_by_owner=False, limit=10, show_all=False, verbose=False):
     """
@@ -28,9 +34,9 @@ def list_user_resources(session, username=None, filter_by_owner=False, limit=10,
     """
     try:
         # Use Resource Groups Tagging API to find all resources
-        tagging = session.client('resourcegroupstaggingapi')
+        tagging = get_client('resourcegroupstaggingapi', session=session)
 
-        print("[INFO] Scanning for resources...")
+        logger.info("[INFO] Scanning for resources...")
 
         # Get all resources (optionally filter by Owner tag)
         paginator = tagging.get_paginator('get_resources')
@@ -0,0 +1,127 @@
+"""
+Client Pool
+Process-wide cache of boto3 sessions and clients shared by cca.auth and cca.aws.
+
+Building a client loads botocore's service model and costs tens of
+milliseconds, so clients are created lazily on first use and reused for
+every later call with the same (session, region, service, credentials).
+Sessions are shared per (profile, region). When the credentials behind a
+session rotate, its stale clients are replaced on the next lookup;
+invalidate() drops them eagerly.
+"""
+
+import time
+import weakref
+import threading
+
+from . import instrumentation
+
+
+# Connections kept per client, so one client can serve a thread pool
+MAX_POOL_CONNECTIONS = 32
+
+# Per-service client options. Cognito calls are retried with backoff by
+# cca.auth.throttle (throttling, connection errors, timeouts and 5xx), so
+# botocore's own retries are turned off for them to avoid retrying twice.
+_SERVICE_OPTIONS = {
+    'cognito-idp': {'retries': {'total_max_attempts': 1}},
+    'cognito-identity': {'retries': {'total_max_attempts': 1}},
+}
+
+_lock = threading.RLock()
+_sessions = {}                         # (profile, region) -> boto3.Session
+_clients = weakref.WeakKeyDictionary()  # session -> {(region, service, signed): (credentials identity, client)}
+
+
+def get_session(profile=None, region=None):
+    """
+    Get a shared boto3 Session
+
+    Args:
+        profile: AWS profile name (None for the default credential chain)
+        region: AWS region name
+
+    Returns:
+        boto3.Session
+    """
+    key = (profile, region)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            start, clock = time.time(), time.perf_counter()
+            import boto3
+            session = boto3.Session(profile_name=profile, region_name=region)
+            _sessions[key] = session
+            instrumentation.record('boto3', 'CreateSession', start, time.perf_counter() - clock, region=region)
+        return session
+
+
+def _credentials_identity(session):
+    """Identify the credentials a session signs with (their access key)"""
+    credentials = session.get_credentials()
+    if credentials is None:
+        return None
+    return credentials.access_key
+
+
+def get_client(service, session=None, profile=None, region=None, signed=True):
+    """
+    Get a shared boto3 client
+
+    Args:
+        service: AWS service name (e.g. 'sts', 'cloudtrail')
+        session: boto3 Session to build the client from (default: get_session(profile, region))
+        profile: AWS profile name, used when no session is given
+        region: AWS region name (default: the session's region)
+        signed: Whether the client's calls are signed with the session's credentials.
+                Set to False for unauthenticated APIs (Cognito user/identity pools):
+                the client is built with botocore.UNSIGNED, so no credentials are
+                resolved, neither for the lookup nor for the calls.
+
+    Returns:
+        botocore client
+    """
+    if session is None:
+        session = get_session(profile, region)
+    region = region or session.region_name
+    identity = _credentials_identity(session) if signed else None
+
+    with _lock:
+        session_clients = _clients.setdefault(session, {})
+        entry = session_clients.get((region, service, signed))
+        if entry is not None and entry[0] == identity:
+            return entry[1]
+
+        # First use, or the session's credentials rotated since the client was built
+        start, clock = time.time(), time.perf_counter()
+        from botocore import UNSIGNED
+        from botocore.config import Config
+        options = dict(_SERVICE_OPTIONS.get(service, {}))
+        if not signed:
+            options['signature_version'] = UNSIGNED
+        client = session.client(service, region_name=region, config=Config(
+            max_pool_connections=MAX_POOL_CONNECTIONS, **options
+        ))
+        instrumentation.instrument_client(client)
+        instrumentation.record(service, 'CreateClient', start, time.perf_counter() - clock, region=region)
+        session_clients[(region, service, signed)] = (identity, client)
+        return client
+
+
+def invalidate(profile=None):
+    """
+    Drop cached sessions and clients
+
+    Args:
+        profile: Only drop entries for this AWS profile (default: drop everything)
+    """
+    with _lock:
+        if profile is None:
+            _sessions.clear()
+            _clients.clear()
+            return
+
+        for key in [k for k, session in _sessions.items() if session.profile_name == profile]:
+            del _sessions[key]
+        for session in [s for s in _clients.keys() if s.profile_name == profile]:
+            del _clients[session]
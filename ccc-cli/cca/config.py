@@ -3,10 +3,20 @@ Configuration Management
 Handles loading and saving CCC configuration from ~/.ccc/config.json
 """
 
+import logging
+import os
 import sys
+import copy
 import json
+import threading
 from pathlib import Path
 
+from .fsutil import atomic_write, FileLock
+from .tracing import get_tracer
+
+
+logger = logging.getLogger(__name__)
+
 
 # Configuration file paths
 CONFIG_DIR = Path.home() / ".ccc"
@@ -14,6 +24,124 @@ CONFIG_FILE = CONFIG_DIR / "config.json"
 DEFAULT_CONFIG_FILE = Path(__file__).parent / "config.default.json"
 
 
+class Config:
+    """
+    Cached, merged view of the default and user configuration
+
+    The merged dict is parsed once and revalidated on each access with a
+    cheap stat() of both files (mtime, size and inode), so long-running
+    services can query it on every request. Writes go through a temp file,
+    fsync and rename, and set_many() applies several keys with one write.
+    """
+
+    def __init__(self, path=None, default_path=None):
+        self.path = Path(path) if path else CONFIG_FILE
+        self.default_path = Path(default_path) if default_path else DEFAULT_CONFIG_FILE
+        self._lock = threading.RLock()
+        self._signature = None
+        self._data = None
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _current_signature(self):
+        return (self._stat(self.default_path), self._stat(self.path))
+
+    @staticmethod
+    def _read(path):
+        if not path.exists():
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _load(self):
+        signature = self._current_signature()
+        with self._lock:
+            if self._data is None or signature != self._signature:
+                # Load defaults first
+                try:
+                    data = self._read(self.default_path)
+                except Exception as e:
+                    logger.warning("[WARNING] Failed to load default config: %s", e)
+                    data = {}
+
+                # Overlay user config if it exists
+                try:
+                    data.update(self._read(self.path))
+                except Exception as e:
+                    logger.error("[ERROR] Failed to load config: %s", e)
+
+                self._data = data
+                self._signature = signature
+            return self._data
+
+    def invalidate(self):
+        """Forget the cached view; the next access re-reads both files"""
+        with self._lock:
+            self._data = None
+            self._signature = None
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: A copy of the merged configuration, safe for the caller to modify
+        """
+        return copy.deepcopy(self._load())
+
+    def get(self, key, default=None):
+        """Get a single configuration value"""
+        return copy.deepcopy(self._load().get(key, default))
+
+    def save(self, config):
+        """
+        Atomically replace the user config file
+
+        Args:
+            config: dict with configuration settings
+        """
+        with self._lock, get_tracer().span('save_config'):
+            atomic_write(self.path, json.dumps(config, indent=2))
+            # The cached view is the defaults merged with the file, so rebuild it on the next read
+            self.invalidate()
+
+    def set(self, key, value):
+        """Set a single configuration value"""
+        self.set_many({key: value})
+
+    def set_many(self, values):
+        """
+        Set several configuration values with a single write
+
+        Args:
+            values: dict of keys to set
+        """
+        # The lock file keeps concurrent writers from losing each other's updates
+        with self._lock, FileLock(self.path.with_name(self.path.name + '.lock')):
+            self.invalidate()
+            config = self.as_dict()
+            config.update(values)
+            self.save(config)
+
+
+# Process-wide configuration instance used by the module-level helpers
+_config = Config()
+
+
+def get_config():
+    """
+    Get the process-wide Config instance
+
+    Returns:
+        Config
+    """
+    return _config
+
+
 def load_default_config():
     """
     Load default configuration from package
@@ -28,7 +156,7 @@ def load_default_config():
         with open(DEFAULT_CONFIG_FILE, 'r') as f:
             return json.load(f)
     except Exception as e:
-        print(f"[WARNING] Failed to load default config: {e}")
+        logger.warning("[WARNING] Failed to load default config: %s", e)
         return {}
 
 
@@ -37,22 +165,12 @@ def load_config():
     Load CCC configuration from ~/.ccc/config.json
     Falls back to default config if user config doesn't exist
 
+    The parsed files are cached and only re-read when they change on disk.
+
     Returns:
         dict: Configuration dictionary (default config if user config doesn't exist)
     """
-    # Load defaults first
-    config = load_default_config()
-
-    # Overlay user config if it exists
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                user_config = json.load(f)
-                config.update(user_config)
-        except Exception as e:
-            print(f"[ERROR] Failed to load config: {e}")
-
-    return config
+    return _config.as_dict()
 
 
 def save_config(config):
@@ -62,14 +180,11 @@ def save_config(config):
     Args:
         config: dict with configuration settings
     """
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
-        print(f"[OK] Configuration saved to {CONFIG_FILE}")
+        _config.save(config)
+        logger.info("[OK] Configuration saved to %s", CONFIG_FILE, extra={'path': str(CONFIG_FILE)})
     except Exception as e:
-        print(f"[ERROR] Failed to save config: {e}")
+        logger.error("[ERROR] Failed to save config: %s", e)
         sys.exit(1)
 
 
@@ -84,8 +199,7 @@ def get_config_value(key, default=None):
     Returns:
         Configuration value or default
     """
-    config = load_config()
-    return config.get(key, default)
+    return _config.get(key, default)
 
 
 def set_config_value(key, value):
@@ -96,6 +210,58 @@ def set_config_value(key, value):
         key: Configuration key to set
         value: Value to set
     """
-    config = load_config()
-    config[key] = value
-    save_config(config)
+    set_config_values({key: value})
+
+
+def set_config_values(values):
+    """
+    Set several configuration values with a single write
+
+    Args:
+        values: dict of keys to set
+    """
+    try:
+        _config.set_many(values)
+        logger.info("[OK] Configuration saved to %s", CONFIG_FILE, extra={'path': str(CONFIG_FILE)})
+    except Exception as e:
+        logger.error("[ERROR] Failed to save config: %s", e)
+        sys.exit(1)
+
+
+def list_profiles(config):
+    """
+    List the named profiles defined under config['profiles']
+
+    Args:
+        config: Configuration dict
+
+    Returns:
+        list: Profile names
+    """
+    return list(config.get('profiles', {}))
+
+
+def get_profile_config(config, name):
+    """
+    Build the effective configuration of a named profile
+
+    Named profiles live under config['profiles'][name] and override the
+    top-level settings (user_pool_id, app_client_id, identity_pool_id,
+    region, ...). Tokens are never inherited from the top level, and the
+    AWS profile name defaults to the profile's name.
+
+    Args:
+        config: Configuration dict
+        name: Profile name
+
+    Returns:
+        dict: Effective configuration for the profile
+
+    Raises:
+        KeyError: If the profile is not defined
+    """
+    overrides = config.get('profiles', {})[name]
+    merged = {k: v for k, v in config.items() if k not in ('profiles', 'tokens')}
+    merged.update(overrides)
+    merged['profile'] = overrides.get('profile', name)
+    return merged
@@ -0,0 +1,273 @@
+"""
+Credential Broker Daemon
+Holds Cognito tokens in memory, keeps warm Cognito clients, refreshes AWS
+credentials ahead of expiry and serves them over a Unix domain socket.
+
+Protocol: the client sends one JSON object per line ({"op": "credentials"},
+{"op": "status"} or {"op": "shutdown"}) and receives one JSON object per
+line in response ({"ok": true, ...} or {"ok": false, "error": "..."}).
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+import socketserver
+from collections import deque, defaultdict
+
+from .config import CONFIG_DIR
+
+
+# Default socket path
+SOCKET_PATH = CONFIG_DIR / "daemon.sock"
+
+# Number of latency samples kept per operation for percentile reporting
+LATENCY_SAMPLES = 4096
+
+
+def socket_path_for(name=None):
+    """
+    Default socket of the daemon serving a profile
+
+    Args:
+        name: Named profile, or None for the top-level settings
+
+    Returns:
+        Path: SOCKET_PATH, or daemon-<name>.sock next to it for a named profile
+    """
+    if not name:
+        return SOCKET_PATH
+    return SOCKET_PATH.with_name(f"daemon-{name}.sock")
+
+
+class DaemonError(Exception):
+    """Raised when the daemon is unreachable or returns an error"""
+
+
+class LatencyStats:
+    """Thread-safe request counters and latency percentiles per operation"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._latencies = defaultdict(lambda: deque(maxlen=samples))
+
+    def record(self, op, seconds, error=False):
+        with self._lock:
+            self._counts[op] += 1
+            if error:
+                self._errors[op] += 1
+            self._latencies[op].append(seconds)
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        index = max(0, int(round(pct / 100.0 * len(sorted_values))) - 1)
+        return sorted_values[min(index, len(sorted_values) - 1)]
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {op: {'count', 'errors', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}}
+        """
+        with self._lock:
+            result = {}
+            for op, count in self._counts.items():
+                values = sorted(self._latencies[op])
+                result[op] = {
+                    'count': count,
+                    'errors': self._errors[op],
+                    'p50_ms': self._percentile(values, 50) * 1000,
+                    'p90_ms': self._percentile(values, 90) * 1000,
+                    'p99_ms': self._percentile(values, 99) * 1000,
+                    'max_ms': values[-1] * 1000
+                }
+            return result
+
+
+class CredentialBroker:
+    """Keeps AWS credentials fresh in memory for one configured profile"""
+
+    def __init__(self, config, refresh_window=None, name=None):
+        from .auth.refresh import CredentialRefresher
+
+        # Refreshes go through the shared single-flight engine, so the daemon
+        # and any 'ccc' invocations never refresh the same profile concurrently
+        try:
+            self.refresher = CredentialRefresher(config, refresh_window=refresh_window, name=name)
+        except KeyError:
+            raise DaemonError(f"Unknown profile '{name}'. Run 'ccc configure --profile {name}' first.")
+
+        if not self.refresher.config.get('tokens', {}).get('refresh_token'):
+            raise DaemonError("No refresh token found. Please run 'ccc login' first.")
+
+        # Build the Cognito clients once and keep them warm for every refresh
+        self.refresher.authenticator
+
+    def get_credentials(self):
+        """
+        Return current AWS credentials, refreshing first if they are about to expire
+        Returns: dict with AccessKeyId, SecretAccessKey, SessionToken, Expiration
+        """
+        return self.refresher.get_credentials()
+
+    def start(self):
+        """Start the proactive background refresh thread"""
+        self.refresher.start()
+
+    def stop(self):
+        self.refresher.stop()
+
+    def status(self):
+        status = self.refresher.status()
+        status['username'] = self.refresher.config.get('tokens', {}).get('username')
+        status['cognito'] = self.refresher.authenticator.throttle.metrics()
+        return status
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON requests on one connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            start = time.perf_counter()
+            op = 'invalid'
+            error = False
+            try:
+                request = json.loads(line)
+                op = request.get('op', 'invalid')
+                response = self.server.dispatch(op, request)
+            except Exception as e:
+                error = True
+                response = {'ok': False, 'error': str(e)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            self.server.stats.record(op, time.perf_counter() - start, error=error)
+
+            if op == 'shutdown':
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class BrokerServer(socketserver.ThreadingUnixStreamServer):
+        """Unix socket server exposing a CredentialBroker"""
+
+        daemon_threads = True
+
+        def __init__(self, broker, socket_path=SOCKET_PATH):
+            self.broker = broker
+            self.socket_path = str(socket_path)
+            self.stats = LatencyStats()
+            self.started_at = time.time()
+            # Create the socket owner-only; credentials are served to anyone who can connect
+            old_umask = os.umask(0o177)
+            try:
+                super().__init__(self.socket_path, _RequestHandler)
+            finally:
+                os.umask(old_umask)
+
+        def dispatch(self, op, request):
+            if op == 'credentials':
+                return {'ok': True, 'credentials': self.broker.get_credentials()}
+            if op == 'status':
+                return {
+                    'ok': True,
+                    'pid': os.getpid(),
+                    'uptime': time.time() - self.started_at,
+                    'broker': self.broker.status(),
+                    'requests': self.stats.snapshot()
+                }
+            if op == 'shutdown':
+                return {'ok': True}
+            raise DaemonError(f"Unknown operation: {op}")
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+def request_daemon(op, socket_path=SOCKET_PATH, timeout=2.0):
+    """
+    Send a single request to the daemon
+
+    Args:
+        op: Operation name ('credentials', 'status' or 'shutdown')
+        socket_path: Path to the daemon's Unix socket
+        timeout: Socket timeout in seconds
+
+    Returns:
+        dict: Response payload
+
+    Raises:
+        DaemonError: If the daemon is not reachable or reports an error
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise DaemonError("Unix domain sockets are not supported on this platform")
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps({'op': op}).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except OSError as e:
+        raise DaemonError(f"Daemon not reachable at {socket_path}: {e}") from e
+
+    if not line:
+        raise DaemonError("Daemon closed the connection")
+
+    try:
+        response = json.loads(line)
+    except ValueError as e:
+        raise DaemonError(f"Invalid response from daemon: {e}")
+    if not response.get('ok'):
+        raise DaemonError(response.get('error', 'Daemon request failed'))
+    return response
+
+
+def serve(config, socket_path=SOCKET_PATH, refresh_window=None, name=None):
+    """
+    Run the credential broker in the foreground until shut down
+
+    Args:
+        config: Configuration dict (must contain tokens from 'ccc login')
+        socket_path: Path of the Unix socket to listen on
+        refresh_window: Seconds before expiry at which credentials are refreshed
+        name: Named profile to serve instead of the top-level settings
+    """
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise DaemonError("Unix domain sockets are not supported on this platform")
+
+    socket_path = str(socket_path)
+
+    # Remove a stale socket left behind by a daemon that did not exit cleanly.
+    # Only a refused connection proves nobody is listening: a live daemon that
+    # is slow to answer must keep its socket.
+    if os.path.exists(socket_path):
+        try:
+            request_daemon('status', socket_path, timeout=0.5)
+        except DaemonError as e:
+            if not isinstance(e.__cause__, (ConnectionRefusedError, FileNotFoundError)):
+                raise DaemonError(f"Socket {socket_path} is in use and not answering: {e}")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+        else:
+            raise DaemonError(f"A daemon is already running on {socket_path}")
+
+    broker = CredentialBroker(config, refresh_window=refresh_window, name=name)
+    broker.get_credentials()
+    broker.start()
+
+    server = BrokerServer(broker, socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        broker.stop()
+        server.server_close()
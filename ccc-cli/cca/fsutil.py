@@ -0,0 +1,119 @@
+"""
+File System Utilities
+Helpers for safely publishing files under ~/.ccc and ~/.aws.
+"""
+
+import os
+import time
+import tempfile
+from pathlib import Path
+
+
+def atomic_write(path, data, mode=0o600):
+    """
+    Atomically replace a file with new contents
+
+    The data is written to a temporary file in the same directory, flushed
+    and fsync'ed, then renamed over the target, so readers never observe a
+    partially written file.
+
+    Args:
+        path: Target file path
+        data: str or bytes to write
+        mode: Permission bits for the new file (default: 0o600)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Set restrictive permissions (Unix-like systems)
+        try:
+            os.chmod(tmp_path, mode)
+        except Exception:
+            pass
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileLock:
+    """
+    Advisory inter-process lock backed by a lock file
+
+    Usage:
+        with FileLock(path):
+            ...
+
+    Uses fcntl.flock on Unix-like systems and msvcrt.locking on Windows.
+    The lock is released when the block exits or the process dies.
+    """
+
+    def __init__(self, path, timeout=60.0, poll_interval=0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def _try_lock(self, fd):
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(self, fd):
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            self._unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,229 @@
+"""
+AWS Call Instrumentation
+Records a timing span for every AWS API call made through the client pool.
+
+Every pooled client (see cca.clients) gets botocore event hooks at creation:
+before-call starts a span and notes the operation, before-send counts each
+attempt (including ones that fail to connect), response-received adds up
+response bytes, and after-call / after-call-error close it. Client construction is
+recorded as a span too. The hooks return immediately unless recording has
+been enabled with enable() (e.g. by 'ccc --timings'). When tracing is
+configured (see cca.tracing), each span is also exported as a trace span.
+"""
+
+import time
+import threading
+
+from . import tracing
+
+
+_enabled = False
+_lock = threading.Lock()
+_spans = []
+
+# Key under which an in-flight span is kept in botocore's request context
+_CONTEXT_KEY = 'cca_span'
+
+# Operations recorded for session/client construction rather than API calls
+SETUP_OPERATIONS = ('CreateSession', 'CreateClient')
+
+
+def enable():
+    """Start recording spans"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording spans (already recorded spans are kept)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Discard all recorded spans"""
+    with _lock:
+        del _spans[:]
+
+
+def get_spans():
+    """
+    Returns:
+        list: Recorded spans (dicts with service, operation, region, start,
+              latency_ms, attempts, retries, bytes_sent, bytes_received,
+              status and error)
+    """
+    with _lock:
+        return [dict(span) for span in _spans]
+
+
+def record(service, operation, start, latency, region=None, **fields):
+    """
+    Record a finished span
+
+    Args:
+        service: AWS service name (e.g. 'cloudtrail')
+        operation: Operation name (e.g. 'LookupEvents')
+        start: Start time (epoch seconds)
+        latency: Duration in seconds
+        region: AWS region name
+        **fields: attempts, retries, bytes_sent, bytes_received, status, error
+    """
+    if not _enabled:
+        return
+    span = {
+        'service': service,
+        'operation': operation,
+        'region': region,
+        'start': start,
+        'latency_ms': latency * 1000,
+        'attempts': 1,
+        'retries': 0,
+        'bytes_sent': 0,
+        'bytes_received': 0,
+        'status': None,
+        'error': None
+    }
+    span.update(fields)
+    with _lock:
+        _spans.append(span)
+
+    tracer = tracing.get_tracer()
+    if tracer.enabled:
+        tracer.add_span(
+            f"{service}.{operation}", start, start + latency,
+            kind=tracing.SPAN_KIND_INTERNAL if operation in SETUP_OPERATIONS else tracing.SPAN_KIND_CLIENT,
+            error=span['error'],
+            **{
+                'rpc.system': 'aws-api',
+                'rpc.service': service,
+                'rpc.method': operation,
+                'cloud.region': region,
+                'http.response.status_code': span['status'],
+                'aws.attempts': span['attempts'],
+                'aws.retries': span['retries'],
+                'aws.bytes_sent': span['bytes_sent'],
+                'aws.bytes_received': span['bytes_received']
+            }
+        )
+
+
+def _body_size(body):
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0
+
+
+def _before_call(model, params, context, **kwargs):
+    if not _enabled:
+        return
+    context[_CONTEXT_KEY] = {
+        # after-call-error is not given the model, so the span carries the name
+        'operation': model.name,
+        'start': time.time(),
+        'clock': time.perf_counter(),
+        'attempts': 0,
+        'bytes_sent': _body_size(params.get('body')),
+        'bytes_received': 0
+    }
+
+
+def _before_send(request=None, **kwargs):
+    # Must return None: a non-None result would be used as the HTTP response
+    context = getattr(request, 'context', None)
+    span = context.get(_CONTEXT_KEY) if context else None
+    if span is not None:
+        span['attempts'] += 1
+
+
+def _response_received(context=None, response_dict=None, **kwargs):
+    span = context.get(_CONTEXT_KEY) if context else None
+    if span is None:
+        return
+    if response_dict:
+        span['bytes_received'] += _body_size(response_dict.get('body'))
+
+
+def _finish(client, context, status=None, error=None):
+    span = context.pop(_CONTEXT_KEY, None) if context else None
+    if span is None:
+        return
+    attempts = max(1, span['attempts'])
+    record(
+        client.meta.service_model.service_name,
+        span['operation'],
+        span['start'],
+        time.perf_counter() - span['clock'],
+        region=client.meta.region_name,
+        attempts=attempts,
+        retries=attempts - 1,
+        bytes_sent=span['bytes_sent'],
+        bytes_received=span['bytes_received'],
+        status=status,
+        error=error
+    )
+
+
+def instrument_client(client):
+    """
+    Register the timing hooks on a botocore client
+
+    Args:
+        client: botocore client (called once per client by cca.clients)
+    """
+    def after_call(http_response=None, parsed=None, context=None, **kwargs):
+        error = (parsed or {}).get('Error', {}).get('Code')
+        status = getattr(http_response, 'status_code', None)
+        _finish(client, context, status=status, error=error)
+
+    def after_call_error(exception=None, context=None, **kwargs):
+        _finish(client, context, error=type(exception).__name__)
+
+    events = client.meta.events
+    events.register('before-call', _before_call, unique_id='cca-timings-before-call')
+    events.register('before-send', _before_send, unique_id='cca-timings-before-send')
+    events.register('response-received', _response_received, unique_id='cca-timings-response-received')
+    events.register('after-call', after_call, unique_id='cca-timings-after-call')
+    events.register('after-call-error', after_call_error, unique_id='cca-timings-after-call-error')
+
+
+def summarize(spans=None):
+    """
+    Aggregate spans per (service, operation)
+
+    Args:
+        spans: Spans to aggregate (default: all recorded spans)
+
+    Returns:
+        list: dicts with service, operation, calls, errors, retries,
+              total_ms, p50_ms, max_ms, bytes_sent and bytes_received,
+              slowest total first
+    """
+    if spans is None:
+        spans = get_spans()
+
+    groups = {}
+    for span in spans:
+        groups.setdefault((span['service'], span['operation']), []).append(span)
+
+    summary = []
+    for (service, operation), group in groups.items():
+        latencies = sorted(span['latency_ms'] for span in group)
+        summary.append({
+            'service': service,
+            'operation': operation,
+            'calls': len(group),
+            'errors': sum(1 for span in group if span['error']),
+            'retries': sum(span['retries'] for span in group),
+            'total_ms': sum(latencies),
+            'p50_ms': latencies[len(latencies) // 2],
+            'max_ms': latencies[-1],
+            'bytes_sent': sum(span['bytes_sent'] for span in group),
+            'bytes_received': sum(span['bytes_received'] for span in group)
+        })
+    summary.sort(key=lambda row: row['total_ms'], reverse=True)
+    return summary
@@ -0,0 +1,36 @@
+"""
+Lazy Exports
+PEP 562 helpers shared by the cca packages: public names are imported from
+their submodules on first access, so importing a package does not pull in
+boto3, botocore or requests until an API that needs them is used.
+"""
+
+import sys
+from importlib import import_module
+
+
+def lazy_exports(package, lazy_imports):
+    """
+    Build a package's module-level __getattr__ and __dir__
+
+    Args:
+        package: The package's __name__
+        lazy_imports: dict of public name -> relative module (e.g. '.config')
+
+    Returns:
+        tuple: (__getattr__, __dir__)
+    """
+    def __getattr__(name):
+        module_name = lazy_imports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        value = getattr(import_module(module_name, package), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(lazy_imports))
+
+    return __getattr__, __dir__
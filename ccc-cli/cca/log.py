@@ -0,0 +1,76 @@
+"""
+Logging
+The SDK reports progress through the standard logging module under the
+'cca' logger instead of printing. As a library it is quiet by default
+(only a NullHandler is attached); applications opt in to output with
+enable_console_logging() or their own handlers. Messages are formatted
+lazily, and key events carry structured fields (profile, path,
+identity_id, expiration, ...) as record attributes.
+"""
+
+import sys
+import json
+import logging
+
+
+# Attributes present on every LogRecord; anything else was passed via extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class ConsoleHandler(logging.Handler):
+    """
+    Writes each message on its own line to a stream
+
+    Without an explicit stream, warnings and errors go to whatever
+    sys.stderr is at the time and everything else to the current
+    sys.stdout, so contextlib.redirect_stdout() applies (as it did to
+    print()) and stdout stays free of problems a caller may be parsing.
+    """
+
+    def __init__(self, stream=None, level=logging.NOTSET):
+        super().__init__(level)
+        self.stream = stream
+
+    def emit(self, record):
+        try:
+            stream = self.stream or (sys.stderr if record.levelno >= logging.WARNING else sys.stdout)
+            stream.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including structured fields"""
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def enable_console_logging(level=logging.INFO, json_format=False, stream=None):
+    """
+    Print SDK log messages (as the ccc CLI does)
+
+    Args:
+        level: Minimum level to show (default: INFO)
+        json_format: Emit JSON lines instead of plain messages
+        stream: Output stream (default: sys.stderr for warnings and errors,
+                sys.stdout for the rest)
+
+    Returns:
+        The attached handler
+    """
+    logger = logging.getLogger('cca')
+    handler = ConsoleHandler(stream)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
@@ -0,0 +1,326 @@
+"""
+Tracing
+End-to-end traces of CLI and SDK operations as OpenTelemetry (OTLP/JSON)
+spans, without depending on the OpenTelemetry SDK.
+
+Tracing is off by default: get_tracer() returns a no-op tracer whose
+span() hands back one shared, do-nothing context manager. configure()
+installs a recording Tracer; finished traces are appended to a file as one
+OTLP/JSON ExportTraceServiceRequest per line (the format written by the
+OpenTelemetry Collector's file exporter) and/or POSTed to a collector's
+/v1/traces endpoint. AWS calls recorded by cca.instrumentation become
+child spans of the span that issued them.
+
+The current span is tracked per context (contextvars), so each thread and
+each asyncio task has its own; concurrent operations produce separate
+traces. Work handed to a thread pool joins the submitter's trace only when
+wrapped with propagate().
+"""
+
+import logging
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+
+from . import __version__
+
+
+logger = logging.getLogger(__name__)
+
+
+# Span kinds and status codes from the OTLP specification
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class _NoopSpan:
+    """Shared span used while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class NoopTracer:
+    """Tracer used while tracing is disabled; every operation is a no-op"""
+
+    enabled = False
+
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        return _NOOP_SPAN
+
+    def add_span(self, name, start, end, kind=SPAN_KIND_CLIENT, error=None, **attributes):
+        pass
+
+    def flush(self):
+        pass
+
+
+class Span:
+    """A span being recorded; use as a context manager via Tracer.span()"""
+
+    def __init__(self, tracer, name, kind, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.trace_id = None
+        self.span_id = os.urandom(8).hex()
+        self.parent = None
+        self.start = None
+        self.end = None
+        self.error = None
+        self._previous = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time_ns()
+        # SystemExit(0) from a CLI handler is a normal exit
+        if exc is not None and not (isinstance(exc, SystemExit) and not exc.code):
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._pop(self)
+        return False
+
+
+def propagate(func):
+    """
+    Wrap a callable so it runs in the caller's tracing context
+
+    Use for work submitted to a thread pool, so that spans opened (and AWS
+    calls made) by the workers become children of the submitting span.
+
+    Args:
+        func: Callable to wrap
+
+    Returns:
+        Callable taking the same arguments
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so each call gets a copy
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+class Tracer:
+    """Records spans in memory and exports each trace when its root span ends"""
+
+    enabled = True
+
+    def __init__(self, path=None, endpoint=None, service_name='ccc', timeout=2.0):
+        """
+        Args:
+            path: File to append OTLP/JSON lines to
+            endpoint: OTLP/HTTP collector base URL (e.g. http://localhost:4318)
+            service_name: Value of the service.name resource attribute
+            timeout: Collector request timeout in seconds
+        """
+        self.path = path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._finished = []
+        # Innermost open span of the running thread or task
+        self._current_span = contextvars.ContextVar(f"cca_tracer_{id(self)}", default=None)
+
+    def _current(self):
+        return self._current_span.get()
+
+    def _push(self, span):
+        parent = self._current()
+        if parent is not None:
+            span.parent = parent.span_id
+            span.trace_id = parent.trace_id
+        else:
+            span.trace_id = os.urandom(16).hex()
+        span._previous = parent
+        self._current_span.set(span)
+
+    def _pop(self, span):
+        if self._current() is span:
+            self._current_span.set(span._previous)
+        with self._lock:
+            self._finished.append(self._encode(span.trace_id, span.span_id, span.parent, span.name, span.kind,
+                                               span.start, span.end, span.error, span.attributes))
+        if span.parent is None:
+            # A root span ended: its trace is complete
+            self.flush()
+
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        """
+        Start a span
+
+        Args:
+            name: Span name (e.g. 'ccc login', 'save_config')
+            kind: SPAN_KIND_INTERNAL or SPAN_KIND_CLIENT
+            **attributes: Span attributes
+
+        Returns:
+            Span context manager
+        """
+        return Span(self, name, kind, attributes)
+
+    def add_span(self, name, start, end, kind=SPAN_KIND_CLIENT, error=None, **attributes):
+        """
+        Record an already finished span as a child of the current span
+
+        Args:
+            name: Span name
+            start: Start time (epoch seconds)
+            end: End time (epoch seconds)
+            kind: Span kind
+            error: Error description, or None on success
+            **attributes: Span attributes
+        """
+        parent = self._current()
+        if parent is None:
+            trace_id, parent_id = os.urandom(16).hex(), None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        encoded = self._encode(trace_id, os.urandom(8).hex(), parent_id, name, kind,
+                               int(start * 1e9), int(end * 1e9), error, attributes)
+        with self._lock:
+            self._finished.append(encoded)
+        if parent is None:
+            self.flush()
+
+    @staticmethod
+    def _encode(trace_id, span_id, parent_id, name, kind, start, end, error, attributes):
+        span = {
+            'traceId': trace_id,
+            'spanId': span_id,
+            'name': name,
+            'kind': kind,
+            'startTimeUnixNano': str(start),
+            'endTimeUnixNano': str(end),
+            'attributes': [_attribute(k, v) for k, v in attributes.items() if v is not None],
+            'status': {'code': STATUS_ERROR, 'message': error} if error else {'code': STATUS_OK}
+        }
+        if parent_id:
+            span['parentSpanId'] = parent_id
+        return span
+
+    def flush(self):
+        """Export all finished spans"""
+        with self._lock:
+            spans, self._finished = self._finished, []
+        if not spans:
+            return
+
+        payload = json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'cca', 'version': __version__},
+                    'spans': spans
+                }]
+            }]
+        })
+
+        if self.path:
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(payload + '\n')
+            except OSError as e:
+                logger.warning("[WARN] Could not write trace file: %s", e)
+
+        if self.endpoint:
+            import urllib.request
+            request = urllib.request.Request(
+                self.endpoint.rstrip('/') + '/v1/traces',
+                data=payload.encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception as e:
+                logger.warning("[WARN] Could not export traces to %s: %s", self.endpoint, e)
+
+
+_tracer = NoopTracer()
+
+
+def get_tracer():
+    """
+    Get the process-wide tracer
+
+    Returns:
+        Tracer, or a NoopTracer when tracing is not configured
+    """
+    return _tracer
+
+
+def configure(path=None, endpoint=None, service_name='ccc'):
+    """
+    Enable tracing (or disable it when neither path nor endpoint is given)
+
+    Args:
+        path: File to append OTLP/JSON traces to
+        endpoint: OTLP/HTTP collector base URL
+        service_name: service.name resource attribute
+
+    Returns:
+        The installed tracer
+    """
+    global _tracer
+    from . import instrumentation
+
+    if path or endpoint:
+        _tracer = Tracer(path=path, endpoint=endpoint, service_name=service_name)
+        # AWS call spans come from the client pool's instrumentation hooks
+        instrumentation.enable()
+    else:
+        _tracer = NoopTracer()
+    return _tracer
+
+
+def traced(name):
+    """
+    Decorator that runs a function inside a span of the given name
+
+    While tracing is disabled the wrapper only checks a flag before
+    calling the function.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
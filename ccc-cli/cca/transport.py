@@ -0,0 +1,207 @@
+"""
+HTTP Transport
+Shared, pooled HTTP client for the registration Lambda endpoint.
+
+One requests.Session with a keep-alive connection pool is reused for every
+call. Idempotent requests are retried on 5xx responses, timeouts and
+connection errors with exponential backoff and full jitter; POSTs carry an
+Idempotency-Key header that stays the same across retries so the endpoint
+can deduplicate them. Request bodies can be gzip-compressed, and every
+transport keeps timing metrics.
+"""
+
+import gzip
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+# Responses that are worth retrying
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class TransportError(Exception):
+    """Raised when a request fails (after retries) without an HTTP response"""
+
+
+class HttpTransport:
+    """Pooled, retrying HTTP client with optional gzip request bodies and metrics"""
+
+    def __init__(self, pool_size=16, timeout=10, max_attempts=3, base_delay=0.2, max_delay=5.0,
+                 compress=False, compress_min_size=1024):
+        """
+        Args:
+            pool_size: Keep-alive connections kept per host
+            timeout: Default per-attempt timeout in seconds
+            max_attempts: Attempts for idempotent requests
+            base_delay: Backoff base in seconds
+            max_delay: Backoff cap in seconds
+            compress: gzip request bodies (the server must accept Content-Encoding: gzip)
+            compress_min_size: Only compress bodies of at least this many bytes
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._metrics = {
+            'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0,
+            'bytes_sent': 0, 'bytes_uncompressed': 0, 'bytes_received': 0, 'backoff_wait': 0.0
+        }
+
+    def _record(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self._metrics[key] += value
+
+    def _encode(self, body, headers):
+        if body is None:
+            return None
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        raw_size = len(body)
+        if self.compress and raw_size >= self.compress_min_size:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        self._record(bytes_sent=len(body), bytes_uncompressed=raw_size)
+        return body
+
+    def request(self, method, url, body=None, headers=None, timeout=None, idempotent=None):
+        """
+        Send a request, retrying transient failures when it is safe to
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            body: dict/list (sent as JSON) or bytes
+            headers: Extra request headers
+            timeout: Per-attempt timeout in seconds (default: the transport's)
+            idempotent: Whether retries are allowed (default: True for GET,
+                        HEAD, PUT, DELETE and OPTIONS; pass True for POSTs the
+                        server deduplicates by Idempotency-Key)
+
+        Returns:
+            requests.Response (the last one, which may be a 5xx)
+
+        Raises:
+            TransportError: On timeouts or connection errors after all attempts
+        """
+        import requests
+
+        headers = dict(headers or {})
+        if idempotent is None:
+            idempotent = method.upper() in ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+        if idempotent and method.upper() == 'POST':
+            headers.setdefault('Idempotency-Key', str(uuid.uuid4()))
+        data = self._encode(body, headers)
+        attempts = self.max_attempts if idempotent else 1
+
+        self._record(requests=1)
+        started = time.perf_counter()
+        try:
+            for attempt in range(attempts):
+                self._record(attempts=1)
+                try:
+                    response = self.session.request(method, url, data=data, headers=headers,
+                                                    timeout=timeout or self.timeout)
+                    self._record(bytes_received=len(response.content))
+                    if response.status_code not in RETRY_STATUSES or attempt + 1 >= attempts:
+                        return response
+                    reason = f"HTTP {response.status_code}"
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                    if attempt + 1 >= attempts:
+                        self._record(failures=1)
+                        raise TransportError(str(e))
+                    reason = type(e).__name__
+                except requests.exceptions.RequestException as e:
+                    self._record(failures=1)
+                    raise TransportError(str(e))
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                logger.debug("Retrying %s %s after %s (attempt %d, %.2fs)", method, url, reason, attempt + 1, delay)
+                self._record(retries=1, backoff_wait=delay)
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+
+    def post_json(self, url, body, timeout=None, idempotent=False):
+        """
+        POST a JSON body and decode the JSON response
+
+        Returns:
+            tuple: (status_code, decoded JSON body)
+
+        Raises:
+            TransportError: On network failure
+            json.JSONDecodeError: If the response is not JSON
+        """
+        response = self.request('POST', url, body=body, timeout=timeout, idempotent=idempotent)
+        return response.status_code, response.json()
+
+    def metrics(self):
+        """
+        Returns:
+            dict: requests, attempts, retries, failures, bytes_sent,
+                  bytes_uncompressed, bytes_received, backoff_wait and
+                  latency percentiles (p50_ms, p90_ms, p99_ms, max_ms) over
+                  the last 1000 requests
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            latencies = sorted(self._latencies)
+        for name, p in (('p50_ms', 0.50), ('p90_ms', 0.90), ('p99_ms', 0.99)):
+            metrics[name] = latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+        metrics['max_ms'] = latencies[-1] * 1000 if latencies else 0.0
+        return metrics
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(config=None):
+    """
+    Get the process-wide HttpTransport
+
+    Args:
+        config: Optional configuration dict; 'http_pool_size', 'http_timeout',
+                'http_max_attempts' and 'http_gzip' only take effect when the
+                transport is first created
+
+    Returns:
+        HttpTransport
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            config = config or {}
+            _transport = HttpTransport(
+                pool_size=config.get('http_pool_size', 16),
+                timeout=config.get('http_timeout', 10),
+                max_attempts=config.get('http_max_attempts', 3),
+                compress=config.get('http_gzip', False)
+            )
+        return _transport
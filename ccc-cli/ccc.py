@@ -8,26 +8,13 @@ This is a thin wrapper around the CCA SDK.
 
 import sys
 import argparse
-import boto3
-import getpass
+import contextlib
 from datetime import datetime, timezone
 
-# Import CCA SDK
-from cca import (
-    __version__ as VERSION,
-    CognitoAuthenticator,
-    load_config,
-    save_config,
-    save_credentials,
-    remove_credentials,
-    get_user_history,
-    format_events,
-    list_user_resources,
-    format_resources,
-    get_user_permissions,
-    test_permissions,
-    format_permissions
-)
+# Only the version is imported eagerly. Every command handler imports the
+# parts of the CCA SDK (and boto3/getpass) it needs on demand, so that
+# lightweight commands such as 'version' never pay for loading botocore.
+from cca import __version__ as VERSION
 
 
 def validate_password(password):
@@ -50,70 +37,129 @@ def validate_password(password):
 
 def cmd_configure(args):
     """Configure CCC CLI with Cognito settings"""
+    from cca import load_config, save_config, get_profile_config
+
     print("=== CCC CLI Configuration (v0.2 - Cognito) ===\n")
 
     config = load_config()
 
+    # Named profiles are stored under config['profiles'] and start from the top-level settings
+    if args.profile:
+        print(f"Profile: {args.profile}\n")
+        if args.profile in config.get('profiles', {}):
+            settings = get_profile_config(config, args.profile)
+        else:
+            settings = {k: v for k, v in config.items() if k not in ('profiles', 'tokens')}
+            settings['profile'] = args.profile
+    else:
+        settings = config
+
     # Prompt for configuration values
-    user_pool_id = input(f"Cognito User Pool ID [{config.get('user_pool_id', '')}]: ").strip()
-    app_client_id = input(f"Cognito App Client ID [{config.get('app_client_id', '')}]: ").strip()
-    identity_pool_id = input(f"Cognito Identity Pool ID [{config.get('identity_pool_id', '')}]: ").strip()
-    region = input(f"AWS Region [{config.get('region', 'us-east-1')}]: ").strip()
-    profile = input(f"AWS Profile Name [{config.get('profile', 'cca')}]: ").strip()
+    user_pool_id = input(f"Cognito User Pool ID [{settings.get('user_pool_id', '')}]: ").strip()
+    app_client_id = input(f"Cognito App Client ID [{settings.get('app_client_id', '')}]: ").strip()
+    identity_pool_id = input(f"Cognito Identity Pool ID [{settings.get('identity_pool_id', '')}]: ").strip()
+    region = input(f"AWS Region [{settings.get('region', 'us-east-1')}]: ").strip()
+    profile = input(f"AWS Profile Name [{settings.get('profile', 'cca')}]: ").strip()
 
     # Update config with new values (keep old if not provided)
     if user_pool_id:
-        config['user_pool_id'] = user_pool_id
+        settings['user_pool_id'] = user_pool_id
     if app_client_id:
-        config['app_client_id'] = app_client_id
+        settings['app_client_id'] = app_client_id
     if identity_pool_id:
-        config['identity_pool_id'] = identity_pool_id
+        settings['identity_pool_id'] = identity_pool_id
     if region:
-        config['region'] = region
+        settings['region'] = region
     else:
-        config.setdefault('region', 'us-east-1')
+        settings.setdefault('region', 'us-east-1')
     if profile:
-        config['profile'] = profile
+        settings['profile'] = profile
     else:
-        config.setdefault('profile', 'cca')
+        settings.setdefault('profile', 'cca')
 
     # Validate required fields
-    if not config.get('user_pool_id'):
+    if not settings.get('user_pool_id'):
         print("[ERROR] User Pool ID is required")
         sys.exit(1)
-    if not config.get('app_client_id'):
+    if not settings.get('app_client_id'):
         print("[ERROR] App Client ID is required")
         sys.exit(1)
-    if not config.get('identity_pool_id'):
+    if not settings.get('identity_pool_id'):
         print("[ERROR] Identity Pool ID is required")
         sys.exit(1)
 
+    if args.profile:
+        named = config.setdefault('profiles', {}).setdefault(args.profile, {})
+        for key in ('user_pool_id', 'app_client_id', 'identity_pool_id', 'region', 'profile'):
+            named[key] = settings[key]
+
     save_config(config)
     print("\n[OK] Configuration complete!")
-    print(f"\nYou can now run: ccc login")
+    if args.profile:
+        print(f"\nYou can now run: ccc login --profile {args.profile}")
+    else:
+        print(f"\nYou can now run: ccc login")
+
+
+def start_warm_up(config):
+    """
+    Build a CognitoAuthenticator and pre-open its HTTPS connections on a background thread
+
+    Returns:
+        Future resolving to the warmed-up CognitoAuthenticator
+    """
+    import threading
+    from concurrent.futures import Future
+
+    future = Future()
+
+    def run():
+        try:
+            from cca import CognitoAuthenticator
+            auth = CognitoAuthenticator(config)
+            auth.warm_up()
+            future.set_result(auth)
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='ccc-warm-up', daemon=True).start()
+    return future
 
 
 def cmd_login(args):
     """Login to AWS using Cognito credentials"""
+    import getpass
+    from cca import load_config, save_config, save_credentials
+    from cca.auth import save_cached_credentials
+    from cca.tracing import get_tracer
+
     print("=== CCC CLI Login (v0.2 - Cognito) ===\n")
 
+    if args.all or args.profile:
+        login_profiles(args)
+        return
+
     config = load_config()
 
     if not config.get('user_pool_id') or not config.get('app_client_id'):
         print("[ERROR] Not configured. Run 'ccc configure' first.")
         sys.exit(1)
 
+    # Create the Cognito clients and connect to Cognito while the user types
+    warm_up = start_warm_up(config)
+
     # Prompt for credentials
-    username = input("Email: ").strip()
-    password = getpass.getpass("Password: ")
+    with get_tracer().span('prompt'):
+        username = input("Email: ").strip()
+        password = getpass.getpass("Password: ")
 
     if not username or not password:
         print("[ERROR] Username and password are required")
         sys.exit(1)
 
     try:
-        # Initialize authenticator
-        auth = CognitoAuthenticator(config)
+        # Initialize authenticator (already connected by the warm-up)
+        auth = warm_up.result()
 
         # Authenticate with Cognito
         tokens = auth.authenticate(username, password)
@@ -131,8 +177,9 @@ def cmd_login(args):
         # Get AWS credentials
         aws_credentials = auth.get_aws_credentials(tokens['IdToken'])
 
-        # Save AWS credentials to ~/.aws/credentials
+        # Save AWS credentials to ~/.aws/credentials and the local cache
         save_credentials(aws_credentials, profile=config.get('profile', 'cca'))
+        save_cached_credentials(aws_credentials, profile=config.get('profile', 'cca'))
 
         print(f"\n[OK] Login successful!")
         print(f"\nYou can now use AWS CLI with: aws --profile {config.get('profile', 'cca')} <command>")
@@ -143,36 +190,146 @@ def cmd_login(args):
         sys.exit(1)
 
 
+def login_profiles(args):
+    """Log in to several named profiles concurrently (ccc login --all / --profile)"""
+    import getpass
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from cca import load_config, save_config, list_profiles, get_profile_config
+    from cca.auth import save_credentials_batch, save_cached_credentials_batch
+    from cca.tracing import get_tracer, propagate
+
+    config = load_config()
+    names = list_profiles(config) if args.all else [args.profile]
+
+    if not names:
+        print("[ERROR] No named profiles configured. Run 'ccc configure --profile NAME' first.")
+        sys.exit(1)
+
+    profiles = {}
+    for name in names:
+        try:
+            profiles[name] = get_profile_config(config, name)
+        except KeyError:
+            print(f"[ERROR] Unknown profile '{name}'. Run 'ccc configure --profile {name}' first.")
+            sys.exit(1)
+        if not profiles[name].get('user_pool_id') or not profiles[name].get('app_client_id'):
+            print(f"[ERROR] Profile '{name}' is not configured. Run 'ccc configure --profile {name}' first.")
+            sys.exit(1)
+
+    def pool_of(settings):
+        return (settings.get('region', 'us-east-1'), settings['user_pool_id'])
+
+    # Create the Cognito clients and connect to Cognito while the user types
+    warm_ups = {name: start_warm_up(settings) for name, settings in profiles.items()}
+
+    # Prompt once per distinct user pool
+    logins = {}
+    for name, settings in profiles.items():
+        pool = pool_of(settings)
+        if pool in logins:
+            continue
+        members = [n for n, p in profiles.items() if pool_of(p) == pool]
+        print(f"User pool {pool[1]} ({', '.join(members)})")
+        with get_tracer().span('prompt', user_pool_id=pool[1]):
+            username = input("Email: ").strip()
+            password = getpass.getpass("Password: ")
+        if not username or not password:
+            print("[ERROR] Username and password are required")
+            sys.exit(1)
+        logins[pool] = (username, password)
+        print()
+
+    def login_one(name):
+        settings = profiles[name]
+        username, password = logins[pool_of(settings)]
+        auth = warm_ups[name].result()
+        tokens = auth.authenticate(username, password)
+        aws_credentials = auth.get_aws_credentials(tokens['IdToken'])
+        return username, tokens, aws_credentials
+
+    concurrency = args.concurrency or config.get('login_concurrency', 4)
+    results = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(names)))) as executor:
+        futures = {executor.submit(propagate(login_one), name): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failures[name] = str(e)
+
+    # Write all tokens and credentials in one batched update per file
+    if results:
+        retrieved_at = datetime.now(timezone.utc).isoformat()
+        credentials_by_profile = {}
+        for name, (username, tokens, aws_credentials) in results.items():
+            config['profiles'][name]['tokens'] = {
+                'id_token': tokens['IdToken'],
+                'access_token': tokens['AccessToken'],
+                'refresh_token': tokens.get('RefreshToken'),
+                'username': username,
+                'retrieved_at': retrieved_at
+            }
+            credentials_by_profile[profiles[name]['profile']] = aws_credentials
+
+        save_config(config)
+        save_credentials_batch(credentials_by_profile)
+        save_cached_credentials_batch(credentials_by_profile)
+
+    print()
+    for name in names:
+        if name in results:
+            print(f"[OK] {name}: logged in (AWS profile: {profiles[name]['profile']})")
+        else:
+            print(f"[ERROR] {name}: {failures[name]}")
+
+    if failures:
+        sys.exit(1)
+
+
 def cmd_refresh(args):
     """Refresh AWS credentials using stored refresh token"""
+    from cca import load_config, save_credentials
+    from cca.auth import CredentialRefresher, is_token_fresh, token_expires_in, load_credentials
+
     print("=== CCC CLI Refresh ===\n")
 
-    config = load_config()
+    try:
+        refresher = CredentialRefresher(load_config(), name=args.profile)
+    except KeyError:
+        print(f"[ERROR] Unknown profile '{args.profile}'. Run 'ccc configure --profile {args.profile}' first.")
+        sys.exit(1)
+    config = refresher.config
 
     if not config.get('tokens', {}).get('refresh_token'):
         print("[ERROR] No refresh token found. Please run 'ccc login' first.")
         sys.exit(1)
 
-    try:
-        auth = CognitoAuthenticator(config)
-
-        # Refresh tokens
-        tokens = auth.refresh_credentials(config['tokens']['refresh_token'])
+    profile = config.get('profile', 'cca')
 
-        # Update stored tokens
-        config['tokens']['id_token'] = tokens['IdToken']
-        config['tokens']['access_token'] = tokens['AccessToken']
-        # Note: Refresh token might not be returned (reuse existing one)
-        if 'RefreshToken' in tokens:
-            config['tokens']['refresh_token'] = tokens['RefreshToken']
-        config['tokens']['retrieved_at'] = datetime.now(timezone.utc).isoformat()
-        save_config(config)
+    # Decode the stored ID token locally: no network call if nothing needs refreshing
+    id_token = config['tokens'].get('id_token')
+    if not args.force and is_token_fresh(id_token, refresher.refresh_window) \
+            and not refresher.is_due(refresher.credentials):
+        # The daemon and credential-process only refresh the cache, so the
+        # credentials file can still hold older keys
+        written = load_credentials(profile) or {}
+        if (written.get('AccessKeyId'), written.get('Expiration')) != (
+                refresher.credentials['AccessKeyId'], refresher.credentials['Expiration']):
+            save_credentials(refresher.credentials, profile=profile)
+            print("[OK] Credentials file updated with the current credentials")
+            return
+        print(f"[OK] Tokens are still valid for {int(token_expires_in(id_token) // 60)} minutes, nothing to refresh")
+        print("[INFO] Use 'ccc refresh --force' to refresh anyway")
+        return
 
-        # Get new AWS credentials
-        aws_credentials = auth.get_aws_credentials(tokens['IdToken'])
+    try:
+        # Single-flight: if another process is refreshing this profile, reuse its result
+        aws_credentials = refresher.get_credentials(force=args.force)
 
         # Save AWS credentials
-        save_credentials(aws_credentials, profile=config.get('profile', 'cca'))
+        save_credentials(aws_credentials, profile=profile)
 
         print(f"[OK] Credentials refreshed successfully!")
 
@@ -182,8 +339,110 @@ def cmd_refresh(args):
         sys.exit(1)
 
 
+def cmd_credential_process(args):
+    """Emit AWS credentials in the credential_process JSON format"""
+    import json
+    from contextlib import redirect_stdout
+    from cca import load_config
+    from cca.auth import CredentialRefresher, to_credential_process
+    from cca.daemon import DaemonError, request_daemon, socket_path_for
+
+    # Prefer a running credential broker: it keeps credentials fresh in memory
+    socket_path = socket_path_for(args.profile)
+    if socket_path.exists():
+        try:
+            response = request_daemon('credentials', socket_path)
+            print(json.dumps(to_credential_process(response['credentials'])))
+            return
+        except DaemonError as e:
+            sys.stderr.write(f"[WARN] {e}, falling back to local cache\n")
+
+    try:
+        refresher = CredentialRefresher(load_config(), refresh_window=args.refresh_window, name=args.profile)
+    except KeyError:
+        sys.stderr.write(f"[ERROR] Unknown profile '{args.profile}'\n")
+        sys.exit(1)
+
+    # stdout is reserved for the credential_process payload
+    try:
+        with redirect_stdout(sys.stderr):
+            credentials = refresher.get_credentials()
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] Refresh failed: {e}\n")
+        sys.stderr.write("[INFO] Try running 'ccc login' again\n")
+        sys.exit(1)
+
+    print(json.dumps(to_credential_process(credentials)))
+
+
+def cmd_daemon(args):
+    """Run the credential broker daemon, or query/stop a running one"""
+    from cca import load_config
+    from cca.daemon import DaemonError, request_daemon, serve, socket_path_for
+
+    socket_path = args.socket or str(socket_path_for(args.profile))
+
+    if args.status:
+        try:
+            response = request_daemon('status', socket_path)
+        except DaemonError as e:
+            print(f"[INFO] {e}")
+            sys.exit(1)
+
+        broker = response['broker']
+        print("=== CCC Daemon Status ===\n")
+        print(f"PID: {response['pid']}")
+        print(f"Uptime: {response['uptime']:.0f} seconds")
+        print(f"Profile: {broker['profile']}")
+        print(f"User: {broker.get('username') or 'Unknown'}")
+        print(f"Credentials expire at: {broker.get('expiration') or 'N/A'}")
+        print(f"Refreshes: {broker['refresh_count']} ({broker['refresh_errors']} failed)")
+        if broker.get('last_error'):
+            print(f"Last error: {broker['last_error']}")
+
+        print(f"\n{'Operation':<15} {'Count':>8} {'Errors':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        print("-" * 71)
+        for op, stats in sorted(response['requests'].items()):
+            print(f"{op:<15} {stats['count']:>8} {stats['errors']:>8} {stats['p50_ms']:>9.3f} "
+                  f"{stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+
+        if broker.get('cognito'):
+            print(f"\n{'Cognito API':<30} {'Calls':>6} {'Throttled':>10} {'Transient':>10} {'Retries':>8} "
+                  f"{'Rate wait s':>12} {'Backoff s':>10}")
+            print("-" * 92)
+            for api, metrics in sorted(broker['cognito'].items()):
+                print(f"{api:<30} {metrics['calls']:>6} {metrics['throttled']:>10} {metrics.get('transient', 0):>10} "
+                      f"{metrics['retries']:>8} {metrics['rate_wait']:>12.3f} {metrics['backoff_wait']:>10.3f}")
+        return
+
+    if args.stop:
+        try:
+            request_daemon('shutdown', socket_path)
+        except DaemonError as e:
+            print(f"[INFO] {e}")
+            sys.exit(1)
+        print("[OK] Daemon stopped")
+        return
+
+    print("=== CCC Credential Daemon ===\n")
+
+    config = load_config()
+    print(f"[INFO] Listening on {socket_path}")
+    try:
+        serve(config, socket_path, refresh_window=args.refresh_window, name=args.profile)
+    except DaemonError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    print("[OK] Daemon stopped")
+
+
 def cmd_logout(args):
     """Logout and clear stored credentials"""
+    from cca import load_config, save_config, remove_credentials
+    from cca.auth import remove_cached_credentials
+
     print("=== CCC CLI Logout ===\n")
 
     config = load_config()
@@ -196,12 +455,16 @@ def cmd_logout(args):
     # Remove profile from ~/.aws/credentials
     profile = config.get('profile', 'cca')
     remove_credentials(profile)
+    remove_cached_credentials(profile)
 
     print("[OK] Logout complete!")
 
 
 def cmd_register(args):
     """Register a new user via CLI"""
+    import getpass
+    from cca import CognitoAuthenticator, load_config
+
     print("=== CCC CLI Registration ===\n")
 
     config = load_config()
@@ -265,6 +528,9 @@ def cmd_register(args):
 
 def cmd_forgot_password(args):
     """Initiate forgot password flow"""
+    import getpass
+    from cca import CognitoAuthenticator, load_config
+
     print("=== CCC CLI Forgot Password ===\n")
 
     config = load_config()
@@ -324,6 +590,9 @@ def cmd_forgot_password(args):
 
 def cmd_change_password(args):
     """Change password (requires current password)"""
+    import getpass
+    from cca import CognitoAuthenticator, load_config
+
     print("=== CCC CLI Change Password ===\n")
 
     config = load_config()
@@ -374,6 +643,8 @@ def cmd_change_password(args):
 
 def cmd_whoami(args):
     """Display current user information"""
+    from cca import load_config
+
     print("=== CCC CLI User Info ===\n")
 
     config = load_config()
@@ -388,11 +659,16 @@ def cmd_whoami(args):
     print(f"AWS Profile: {config.get('profile', 'cca')}")
     print(f"Last authenticated: {config['tokens'].get('retrieved_at', 'Unknown')}")
 
+    if args.offline:
+        print_token_claims(config, allow_fetch=False)
+        return
+
     # Try to get caller identity from AWS
     try:
+        from cca.clients import get_client
+
         profile = config.get('profile', 'cca')
-        session = boto3.Session(profile_name=profile)
-        sts = session.client('sts')
+        sts = get_client('sts', profile=profile)
         identity = sts.get_caller_identity()
 
         print(f"\nAWS Caller Identity:")
@@ -403,6 +679,47 @@ def cmd_whoami(args):
         print(f"\n[WARN] Could not retrieve AWS caller identity: {e}")
         print("[INFO] Your credentials may have expired. Run 'ccc refresh' or 'ccc login'")
 
+    print_token_claims(config, allow_fetch=True)
+
+
+def print_token_claims(config, allow_fetch):
+    """Print the identity claims of the stored ID token, decoded locally"""
+    from cca.auth import get_identity_claims, token_expires_in, verify_jwt
+
+    id_token = config['tokens'].get('id_token')
+    if not id_token:
+        return
+
+    try:
+        claims = get_identity_claims(id_token)
+    except Exception as e:
+        print(f"\n[WARN] Could not decode ID token: {e}")
+        return
+
+    remaining = token_expires_in(id_token)
+    print(f"\nID Token:")
+    print(f"  Email: {claims['email'] or 'Unknown'}")
+    print(f"  Subject: {claims['sub']}")
+    print(f"  Groups: {', '.join(claims['groups']) or '(none)'}")
+    if remaining is None:
+        print("  Expires: unknown (no exp claim)")
+    elif remaining > 0:
+        print(f"  Expires in: {int(remaining // 60)} minutes")
+    else:
+        print(f"  Expired: {int(-remaining // 60)} minutes ago")
+
+    try:
+        verify_jwt(
+            id_token,
+            config.get('region', 'us-east-1'),
+            config.get('user_pool_id'),
+            config.get('app_client_id'),
+            allow_fetch=allow_fetch
+        )
+        print("  Signature: verified")
+    except Exception as e:
+        print(f"  Signature: not verified ({e})")
+
 
 def cmd_version(args):
     """Display version information"""
@@ -412,14 +729,17 @@ def cmd_version(args):
 
 def cmd_history(args):
     """Display history of AWS operations performed by the user (Hybrid: CloudTrail + CloudWatch Logs)"""
+    from cca import load_config, get_user_history, format_events
+    from cca.clients import get_session, get_client
+
     print("=== CCC CLI History ===\n")
 
     config = load_config()
     profile = config.get('profile', 'cca')
     region = config.get('region', 'us-east-1')
 
-    session = boto3.Session(profile_name=profile, region_name=region)
-    sts = session.client('sts')
+    session = get_session(profile, region)
+    sts = get_client('sts', session=session)
     identity = sts.get_caller_identity()
     user_arn = identity['Arn']
     username = user_arn.split('/')[-1]
@@ -427,8 +747,23 @@ def cmd_history(args):
     print(f"User: {user_arn}")
     print(f"Looking back: {args.days} days\n")
 
-    # Get events using SDK
-    events, source = get_user_history(session, username, days=args.days, limit=args.limit)
+    if args.mode == 'hybrid' and not args.no_cache:
+        # Answer from the local index after fetching only what it is missing
+        from cca.aws.history import HistoryStore, HISTORY_DB
+
+        with HistoryStore() as store:
+            try:
+                fetched = store.sync(session, username, days=args.days)
+                print(f"[OK] Synced {fetched} events\n")
+            except Exception as e:
+                print(f"[WARN] Could not sync history ({e}), showing stored events\n")
+            events = store.query(session, username, days=args.days, limit=args.limit,
+                                 event_name=args.event, errors_only=args.errors)
+        source = f"Local index ({HISTORY_DB})"
+    else:
+        events, source = get_user_history(session, username, days=args.days, limit=args.limit, mode=args.mode)
+        events = [event for event in events
+                  if (not args.event or event['event_name'] == args.event) and (not args.errors or event['error_code'])]
 
     # Display events
     if events:
@@ -447,6 +782,9 @@ def cmd_history(args):
 
 def cmd_resources(args):
     """Display all AWS resources created by the user"""
+    from cca import load_config, list_user_resources, format_resources
+    from cca.clients import get_session, get_client
+
     print("=== CCC CLI Resources ===\n")
 
     config = load_config()
@@ -455,10 +793,10 @@ def cmd_resources(args):
 
     try:
         # Create session
-        session = boto3.Session(profile_name=profile, region_name=region)
+        session = get_session(profile, region)
 
         # Get user identity for filtering
-        sts = session.client('sts')
+        sts = get_client('sts', session=session)
         identity = sts.get_caller_identity()
         username = config.get('tokens', {}).get('username', 'Unknown')
 
@@ -486,6 +824,9 @@ def cmd_resources(args):
 
 def cmd_permissions(args):
     """Display user's AWS permissions"""
+    from cca import load_config, get_user_permissions, test_permissions, format_permissions
+    from cca.clients import get_session
+
     print("=== CCC CLI Permissions ===\n")
 
     config = load_config()
@@ -494,7 +835,7 @@ def cmd_permissions(args):
 
     try:
         # Create session
-        session = boto3.Session(profile_name=profile, region_name=region)
+        session = get_session(profile, region)
 
         # Get permissions using SDK
         result = get_user_permissions(session, verbose=args.verbose)
@@ -517,26 +858,108 @@ def cmd_permissions(args):
         print("[INFO] If this persists, please report this issue")
 
 
+def setup_tracing(args):
+    """
+    Enable trace export if requested by --trace, the environment or the config
+
+    Returns:
+        The process-wide tracer (a no-op tracer when tracing is off)
+    """
+    import os
+    from cca.config import get_config_value
+    from cca.tracing import configure, get_tracer
+
+    path = args.trace or os.environ.get('CCC_TRACE_FILE') or get_config_value('trace_file')
+    endpoint = os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT') or get_config_value('otlp_endpoint')
+    if not path and not endpoint:
+        return get_tracer()
+    return configure(path=os.path.expanduser(path) if path else None, endpoint=endpoint)
+
+
+def report_timings(args, spans, elapsed):
+    """Print and/or dump the AWS call spans recorded for a command (to stderr)"""
+    import json
+    from cca.instrumentation import summarize, SETUP_OPERATIONS
+
+    summary = summarize(spans)
+    total_ms = elapsed * 1000
+    aws_ms = sum(row['total_ms'] for row in summary if row['operation'] not in SETUP_OPERATIONS)
+    setup_ms = sum(row['total_ms'] for row in summary if row['operation'] in SETUP_OPERATIONS)
+
+    if args.timings:
+        out = sys.stderr
+        print(f"\n=== Timings: ccc {args.command} ({total_ms:.1f} ms) ===\n", file=out)
+        print(f"{'Service':<26} {'Operation':<28} {'Calls':>5} {'Retries':>7} {'Total ms':>9} {'p50 ms':>8} {'Max ms':>8} {'Bytes in':>9}", file=out)
+        print("-" * 107, file=out)
+        for row in summary:
+            print(f"{row['service']:<26} {row['operation']:<28} {row['calls']:>5} {row['retries']:>7} "
+                  f"{row['total_ms']:>9.1f} {row['p50_ms']:>8.1f} {row['max_ms']:>8.1f} {row['bytes_received']:>9}", file=out)
+        print("-" * 107, file=out)
+        print(f"AWS calls: {aws_ms:.1f} ms   Client setup: {setup_ms:.1f} ms   "
+              f"Other: {max(0.0, total_ms - aws_ms - setup_ms):.1f} ms", file=out)
+
+    if args.timings_json:
+        report = {
+            'command': args.command,
+            'total_ms': total_ms,
+            'aws_ms': aws_ms,
+            'setup_ms': setup_ms,
+            'summary': summary,
+            'spans': spans
+        }
+        if args.timings_json == '-':
+            print(json.dumps(report, indent=2), file=sys.stderr)
+        else:
+            with open(args.timings_json, 'w') as f:
+                json.dump(report, f, indent=2)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='CCC CLI - Cloud CLI Access Tool (v0.2 - Cognito)',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
+    parser.add_argument('--timings', action='store_true', help='Print a breakdown of AWS call timings to stderr')
+    parser.add_argument('--timings-json', metavar='FILE', help="Write AWS call timing spans as JSON to FILE ('-' for stderr)")
+    parser.add_argument('--trace', metavar='FILE', help='Append an OTLP/JSON trace of the command to FILE')
+    parser.add_argument('--log-json', action='store_true', help='Print SDK progress messages as JSON lines')
+
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
     # Configure command
     parser_configure = subparsers.add_parser('configure', help='Configure CCC CLI settings')
+    parser_configure.add_argument('--profile', help='Configure a named profile instead of the top-level settings')
     parser_configure.set_defaults(func=cmd_configure)
 
     # Login command
     parser_login = subparsers.add_parser('login', help='Login and obtain AWS credentials')
+    parser_login.add_argument('--profile', help='Login to a named profile')
+    parser_login.add_argument('--all', action='store_true', help='Login to every named profile concurrently')
+    parser_login.add_argument('--concurrency', type=int, default=None, help='Maximum concurrent logins for --all (default: 4)')
     parser_login.set_defaults(func=cmd_login)
 
     # Refresh command
     parser_refresh = subparsers.add_parser('refresh', help='Refresh AWS credentials')
+    parser_refresh.add_argument('--force', action='store_true', help='Refresh even if the current tokens are still valid')
+    parser_refresh.add_argument('--profile', help='Refresh a named profile')
     parser_refresh.set_defaults(func=cmd_refresh)
 
+    # Credential process command
+    parser_credproc = subparsers.add_parser('credential-process', help='Print credentials for the AWS CLI credential_process setting')
+    parser_credproc.add_argument('--profile', help='Use a named profile')
+    parser_credproc.add_argument('--refresh-window', type=int, default=None, help='Refresh when credentials expire within this many seconds (default: 300, plus jitter)')
+    parser_credproc.set_defaults(func=cmd_credential_process)
+
+    # Daemon command
+    parser_daemon = subparsers.add_parser('daemon', help='Run a credential broker on a Unix socket')
+    parser_daemon.add_argument('--status', action='store_true', help='Show status and request latency of a running daemon')
+    parser_daemon.add_argument('--stop', action='store_true', help='Stop a running daemon')
+    parser_daemon.add_argument('--profile', help='Serve a named profile')
+    parser_daemon.add_argument('--socket', default=None, help='Socket path (default: ~/.ccc/daemon.sock, or ~/.ccc/daemon-NAME.sock with --profile)')
+    parser_daemon.add_argument('--refresh-window', type=int, default=None, help='Refresh when credentials expire within this many seconds (default: 300, plus jitter)')
+    parser_daemon.set_defaults(func=cmd_daemon)
+
     # Logout command
     parser_logout = subparsers.add_parser('logout', help='Logout and clear credentials')
     parser_logout.set_defaults(func=cmd_logout)
@@ -555,6 +978,7 @@ def main():
 
     # Whoami command
     parser_whoami = subparsers.add_parser('whoami', help='Display current user information')
+    parser_whoami.add_argument('--offline', action='store_true', help='Only decode the stored tokens locally (no AWS calls)')
     parser_whoami.set_defaults(func=cmd_whoami)
 
     # Version command
@@ -566,6 +990,13 @@ def main():
     parser_history.add_argument('--days', type=int, default=7, help='Number of days to look back (default: 7)')
     parser_history.add_argument('--limit', type=int, default=50, help='Maximum number of events to show (default: 50)')
     parser_history.add_argument('--verbose', action='store_true', help='Show detailed event information')
+    parser_history.add_argument('--mode', choices=['hybrid', 'combined'], default='hybrid',
+                                help="hybrid: CloudTrail, falling back to CloudWatch Logs (default); "
+                                     "combined: query both at once and merge by event ID")
+    parser_history.add_argument('--event', help='Only show events with this name (e.g. PutObject)')
+    parser_history.add_argument('--errors', action='store_true', help='Only show failed calls')
+    parser_history.add_argument('--no-cache', action='store_true',
+                                help='Query AWS directly instead of the local index (~/.ccc/history.db)')
     parser_history.set_defaults(func=cmd_history)
 
     # Resources command
@@ -588,8 +1019,29 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    # Execute command
-    args.func(args)
+    # The SDK logs instead of printing; show its messages as before
+    from cca.log import enable_console_logging
+    enable_console_logging(json_format=args.log_json)
+
+    tracer = setup_tracing(args)
+    # The daemon runs indefinitely, so each of its refreshes is exported as its own trace
+    root = tracer.span(f"ccc {args.command}") if args.command != 'daemon' else contextlib.nullcontext()
+
+    if not (args.timings or args.timings_json):
+        # Execute command
+        with root:
+            args.func(args)
+        return
+
+    import time
+    from cca import instrumentation
+    instrumentation.enable()
+    start = time.perf_counter()
+    try:
+        with root:
+            args.func(args)
+    finally:
+        report_timings(args, instrumentation.get_spans(), time.perf_counter() - start)
 
 
 if __name__ == '__main__':
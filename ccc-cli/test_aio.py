@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio authenticator (cca.aio)
+"""
+
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+from cca.aio import AsyncCognitoAuthenticator
+
+
+class FakeAuthenticator:
+    """Records which public methods were called and the peak concurrency"""
+
+    def __init__(self, delay=0.05):
+        self.config = {}
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, name):
+        with self._lock:
+            self.calls.append(name)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+    def authenticate(self, username, password):
+        self._enter('authenticate')
+        if password != 'pw':
+            raise Exception("Invalid username or password")
+        return {'IdToken': f"id-{username}"}
+
+    def get_aws_credentials(self, id_token):
+        self._enter('get_aws_credentials')
+        return {'AccessKeyId': id_token}
+
+    def refresh_credentials(self, refresh_token):
+        self._enter('refresh_credentials')
+        return {'IdToken': 'refreshed'}
+
+
+def test_wraps_public_methods():
+    auth = FakeAuthenticator(delay=0)
+
+    async def main():
+        async with AsyncCognitoAuthenticator(authenticator=auth, max_concurrency=2) as aio:
+            tokens, credentials = await aio.login('alice', 'pw')
+            await aio.refresh_credentials('refresh')
+            return credentials
+
+    assert asyncio.run(main()) == {'AccessKeyId': 'id-alice'}
+    assert auth.calls == ['authenticate', 'get_aws_credentials', 'refresh_credentials']
+
+
+def test_concurrency_is_bounded():
+    auth = FakeAuthenticator()
+    aio = AsyncCognitoAuthenticator(authenticator=auth, max_concurrency=3)
+
+    batch = asyncio.run(aio.authenticate_many([(f"user-{i}", 'pw' if i % 4 else 'bad') for i in range(12)]))
+    aio.close()
+
+    assert auth.peak <= 3
+    assert (batch['succeeded'], batch['failed']) == (9, 3)
+    assert [r['username'] for r in batch['results']] == [f"user-{i}" for i in range(12)]
+
+
+def test_usable_from_several_event_loops():
+    auth = FakeAuthenticator(delay=0)
+    aio = AsyncCognitoAuthenticator(authenticator=auth, max_concurrency=2)
+
+    # Each asyncio.run() creates a new loop; a semaphore bound to the first would fail here
+    for _ in range(3):
+        assert asyncio.run(aio.login('alice', 'pw'))[0] == {'IdToken': 'id-alice'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(aio.login('bob', 'pw'))))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aio.close()
+
+    assert len(results) == 4
+
+
+def test_timeout():
+    aio = AsyncCognitoAuthenticator(authenticator=FakeAuthenticator(delay=0.5), max_concurrency=1, timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(aio.authenticate('alice', 'pw'))
+    aio.close()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
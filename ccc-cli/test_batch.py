@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for batch authentication (cca.auth.cognito.CognitoAuthenticator.authenticate_many)
+
+The Cognito round trips (_authenticate, _refresh, _get_aws_credentials) are
+stubbed, so only the batching, ordering and error handling are exercised.
+"""
+
+import sys
+import time
+import threading
+
+import pytest
+
+from cca.auth.cognito import CognitoAuthenticator
+from cca.auth.throttle import TokenBucket
+
+
+class StubbedAuthenticator(CognitoAuthenticator):
+    """Records the limiter handed to every Cognito round trip"""
+
+    def __init__(self, config=None):
+        super().__init__(config or {'region': 'us-east-1'})
+        self.limiters = []
+        self.calls = []
+        self._calls_lock = threading.Lock()
+
+    def _record(self, call, limiter):
+        with self._calls_lock:
+            self.calls.append(call)
+            self.limiters.append(limiter)
+
+    def _authenticate(self, username, password, limiter=None):
+        self._record(('authenticate', username), limiter)
+        # Earlier users finish last, so completion order differs from input order
+        time.sleep(0.01 * (5 - int(username[-1])))
+        if password == 'wrong':
+            raise Exception("Invalid username or password")
+        return {'IdToken': f'id-{username}', 'AccessToken': 'access', 'RefreshToken': 'refresh'}
+
+    def _refresh(self, refresh_token, limiter=None):
+        self._record(('refresh', refresh_token), limiter)
+        return {'IdToken': f'id-{refresh_token}', 'AccessToken': 'access'}
+
+    def _get_aws_credentials(self, id_token, limiter=None):
+        self._record(('credentials', id_token), limiter)
+        if id_token == 'id-user3':
+            raise Exception("Failed to get AWS credentials: identity pool unavailable")
+        return 'us-east-1:identity', {'AccessKeyId': f'ASIA-{id_token}', 'SecretAccessKey': 'secret',
+                                      'SessionToken': 'token', 'Expiration': '2099-01-01T00:00:00+00:00'}
+
+
+USERS = [('user1', 'pw'), ('user2', 'wrong'), ('user3', 'pw'), ('user4', 'pw')]
+
+
+def test_results_keep_input_order():
+    batch = StubbedAuthenticator().authenticate_many(USERS, max_workers=4)
+
+    assert [r['username'] for r in batch['results']] == ['user1', 'user2', 'user3', 'user4']
+    assert batch['results'][0]['credentials']['AccessKeyId'] == 'ASIA-id-user1'
+
+
+def test_failures_are_isolated():
+    auth = StubbedAuthenticator()
+
+    batch = auth.authenticate_many(USERS, max_workers=4)
+
+    errors = [r['error'] for r in batch['results']]
+    assert errors == [None, 'Invalid username or password',
+                      'Failed to get AWS credentials: identity pool unavailable', None]
+    assert (batch['succeeded'], batch['failed']) == (2, 2)
+    # A failed login never reaches the credential exchange
+    assert ('credentials', 'id-user2') not in auth.calls
+    assert batch['results'][3]['credentials']['AccessKeyId'] == 'ASIA-id-user4'
+
+
+def test_refresh_tokens_and_missing_secrets():
+    auth = StubbedAuthenticator()
+
+    batch = auth.authenticate_many([{'username': 'user1', 'refresh_token': 'rt1'}, {'username': 'user2'}])
+
+    first, second = batch['results']
+    assert first['error'] is None and first['credentials']['AccessKeyId'] == 'ASIA-id-rt1'
+    assert second['error'] == "A password or refresh token is required"
+    assert ('refresh', 'rt1') in auth.calls
+
+
+def test_every_call_shares_one_rate_limiter():
+    auth = StubbedAuthenticator()
+
+    auth.authenticate_many(USERS, max_workers=4, rate_limit=7)
+
+    limiter = auth.limiters[0]
+    assert isinstance(limiter, TokenBucket) and limiter.rate == 7
+    assert len(auth.limiters) == 7
+    assert all(l is limiter for l in auth.limiters)
+
+
+def test_rate_limit_defaults_to_config():
+    auth = StubbedAuthenticator({'region': 'us-east-1', 'auth_rate_limit': 3})
+
+    auth.authenticate_many(USERS[:1])
+
+    assert auth.limiters[0].rate == 3
+
+
+def test_empty_batch():
+    batch = StubbedAuthenticator().authenticate_many([])
+
+    assert (batch['results'], batch['succeeded'], batch['failed']) == ([], 0, 0)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared credentials cache (cca.auth.cache)
+"""
+
+import sys
+import json
+import threading
+
+import pytest
+
+from cca.auth import cache
+from cca.auth.cache import (
+    load_cached_credentials, save_cached_credentials, save_cached_credentials_batch, remove_cached_credentials
+)
+
+
+def make_credentials(key):
+    return {
+        'AccessKeyId': key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token',
+        'Expiration': '2099-01-01T00:00:00+00:00'
+    }
+
+
+@pytest.fixture
+def cache_file(monkeypatch, tmp_path):
+    path = tmp_path / 'credentials-cache.json'
+    monkeypatch.setattr(cache, 'CACHE_FILE', path)
+    return path
+
+
+def test_save_and_load(cache_file):
+    save_cached_credentials(make_credentials('ASIA1'), profile='a')
+    save_cached_credentials_batch({'b': make_credentials('ASIA2'), 'c': make_credentials('ASIA3')})
+
+    assert load_cached_credentials('a')['AccessKeyId'] == 'ASIA1'
+    assert sorted(json.loads(cache_file.read_text())) == ['a', 'b', 'c']
+    assert oct(cache_file.stat().st_mode & 0o777) == oct(0o600)
+
+
+def test_remove(cache_file):
+    save_cached_credentials_batch({'a': make_credentials('ASIA1'), 'b': make_credentials('ASIA2')})
+
+    remove_cached_credentials('a')
+    remove_cached_credentials('missing')
+
+    assert load_cached_credentials('a') is None
+    assert load_cached_credentials('b')['AccessKeyId'] == 'ASIA2'
+
+
+def test_concurrent_profiles_keep_each_other(cache_file):
+    save_cached_credentials(make_credentials('ASIAOLD'), profile='doomed')
+
+    def writer(name):
+        for round_ in range(20):
+            save_cached_credentials(make_credentials(f"ASIA{round_}"), profile=name)
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ('first', 'second')]
+    threads.append(threading.Thread(target=remove_cached_credentials, args=('doomed',)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = json.loads(cache_file.read_text())
+    assert sorted(stored) == ['first', 'second']
+    assert stored['first']['AccessKeyId'] == stored['second']['AccessKeyId'] == 'ASIA19'
+
+
+def test_need_refresh():
+    assert cache.credentials_need_refresh(None)
+    assert cache.credentials_need_refresh({'Expiration': 'garbage'})
+    assert not cache.credentials_need_refresh(make_credentials('ASIA1'))
+    assert cache.credentials_need_refresh({'Expiration': '2000-01-01T00:00:00'})
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared session and client pool (cca.clients)
+"""
+
+import sys
+
+import boto3
+import pytest
+from botocore import UNSIGNED
+
+from cca import clients
+
+
+class CountingSession(boto3.Session):
+    """boto3 Session that counts credential lookups"""
+
+    def __init__(self, **kwargs):
+        super().__init__(region_name='us-east-1', **kwargs)
+        self.lookups = 0
+
+    def get_credentials(self):
+        self.lookups += 1
+        return super().get_credentials()
+
+    def rotate(self, access_key):
+        self._session.set_credentials(access_key, 'secret', 'token')
+
+
+@pytest.fixture(autouse=True)
+def empty_pool(monkeypatch):
+    monkeypatch.setenv('AWS_CONFIG_FILE', '/dev/null')
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', '/dev/null')
+    clients.invalidate()
+    yield
+    clients.invalidate()
+
+
+@pytest.fixture
+def session():
+    return CountingSession(aws_access_key_id='ASIAFIRST', aws_secret_access_key='secret', aws_session_token='token')
+
+
+def test_clients_are_reused(session):
+    client = clients.get_client('sts', session=session)
+
+    assert clients.get_client('sts', session=session) is client
+    assert clients.get_client('sts', session=session, region='eu-west-1') is not client
+
+
+def test_rotated_credentials_build_a_new_client(session):
+    old = clients.get_client('sts', session=session)
+
+    session.rotate('ASIASECOND')
+    new = clients.get_client('sts', session=session)
+
+    assert new is not old
+    assert new._request_signer._credentials.access_key == 'ASIASECOND'
+    assert clients.get_client('sts', session=session) is new
+
+
+def test_signed_and_unsigned_clients_are_separate(session):
+    signed = clients.get_client('cognito-identity', session=session)
+    unsigned = clients.get_client('cognito-identity', session=session, signed=False)
+
+    assert signed is not unsigned
+    assert unsigned.meta.config.signature_version is UNSIGNED
+    assert signed.meta.config.signature_version is not UNSIGNED
+    assert clients.get_client('cognito-identity', session=session, signed=False) is unsigned
+    assert clients.get_client('cognito-identity', session=session) is signed
+
+
+def test_unsigned_lookup_does_not_resolve_credentials(session):
+    client = clients.get_client('cognito-idp', session=session, signed=False)
+    lookups = session.lookups
+
+    session.rotate('ASIASECOND')
+
+    assert clients.get_client('cognito-idp', session=session, signed=False) is client
+    assert session.lookups == lookups
+
+
+def test_cognito_clients_do_not_retry(session):
+    client = clients.get_client('cognito-idp', session=session, signed=False)
+
+    assert client.meta.config.retries['total_max_attempts'] == 1
+    assert client.meta.config.max_pool_connections == clients.MAX_POOL_CONNECTIONS
+
+
+def test_sessions_are_shared_per_region():
+    assert clients.get_session(region='us-east-1') is clients.get_session(region='us-east-1')
+    assert clients.get_session(region='us-east-1') is not clients.get_session(region='eu-west-1')
+
+
+def test_invalidate_drops_clients(session):
+    client = clients.get_client('sts', session=session)
+
+    clients.invalidate()
+
+    assert clients.get_client('sts', session=session) is not client
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Tests for the CloudTrail / CloudWatch Logs history readers (cca.aws.cloudtrail)
+
+AWS is replaced by in-memory fakes that serve a fixed set of events with the
+services' paging rules and count the calls made.
+"""
+
+import sys
+import json
+import time
+import threading
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from cca.auth.throttle import TokenBucket
+from cca.aws import cloudtrail
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeCloudTrail:
+    """LookupEvents over a fixed event list: inclusive time range, newest first, NextToken = offset"""
+
+    def __init__(self, times, delay=0.0, fail_after=None):
+        self.events = [{'EventTime': t, 'EventName': 'GetObject', 'EventId': f"ct-{i}"} for i, t in enumerate(times)]
+        self.delay = delay
+        self.fail_after = fail_after
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.meta = type('Meta', (), {'region_name': 'test-region'})()
+
+    def lookup_events(self, LookupAttributes, StartTime, EndTime, MaxResults, NextToken=None):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.fail_after is not None and calls > self.fail_after:
+            raise Exception("LookupEvents failed")
+        matching = sorted((e for e in self.events if StartTime <= e['EventTime'] <= EndTime),
+                          key=lambda e: e['EventTime'], reverse=True)
+        offset = int(NextToken or 0)
+        response = {'Events': matching[offset:offset + MaxResults]}
+        if offset + MaxResults < len(matching):
+            response['NextToken'] = str(offset + MaxResults)
+        return response
+
+
+class FakeLogs:
+    """FilterLogEvents over a fixed list of CloudTrail records: oldest first, nextToken = offset"""
+
+    def __init__(self, records):
+        self.records = sorted(records, key=lambda r: r['time'])
+        self.calls = 0
+
+    def filter_log_events(self, logGroupName, startTime, endTime, filterPattern, limit, nextToken=None):
+        self.calls += 1
+        matching = [r for r in self.records if startTime <= r['time'].timestamp() * 1000 <= endTime]
+        offset = int(nextToken or 0)
+        response = {'events': [{
+            'timestamp': int(r['time'].timestamp() * 1000),
+            'message': json.dumps({'eventID': r['id'], 'eventName': 'GetObject', 'errorCode': r.get('error'),
+                                   'resources': [{'ARN': 'arn:aws:s3:::bucket'}]})
+        } for r in matching[offset:offset + limit]]}
+        if offset + limit < len(matching):
+            response['nextToken'] = str(offset + limit)
+        return response
+
+
+class FakeInsights:
+    """Logs Insights over a fixed list of (event_id, time): newest first, limited, whole-second bounds"""
+
+    def __init__(self, rows, statuses=('Complete',)):
+        self.rows = rows
+        self.statuses = list(statuses)
+        self.queries = []
+        self.polls = 0
+        self.stopped = []
+
+    def start_query(self, logGroupName, startTime, endTime, queryString, limit):
+        self.queries.append({'start': startTime, 'end': endTime, 'query': queryString, 'limit': limit})
+        return {'queryId': str(len(self.queries))}
+
+    def get_query_results(self, queryId):
+        self.polls += 1
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        if status != 'Complete':
+            return {'status': status}
+        query = self.queries[int(queryId) - 1]
+        matching = sorted((r for r in self.rows if query['start'] <= int(r[1].timestamp()) <= query['end']),
+                          key=lambda r: r[1], reverse=True)[:query['limit']]
+        return {'status': 'Complete', 'results': [[
+            {'field': '@timestamp', 'value': t.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]},
+            {'field': 'eventName', 'value': 'GetObject'},
+            {'field': 'eventID', 'value': event_id}
+        ] for event_id, t in matching]}
+
+    def stop_query(self, queryId):
+        self.stopped.append(queryId)
+
+
+@pytest.fixture
+def fake_aws(monkeypatch):
+    """Route get_client() to the given fakes and lift the LookupEvents rate limit"""
+    clients = {}
+    monkeypatch.setattr(cloudtrail, 'get_client', lambda service, session=None, **kwargs: clients[service])
+    monkeypatch.setattr(cloudtrail, '_lookup_bucket', lambda region: TokenBucket(100000, capacity=100000))
+    return clients
+
+
+def spread(days, count):
+    """count event times spread evenly over days from START, including every day boundary"""
+    step = timedelta(days=days) / (count - 1)
+    return [START + step * i for i in range(count)]
+
+
+def test_sharded_merge_matches_sequential(fake_aws):
+    times = spread(4, 161)
+    fake_aws['cloudtrail'] = FakeCloudTrail(times)
+    end = START + timedelta(days=4)
+
+    sequential = list(cloudtrail.iter_cloudtrail_events(None, 'alice', START, end, page_size=7))
+    sharded = list(cloudtrail.iter_sharded_cloudtrail_events(None, 'alice', START, end, shards=4, page_size=7))
+
+    assert [e['event_id'] for e in sharded] == [e['event_id'] for e in sequential]
+    assert len(sharded) == len(times)
+    assert all(a['time'] >= b['time'] for a, b in zip(sharded, sharded[1:]))
+
+
+def test_events_on_shard_boundaries_appear_once(fake_aws):
+    # One event exactly on each of the shard bounds
+    times = [START + timedelta(days=d) for d in range(5)]
+    fake_aws['cloudtrail'] = FakeCloudTrail(times)
+
+    events = list(cloudtrail.iter_sharded_cloudtrail_events(None, 'alice', START, START + timedelta(days=4),
+                                                            shards=4))
+
+    assert [e['time'] for e in events] == sorted(times, reverse=True)
+
+
+def test_early_close_stops_the_shards(fake_aws):
+    fake = fake_aws['cloudtrail'] = FakeCloudTrail(spread(8, 801), delay=0.01)
+
+    stream = cloudtrail.iter_sharded_cloudtrail_events(None, 'alice', START, START + timedelta(days=8),
+                                                       shards=4, page_size=5)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+    time.sleep(0.3)
+    calls = fake.calls
+    time.sleep(0.3)
+
+    assert len(first) == 3
+    # Each shard fetches at most a page or two ahead, then stops
+    assert fake.calls == calls
+    assert calls < 801 / 5
+    assert not [t for t in threading.enumerate() if t.name.startswith('cca-cloudtrail')]
+
+
+def test_shard_errors_reach_the_consumer(fake_aws):
+    fake_aws['cloudtrail'] = FakeCloudTrail(spread(4, 400), fail_after=6)
+
+    with pytest.raises(Exception, match='LookupEvents failed'):
+        list(cloudtrail.iter_sharded_cloudtrail_events(None, 'alice', START, START + timedelta(days=4),
+                                                       shards=4, page_size=10))
+
+
+def test_combined_history_keeps_the_newest_events(fake_aws):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    records = [{'id': f"e{i}", 'time': now - timedelta(hours=i + 1)} for i in range(50)]
+    # CloudTrail has every other event; CloudWatch Logs has them all, oldest first
+    trail = FakeCloudTrail([r['time'] for r in records[::2]])
+    for event, record in zip(trail.events, records[::2]):
+        event['EventId'] = record['id']
+    fake_aws['cloudtrail'] = trail
+    fake_aws['logs'] = FakeLogs(records)
+
+    events, source = cloudtrail.get_combined_history(None, 'alice', days=3, limit=10)
+
+    assert [e['event_id'] for e in events] == [f"e{i}" for i in range(10)]
+    assert [e['sources'] for e in events[:2]] == [['CloudTrail', 'CloudWatch Logs'], ['CloudWatch Logs']]
+    # The CloudWatch record (with resources) wins over the bare CloudTrail one
+    assert events[0]['source'] == 'CloudWatch Logs'
+    assert source == 'CloudTrail + CloudWatch Logs'
+
+
+def test_combined_history_survives_a_failing_backend(fake_aws):
+    now = datetime.now(timezone.utc)
+    fake_aws['cloudtrail'] = FakeCloudTrail([now - timedelta(minutes=i) for i in range(1, 6)], fail_after=0)
+    fake_aws['logs'] = FakeLogs([{'id': f"e{i}", 'time': now - timedelta(minutes=i)} for i in range(1, 6)])
+
+    events, source = cloudtrail.get_combined_history(None, 'alice', days=1, limit=3)
+
+    assert [e['event_id'] for e in events] == ['e1', 'e2', 'e3']
+    assert source == 'CloudWatch Logs'
+
+
+def test_hybrid_filter_fallback_keeps_the_newest_events(fake_aws):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    records = [{'id': f"e{i}", 'time': now - timedelta(hours=i + 1)} for i in range(30)]
+    fake_aws['cloudtrail'] = FakeCloudTrail([])
+    fake_aws['logs'] = FakeLogs(records)
+
+    events, source = cloudtrail.get_user_history(None, 'alice', days=3, limit=5)
+
+    assert [e['event_id'] for e in events] == ['e0', 'e1', 'e2', 'e3', 'e4']
+    assert source == 'CloudWatch Logs'
+
+
+def test_hybrid_cloudtrail_stops_at_limit(fake_aws):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    trail = fake_aws['cloudtrail'] = FakeCloudTrail([now - timedelta(minutes=i) for i in range(1, 201)])
+
+    events, source = cloudtrail.get_user_history(None, 'alice', days=1, limit=5)
+
+    assert [e['event_id'] for e in events] == ['ct-0', 'ct-1', 'ct-2', 'ct-3', 'ct-4']
+    assert source == 'CloudTrail'
+    assert trail.calls == 1
+
+
+def test_insights_without_limit_pages_past_the_cap(fake_aws, monkeypatch):
+    monkeypatch.setattr(cloudtrail, 'INSIGHTS_MAX_RESULTS', 10)
+    # 25 events, three per second, so every query ends inside a second
+    records = [(f"e{i}", START + timedelta(seconds=100 - i // 3, milliseconds=900 - i % 3 * 100)) for i in range(25)]
+    fake = fake_aws['logs'] = FakeInsights(records)
+
+    events = list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(seconds=200), backend='insights'))
+
+    assert [e['event_id'] for e in events] == [f"e{i}" for i in range(25)]
+    assert len(fake.queries) == 3
+
+
+def test_insights_with_limit_runs_one_query(fake_aws, monkeypatch):
+    monkeypatch.setattr(cloudtrail, 'INSIGHTS_MAX_RESULTS', 10)
+    records = [(f"e{i}", START + timedelta(seconds=100 - i)) for i in range(25)]
+    fake = fake_aws['logs'] = FakeInsights(records)
+
+    events = list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(seconds=200),
+                                             limit=5, backend='insights'))
+
+    assert [e['event_id'] for e in events] == ['e0', 'e1', 'e2', 'e3', 'e4']
+    assert len(fake.queries) == 1
+
+
+def test_insights_paging_fails_when_one_second_overflows(fake_aws, monkeypatch):
+    monkeypatch.setattr(cloudtrail, 'INSIGHTS_MAX_RESULTS', 10)
+    fake_aws['logs'] = FakeInsights([(f"e{i}", START + timedelta(seconds=100, milliseconds=i)) for i in range(15)])
+
+    with pytest.raises(Exception, match='within one second'):
+        list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(seconds=200), backend='insights'))
+
+
+def test_insights_query(fake_aws):
+    fake = fake_aws['logs'] = FakeInsights([('e1', START + timedelta(seconds=5))])
+
+    events = list(cloudtrail.iter_insights_events(None, 'o"brien\\x', START, START + timedelta(minutes=1), limit=20))
+
+    [query] = fake.queries
+    assert 'filter userIdentity.arn like "o\\"brien\\\\x"' in query['query']
+    assert '| sort @timestamp desc' in query['query'] and query['query'].endswith('| limit 20')
+    assert (query['start'], query['end'], query['limit']) == (int(START.timestamp()), int(START.timestamp()) + 60, 20)
+    assert events[0]['time'] == START + timedelta(seconds=5)
+    assert events[0]['source'] == 'CloudWatch Logs Insights'
+
+
+def test_insights_polls_with_growing_delay(fake_aws, monkeypatch):
+    delays = []
+    monkeypatch.setattr(cloudtrail.time, 'sleep', delays.append)
+    fake = fake_aws['logs'] = FakeInsights([], statuses=['Scheduled'] + ['Running'] * 10 + ['Complete'])
+
+    assert list(cloudtrail.iter_insights_events(None, 'alice', START, START + timedelta(days=1))) == []
+
+    assert fake.polls == 12
+    assert delays[0] == pytest.approx(0.1)
+    assert all(b >= a for a, b in zip(delays, delays[1:]))
+    assert max(delays) == 2.0
+
+
+def test_insights_timeout_stops_the_query(fake_aws, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cloudtrail.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(cloudtrail.time, 'sleep', lambda s: now.__setitem__(0, now[0] + s))
+    fake = fake_aws['logs'] = FakeInsights([], statuses=['Running'])
+
+    with pytest.raises(Exception, match='did not finish within 5s'):
+        list(cloudtrail.iter_insights_events(None, 'alice', START, START + timedelta(days=1), timeout=5))
+
+    assert fake.stopped == ['1']
+    assert now[0] <= 5
+
+
+def test_insights_failure_is_raised(fake_aws):
+    fake_aws['logs'] = FakeInsights([], statuses=['Failed'])
+
+    with pytest.raises(Exception, match='query failed'):
+        list(cloudtrail.iter_insights_events(None, 'alice', START, START + timedelta(days=1)))
+
+
+def test_use_insights():
+    assert not cloudtrail.use_insights(START, START + timedelta(days=7))
+    assert cloudtrail.use_insights(START, START + timedelta(days=cloudtrail.INSIGHTS_MIN_DAYS))
+    assert cloudtrail.use_insights(START, START + timedelta(days=1), limit=cloudtrail.INSIGHTS_MIN_EVENTS)
+
+
+class FakeLogsWithInsights(FakeLogs, FakeInsights):
+    """CloudWatch Logs client with both FilterLogEvents and (optionally unavailable) Insights"""
+
+    def __init__(self, records, insights_error=None):
+        FakeLogs.__init__(self, records)
+        FakeInsights.__init__(self, [(r['id'], r['time']) for r in records])
+        self.insights_error = insights_error
+
+    def start_query(self, **kwargs):
+        if self.insights_error:
+            raise Exception(self.insights_error)
+        return FakeInsights.start_query(self, **kwargs)
+
+
+def test_log_events_backend_selection(fake_aws):
+    records = [{'id': f"e{i}", 'time': START + timedelta(days=i)} for i in range(20)]
+    fake = fake_aws['logs'] = FakeLogsWithInsights(records)
+
+    short = list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(days=3)))
+    assert [e['source'] for e in short] == ['CloudWatch Logs'] * 4
+    assert fake.queries == []
+
+    long = list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(days=30)))
+    assert [e['event_id'] for e in long] == [f"e{i}" for i in reversed(range(20))]
+    assert {e['source'] for e in long} == {'CloudWatch Logs Insights'}
+    assert len(fake.queries) == 1
+
+
+def test_log_events_fall_back_to_filter(fake_aws):
+    records = [{'id': f"e{i}", 'time': START + timedelta(days=i)} for i in range(20)]
+    fake = fake_aws['logs'] = FakeLogsWithInsights(records, insights_error='AccessDeniedException')
+
+    events = list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(days=30)))
+    assert len(events) == 20 and {e['source'] for e in events} == {'CloudWatch Logs'}
+
+    with pytest.raises(Exception, match='AccessDenied'):
+        list(cloudtrail.iter_log_events(None, 'alice', START, START + timedelta(days=30), backend='insights'))
+    assert fake.calls == 1
+
+
+def test_shard_count(monkeypatch):
+    monkeypatch.setattr(cloudtrail, '_lookup_latency', 1.5)
+
+    assert cloudtrail.shard_count(0.5) == 1
+    assert cloudtrail.shard_count(2) == 2
+    assert cloudtrail.shard_count(30) == 3
+    assert cloudtrail.shard_count(30, rate=100) == cloudtrail.MAX_SHARDS
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for connection warm-up (cca.auth.cognito.CognitoAuthenticator.warm_up)
+"""
+
+import sys
+import socket
+import logging
+
+import boto3
+import pytest
+from botocore import UNSIGNED
+from botocore.config import Config
+
+from cca.auth import cognito
+from cca.auth.cognito import CognitoAuthenticator
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(4)
+    server.settimeout(5)
+    yield server
+    server.close()
+
+
+def make_authenticator(port=None):
+    auth = CognitoAuthenticator({'user_pool_id': 'us-east-1_test', 'app_client_id': 'client', 'region': 'us-east-1'})
+    if port is not None:
+        auth.cognito_client = boto3.client('cognito-idp', region_name='us-east-1',
+                                           endpoint_url=f"http://127.0.0.1:{port}",
+                                           config=Config(signature_version=UNSIGNED))
+    return auth
+
+
+def test_warm_up_opens_a_pooled_connection(listener):
+    auth = make_authenticator(listener.getsockname()[1])
+
+    assert auth.warm_up() == 1
+    conn, _ = listener.accept()
+    conn.close()
+
+
+def test_unsupported_botocore_is_skipped(monkeypatch, caplog):
+    monkeypatch.setattr(cognito.botocore, '__version__', '2.0.0')
+    calls = []
+    monkeypatch.setattr(cognito, '_open_connection', calls.append)
+
+    with caplog.at_level(logging.DEBUG, logger=cognito.__name__):
+        assert make_authenticator().warm_up() == 0
+    assert calls == []
+    assert 'untested botocore 2.0.0' in caplog.text
+
+
+def test_failures_are_logged_at_debug(monkeypatch, caplog):
+    def fail(client):
+        raise AttributeError("'URLLib3Session' object has no attribute '_proxy_config'")
+    monkeypatch.setattr(cognito, '_open_connection', fail)
+
+    with caplog.at_level(logging.DEBUG, logger=cognito.__name__):
+        assert make_authenticator().warm_up() == 0
+    assert [r.levelno for r in caplog.records] == [logging.DEBUG]
+    assert '_proxy_config' in caplog.text
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached configuration (cca.config.Config)
+"""
+
+import os
+import sys
+import json
+import threading
+
+import pytest
+
+from cca.config import Config
+
+
+@pytest.fixture
+def paths(tmp_path):
+    default = tmp_path / 'default.json'
+    default.write_text(json.dumps({'region': 'us-east-1', 'profile': 'cca'}))
+    return tmp_path / 'config.json', default
+
+
+def test_user_config_overrides_defaults(paths):
+    path, default = paths
+    path.write_text(json.dumps({'region': 'eu-west-1'}))
+
+    config = Config(path, default)
+
+    assert config.as_dict() == {'region': 'eu-west-1', 'profile': 'cca'}
+
+
+def test_parsed_config_is_cached(paths, monkeypatch):
+    path, default = paths
+    path.write_text(json.dumps({'region': 'eu-west-1'}))
+    config = Config(path, default)
+    config.get('region')
+
+    reads = []
+    original = Config._read
+    monkeypatch.setattr(Config, '_read', staticmethod(lambda p: reads.append(p) or original(p)))
+    for _ in range(10):
+        config.get('region')
+
+    assert reads == []
+
+
+def test_external_write_is_picked_up(paths):
+    path, default = paths
+    path.write_text(json.dumps({'region': 'eu-west-1'}))
+    config = Config(path, default)
+    assert config.get('region') == 'eu-west-1'
+
+    # Another process replaces the file (new inode, possibly same size and mtime)
+    replacement = path.with_name('config.json.new')
+    replacement.write_text(json.dumps({'region': 'ap-south-1'}))
+    stat = os.stat(path)
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, path)
+
+    assert config.get('region') == 'ap-south-1'
+
+
+def test_in_place_edit_is_picked_up(paths):
+    path, default = paths
+    path.write_text(json.dumps({'region': 'eu-west-1'}))
+    config = Config(path, default)
+    config.get('region')
+
+    path.write_text(json.dumps({'region': 'eu-west-1', 'extra': True}))
+
+    assert config.get('extra') is True
+
+
+def test_returned_values_are_copies(paths):
+    path, default = paths
+    config = Config(path, default)
+    config.save({'tokens': {'username': 'alice'}})
+
+    config.get('tokens')['username'] = 'mallory'
+    config.as_dict()['tokens']['username'] = 'mallory'
+
+    assert config.get('tokens') == {'username': 'alice'}
+
+
+def test_saved_config_reads_back_merged(paths):
+    path, default = paths
+    config = Config(path, default)
+
+    config.save({'foo': 1})
+
+    expected = {'region': 'us-east-1', 'profile': 'cca', 'foo': 1}
+    assert config.as_dict() == expected
+    assert config.get('region') == 'us-east-1'
+    assert Config(path, default).as_dict() == expected
+
+
+def test_save_replaces_file_atomically(paths):
+    path, default = paths
+    path.write_text(json.dumps({'region': 'eu-west-1'}))
+    inode = os.stat(path).st_ino
+
+    Config(path, default).save({'region': 'us-west-2'})
+
+    assert json.loads(path.read_text()) == {'region': 'us-west-2'}
+    assert os.stat(path).st_ino != inode
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o600)
+    assert [p.name for p in path.parent.iterdir() if p.name.endswith('.tmp')] == []
+
+
+def test_set_many_writes_once(paths, monkeypatch):
+    path, default = paths
+    config = Config(path, default)
+    saves = []
+    original = config.save
+    monkeypatch.setattr(config, 'save', lambda data: saves.append(data) or original(data))
+
+    config.set_many({'a': 1, 'b': 2, 'c': 3})
+
+    assert len(saves) == 1
+    assert json.loads(path.read_text())['b'] == 2
+
+
+def test_concurrent_set_many_keeps_every_update(paths):
+    path, default = paths
+    # Separate instances behave like separate processes sharing the file
+    instances = [Config(path, default) for _ in range(8)]
+
+    def writer(index):
+        for round_ in range(10):
+            instances[index].set_many({f"key-{index}-{round_}": round_})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = json.loads(path.read_text())
+    assert all(f"key-{i}-{r}" in stored for i in range(8) for r in range(10))
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
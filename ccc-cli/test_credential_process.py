@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for 'ccc credential-process' and 'ccc refresh'
+
+The command runs in-process with the config, cache, lock directory and
+daemon socket redirected to a temporary directory, and Cognito replaced by
+a fake authenticator.
+"""
+
+import sys
+import json
+import time
+import base64
+import logging
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import ccc
+from cca import config as config_module
+from cca import daemon
+from cca.auth import cache, refresh, cognito
+from cca.auth import credentials as credentials_module
+
+
+def make_id_token(expires_in):
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return '.'.join([segment({'alg': 'RS256'}), segment({'exp': int(time.time() + expires_in)}), 'c2ln'])
+
+
+def make_credentials(key, expires_in):
+    return {
+        'AccessKeyId': key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token',
+        'Expiration': (datetime.now(timezone.utc) + timedelta(seconds=expires_in)).isoformat()
+    }
+
+
+class FakeAuthenticator:
+    """Stands in for CognitoAuthenticator; chatty on purpose, like the real one"""
+
+    instances = []
+
+    def __init__(self, config=None):
+        self.exchanges = 0
+        FakeAuthenticator.instances.append(self)
+
+    def get_aws_credentials(self, id_token):
+        self.exchanges += 1
+        print("[AUTH] Exchanging Cognito token for AWS credentials...")
+        logging.getLogger('cca.auth.cognito').info("[OK] AWS credentials obtained!")
+        logging.getLogger('cca.auth.cognito').warning("[WARN] something worth knowing")
+        return make_credentials('ASIAREFRESHED', 3600)
+
+    def refresh_credentials(self, refresh_token):
+        raise Exception("refresh token revoked")
+
+
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', tmp_path / 'config.json')
+    monkeypatch.setattr(config_module, '_config', config_module.Config(
+        tmp_path / 'config.json', tmp_path / 'default.json'))
+    monkeypatch.setattr(cache, 'CACHE_FILE', tmp_path / 'credentials-cache.json')
+    monkeypatch.setattr(refresh, 'LOCK_DIR', tmp_path / 'locks')
+    monkeypatch.setattr(daemon, 'SOCKET_PATH', tmp_path / 'no-daemon.sock')
+    monkeypatch.setattr(credentials_module, 'CREDENTIALS_FILE', tmp_path / '.aws' / 'credentials')
+    monkeypatch.setattr(cognito, 'CognitoAuthenticator', FakeAuthenticator)
+    FakeAuthenticator.instances = []
+    handlers = list(logging.getLogger('cca').handlers)
+    yield tmp_path
+    logging.getLogger('cca').handlers = handlers
+
+
+def run(monkeypatch, *argv, command='credential-process'):
+    monkeypatch.setattr(sys, 'argv', ['ccc', command, *argv])
+    ccc.main()
+
+
+def save_config(id_token_expires_in=3600):
+    config_module.save_config({
+        'profile': 'test',
+        'tokens': {'id_token': make_id_token(id_token_expires_in), 'refresh_token': 'refresh'}
+    })
+
+
+def test_cache_hit(home, monkeypatch, capsys):
+    save_config()
+    cache.save_cached_credentials(make_credentials('ASIACACHED', 3600), profile='test')
+
+    run(monkeypatch)
+
+    out, err = capsys.readouterr()
+    payload = json.loads(out)
+    assert payload['Version'] == 1 and payload['AccessKeyId'] == 'ASIACACHED'
+    assert FakeAuthenticator.instances == []
+
+
+def test_refresh_inside_window(home, monkeypatch, capsys):
+    save_config()
+    cache.save_cached_credentials(make_credentials('ASIAOLD', 60), profile='test')
+
+    run(monkeypatch, '--refresh-window', '300')
+
+    out, err = capsys.readouterr()
+    # stdout carries nothing but the payload; progress messages go to stderr
+    assert out.count('\n') == 1
+    assert json.loads(out)['AccessKeyId'] == 'ASIAREFRESHED'
+    assert '[AUTH]' in err and '[WARN] something worth knowing' in err
+    assert cache.load_cached_credentials('test')['AccessKeyId'] == 'ASIAREFRESHED'
+    assert [a.exchanges for a in FakeAuthenticator.instances] == [1]
+
+
+def test_refresh_outside_window_uses_cache(home, monkeypatch, capsys):
+    save_config()
+    cache.save_cached_credentials(make_credentials('ASIACACHED', 600), profile='test')
+
+    run(monkeypatch, '--refresh-window', '60')
+
+    assert json.loads(capsys.readouterr().out)['AccessKeyId'] == 'ASIACACHED'
+
+
+def test_failed_refresh_leaves_stdout_empty(home, monkeypatch, capsys):
+    save_config(id_token_expires_in=-10)
+
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch)
+
+    out, err = capsys.readouterr()
+    assert exit_info.value.code == 1
+    assert out == ''
+    assert '[ERROR] Refresh failed: refresh token revoked' in err
+
+
+def test_refresh_rewrites_stale_credentials_file(home, monkeypatch, capsys):
+    # credential-process refreshed the cache, the file still holds the old keys
+    save_config()
+    credentials_module.save_credentials(make_credentials('ASIAOLD', -60), profile='test')
+    cache.save_cached_credentials(make_credentials('ASIACACHED', 3600), profile='test')
+
+    run(monkeypatch, command='refresh')
+
+    assert '[OK] Credentials file updated' in capsys.readouterr().out
+    assert credentials_module.load_credentials('test')['AccessKeyId'] == 'ASIACACHED'
+    assert FakeAuthenticator.instances == []
+
+
+def test_refresh_with_file_in_sync_does_nothing(home, monkeypatch, capsys):
+    save_config()
+    credentials = make_credentials('ASIACACHED', 3600)
+    credentials_module.save_credentials(credentials, profile='test')
+    cache.save_cached_credentials(credentials, profile='test')
+
+    run(monkeypatch, command='refresh')
+
+    assert 'nothing to refresh' in capsys.readouterr().out
+    assert FakeAuthenticator.instances == []
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
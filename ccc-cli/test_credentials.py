@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-place ~/.aws/credentials editor (cca.auth.credentials)
+"""
+
+import sys
+import configparser
+
+import pytest
+
+from cca.auth import credentials as credentials_module
+from cca.auth import save_credentials, save_credentials_batch, remove_credentials, load_credentials
+
+
+def make_credentials(key='ASIANEW'):
+    return {
+        'AccessKeyId': key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token',
+        'Expiration': '2099-01-01T00:00:00+00:00'
+    }
+
+
+@pytest.fixture
+def credentials_file(monkeypatch, tmp_path):
+    path = tmp_path / '.aws' / 'credentials'
+    path.parent.mkdir()
+    monkeypatch.setattr(credentials_module, 'CREDENTIALS_FILE', path)
+    return path
+
+
+def parse(path):
+    parser = configparser.ConfigParser()
+    parser.read_string(path.read_text())
+    return parser
+
+
+EXISTING = (
+    "# Managed by hand\n"
+    "[default]\n"
+    "aws_access_key_id = AKIADEFAULT\n"
+    "aws_secret_access_key = default-secret\n"
+    "\n"
+    "[cca]\n"
+    "aws_access_key_id = ASIAOLD\n"
+    "aws_secret_access_key = old-secret\n"
+    "aws_session_token = old-token\n"
+    "# expires_at = 2000-01-01T00:00:00+00:00\n"
+    "\n"
+    "# prod account, do not delete\n"
+    "[prod]\n"
+    "aws_access_key_id = AKIAPROD\n"
+    "aws_secret_access_key = prod-secret\n"
+)
+
+
+def test_update_in_place(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    save_credentials(make_credentials(), profile='cca')
+
+    text = credentials_file.read_text()
+    assert parse(credentials_file)['cca']['aws_access_key_id'] == 'ASIANEW'
+    assert 'ASIAOLD' not in text and '2000-01-01' not in text
+    # Everything outside the section is untouched
+    assert text.startswith(EXISTING[:EXISTING.index('[cca]')])
+    assert text.endswith(EXISTING[EXISTING.index('\n# prod account'):])
+
+
+def test_comment_before_next_section_is_kept(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    save_credentials(make_credentials(), profile='cca')
+    assert '# prod account, do not delete\n[prod]' in credentials_file.read_text()
+
+    assert remove_credentials('cca') is True
+    text = credentials_file.read_text()
+    assert '# prod account, do not delete\n[prod]' in text
+    assert '[cca]' not in text
+    assert set(parse(credentials_file).sections()) == {'default', 'prod'}
+
+
+def test_repeated_saves_are_stable(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    save_credentials(make_credentials(), profile='cca')
+    once = credentials_file.read_text()
+    save_credentials(make_credentials(), profile='cca')
+
+    assert credentials_file.read_text() == once
+
+
+def test_add_section(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    save_credentials(make_credentials(), profile='new')
+
+    text = credentials_file.read_text()
+    assert text.startswith(EXISTING)
+    assert text[len(EXISTING):].startswith('\n[new]\n')
+    assert parse(credentials_file)['new']['aws_session_token'] == 'token'
+
+
+def test_create_file(credentials_file):
+    save_credentials(make_credentials(), profile='cca')
+
+    assert credentials_file.read_text().startswith('[cca]\n')
+    assert oct(credentials_file.stat().st_mode & 0o777) == oct(0o600)
+
+
+def test_remove_section(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    assert remove_credentials('default') is True
+    assert remove_credentials('missing') is False
+
+    text = credentials_file.read_text()
+    assert text.startswith('# Managed by hand\n\n[cca]\n')
+    assert set(parse(credentials_file).sections()) == {'cca', 'prod'}
+
+
+def test_file_without_trailing_newline(credentials_file):
+    credentials_file.write_text(EXISTING.rstrip('\n'))
+
+    save_credentials(make_credentials('ASIAPROD'), profile='prod')
+    save_credentials(make_credentials(), profile='other')
+
+    parser = parse(credentials_file)
+    assert parser['prod']['aws_access_key_id'] == 'ASIAPROD'
+    assert parser['other']['aws_access_key_id'] == 'ASIANEW'
+    assert parser['default']['aws_access_key_id'] == 'AKIADEFAULT'
+
+
+def test_crlf_line_endings_are_preserved(credentials_file):
+    credentials_file.write_bytes(EXISTING.replace('\n', '\r\n').encode())
+
+    save_credentials(make_credentials(), profile='cca')
+
+    data = credentials_file.read_bytes()
+    assert b'\n' not in data.replace(b'\r\n', b'')
+    assert b'# prod account, do not delete\r\n[prod]' in data
+
+
+def test_batch_updates_several_sections(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    save_credentials_batch({'cca': make_credentials('ASIA1'), 'prod': make_credentials('ASIA2'),
+                            'new': make_credentials('ASIA3')})
+
+    parser = parse(credentials_file)
+    assert [parser[p]['aws_access_key_id'] for p in ('cca', 'prod', 'new')] == ['ASIA1', 'ASIA2', 'ASIA3']
+    assert '# prod account, do not delete' in credentials_file.read_text()
+
+
+def test_load_credentials_reads_back_section(credentials_file):
+    credentials_file.write_text(EXISTING)
+
+    assert load_credentials('cca') == {
+        'AccessKeyId': 'ASIAOLD',
+        'SecretAccessKey': 'old-secret',
+        'SessionToken': 'old-token',
+        'Expiration': '2000-01-01T00:00:00+00:00'
+    }
+    assert load_credentials('default')['Expiration'] is None
+    assert load_credentials('missing') is None
+
+
+def test_load_credentials_round_trips_save(credentials_file):
+    save_credentials(make_credentials(), profile='cca')
+
+    assert load_credentials('cca') == make_credentials()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tests for the credential broker daemon (cca.daemon)
+
+The broker runs on a socket under tmp_path with its refresher replaced by a
+fake, so no Cognito call is ever made.
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import logging
+import threading
+
+import pytest
+
+import ccc
+import cca.auth
+from cca import daemon
+from cca.auth import refresh
+from cca.daemon import CredentialBroker, BrokerServer, DaemonError, LatencyStats, request_daemon, serve
+
+
+CONFIG = {'profile': 'test', 'tokens': {'refresh_token': 'refresh', 'username': 'user@example.com'}}
+
+CREDENTIALS = {
+    'AccessKeyId': 'ASIADAEMON',
+    'SecretAccessKey': 'secret',
+    'SessionToken': 'token',
+    'Expiration': '2099-01-01T00:00:00+00:00'
+}
+
+
+class FakeThrottle:
+    def metrics(self):
+        return {'GetCredentialsForIdentity': {'calls': 1}}
+
+
+class FakeAuthenticator:
+    def __init__(self, config):
+        self.throttle = FakeThrottle()
+
+
+class FakeRefresher:
+    """Stands in for CredentialRefresher and counts what the broker asks of it"""
+
+    def __init__(self, config, refresh_window=None, name=None):
+        self.config = config
+        self.authenticator = FakeAuthenticator(config)
+        self.calls = 0
+        self.started = False
+
+    def get_credentials(self):
+        self.calls += 1
+        return CREDENTIALS
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def status(self):
+        return {'profile': self.config['profile'], 'expiration': CREDENTIALS['Expiration'],
+                'refresh_count': self.calls, 'refresh_errors': 0}
+
+
+@pytest.fixture(autouse=True)
+def fake_refresher(monkeypatch):
+    # ccc imports it through the lazy cca.auth export, which caches on first
+    # use: patch that first so the real class is what gets restored
+    monkeypatch.setattr(cca.auth, 'CredentialRefresher', FakeRefresher, raising=False)
+    monkeypatch.setattr(refresh, 'CredentialRefresher', FakeRefresher)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / 'd.sock'
+
+
+@pytest.fixture
+def server(socket_path):
+    server = BrokerServer(CredentialBroker(CONFIG), socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(timeout=5)
+    server.server_close()
+
+
+def wait_for_daemon(socket_path):
+    for _ in range(200):
+        try:
+            return request_daemon('status', socket_path)
+        except DaemonError:
+            threading.Event().wait(0.01)
+    raise AssertionError("daemon did not start")
+
+
+def test_latency_percentiles():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record('credentials', ms / 1000.0, error=ms > 98)
+
+    snapshot = stats.snapshot()['credentials']
+
+    assert (snapshot['count'], snapshot['errors']) == (100, 2)
+    assert [snapshot[k] for k in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')] == pytest.approx([50, 90, 99, 100])
+
+
+def test_latency_keeps_a_bounded_window():
+    stats = LatencyStats(samples=10)
+    for ms in range(1, 101):
+        stats.record('status', ms / 1000.0)
+
+    snapshot = stats.snapshot()['status']
+
+    assert snapshot['count'] == 100
+    assert snapshot['p50_ms'] == pytest.approx(95)
+
+
+def test_broker_requires_refresh_token():
+    with pytest.raises(DaemonError):
+        CredentialBroker({'tokens': {}})
+
+
+def test_credentials_op(server, socket_path):
+    assert request_daemon('credentials', socket_path)['credentials'] == CREDENTIALS
+    assert server.broker.refresher.calls == 1
+
+
+def test_status_reports_broker_and_percentiles(server, socket_path):
+    for _ in range(3):
+        request_daemon('credentials', socket_path)
+
+    response = request_daemon('status', socket_path)
+
+    assert response['pid'] == os.getpid()
+    assert response['broker']['username'] == 'user@example.com'
+    assert response['broker']['cognito'] == {'GetCredentialsForIdentity': {'calls': 1}}
+    requests = response['requests']['credentials']
+    assert (requests['count'], requests['errors']) == (3, 0)
+    assert 0 <= requests['p50_ms'] <= requests['p90_ms'] <= requests['p99_ms'] <= requests['max_ms']
+
+
+def test_unknown_op_is_an_error(server, socket_path):
+    with pytest.raises(DaemonError, match='Unknown operation'):
+        request_daemon('bogus', socket_path)
+    assert request_daemon('status', socket_path)['requests']['bogus']['errors'] == 1
+
+
+def test_socket_is_owner_only(server, socket_path):
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+
+def test_unreachable_daemon(socket_path):
+    with pytest.raises(DaemonError) as error:
+        request_daemon('status', socket_path)
+    assert isinstance(error.value.__cause__, FileNotFoundError)
+
+
+def test_serve_and_shutdown(socket_path):
+    thread = threading.Thread(target=serve, args=(dict(CONFIG), socket_path), daemon=True)
+    thread.start()
+    assert wait_for_daemon(socket_path)['broker']['refresh_count'] == 1
+
+    assert request_daemon('shutdown', socket_path)['ok']
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+
+def test_serve_refuses_when_daemon_is_live(server, socket_path):
+    with pytest.raises(DaemonError, match='already running'):
+        serve(dict(CONFIG), socket_path)
+    assert request_daemon('status', socket_path)['ok']
+
+
+def test_serve_replaces_stale_socket(socket_path):
+    # Bound but never listening: connections are refused, as after a crash
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    thread = threading.Thread(target=serve, args=(dict(CONFIG), socket_path), daemon=True)
+    thread.start()
+    assert wait_for_daemon(socket_path)['ok']
+    request_daemon('shutdown', socket_path)
+    thread.join(timeout=5)
+
+
+def test_serve_keeps_socket_of_unresponsive_daemon(socket_path):
+    # Accepts connections but never answers, like a daemon stuck in a refresh
+    busy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    busy.bind(str(socket_path))
+    busy.listen(1)
+    try:
+        with pytest.raises(DaemonError, match='not answering'):
+            serve(dict(CONFIG), socket_path)
+        assert socket_path.exists()
+    finally:
+        busy.close()
+
+
+def test_credential_process_uses_daemon(server, socket_path, monkeypatch, capsys):
+    monkeypatch.setattr(daemon, 'SOCKET_PATH', socket_path)
+    monkeypatch.setattr(sys, 'argv', ['ccc', 'credential-process'])
+    # main() attaches the console handler
+    monkeypatch.setattr(logging.getLogger('cca'), 'handlers', [])
+
+    ccc.main()
+
+    payload = json.loads(capsys.readouterr().out)
+    assert (payload['Version'], payload['AccessKeyId']) == (1, 'ASIADAEMON')
+    assert server.broker.refresher.calls == 1
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
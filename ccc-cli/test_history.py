@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Tests for the local history index (cca.aws.history.HistoryStore)
+
+Each test uses a temporary database, and the CloudTrail / CloudWatch Logs
+readers are replaced by fakes that serve a fixed event list and record the
+ranges they were asked for.
+"""
+
+import sys
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from cca.aws import history
+from cca.aws.history import HistoryStore, SYNC_OVERLAP
+
+
+class Session:
+    region_name = 'test-region'
+
+
+SESSION = Session()
+
+
+def make_event(event_id, age, name='GetObject', error='', source='CloudTrail'):
+    return {
+        'time': datetime.now(timezone.utc) - age,
+        'event_name': name,
+        'resources': [{'ResourceType': 'AWS::S3::Bucket', 'ResourceName': 'bucket'}],
+        'error_code': error,
+        'event_id': event_id,
+        'source': source
+    }
+
+
+class FakeBackend:
+    """Serves the events of a range, newest first, and records the ranges requested"""
+
+    def __init__(self, events=(), fail=None, fail_after=None):
+        self.events = list(events)
+        self.fail = fail
+        self.fail_after = fail_after
+        self.ranges = []
+
+    def __call__(self, session, username, start_time, end_time, page_size=None, **kwargs):
+        self.ranges.append((start_time, end_time))
+        if self.fail:
+            raise Exception(self.fail)
+        matching = sorted((e for e in self.events if start_time <= e['time'] <= end_time),
+                          key=lambda e: e['time'], reverse=True)
+        for index, event in enumerate(matching):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise Exception("connection reset")
+            yield dict(event)
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    trail, logs = FakeBackend(), FakeBackend()
+    monkeypatch.setattr(history, 'iter_sharded_cloudtrail_events', trail)
+    monkeypatch.setattr(history, 'iter_log_events', logs)
+    return trail, logs
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(tmp_path / 'history.db') as store:
+        yield store
+
+
+def stored_ids(store):
+    return sorted(row[0] for row in store.conn.execute("SELECT event_id FROM events"))
+
+
+def test_first_sync_fetches_the_window(store, backends):
+    trail, logs = backends
+    trail.events = [make_event(f"e{i}", timedelta(hours=i)) for i in range(1, 48)]
+
+    assert store.sync(SESSION, 'alice', days=1) == 23
+
+    [(start, end)] = trail.ranges
+    assert end - start == timedelta(days=1)
+    assert logs.ranges == []
+    events = store.query(SESSION, 'alice', days=1, limit=5)
+    assert [e['event_id'] for e in events] == ['e1', 'e2', 'e3', 'e4', 'e5']
+    assert events[0]['resources'][0]['ResourceName'] == 'bucket'
+
+
+def test_next_sync_only_fetches_new_events(store, backends):
+    trail, _ = backends
+    trail.events = [make_event('old', timedelta(hours=2)), make_event('recent', timedelta(minutes=5))]
+    store.sync(SESSION, 'alice', days=1)
+    first_end = trail.ranges[0][1]
+
+    trail.events.append(make_event('new', timedelta(seconds=1)))
+    store.sync(SESSION, 'alice', days=1)
+
+    start, _ = trail.ranges[1]
+    assert start == first_end - SYNC_OVERLAP
+    # 'recent' is fetched again by the overlap but stored once
+    assert stored_ids(store) == ['new', 'old', 'recent']
+
+
+def test_longer_window_fills_the_gap(store, backends):
+    trail, _ = backends
+    trail.events = [make_event('day-0', timedelta(hours=1)), make_event('day-2', timedelta(days=2))]
+    store.sync(SESSION, 'alice', days=1)
+    first_start = trail.ranges[0][0]
+    assert stored_ids(store) == ['day-0']
+
+    store.sync(SESSION, 'alice', days=3)
+
+    gap_start, gap_end = trail.ranges[1]
+    assert gap_end == first_start
+    assert first_start - gap_start == pytest.approx(timedelta(days=2), abs=timedelta(seconds=5))
+    assert stored_ids(store) == ['day-0', 'day-2']
+    # The gap is not fetched again
+    store.sync(SESSION, 'alice', days=3)
+    assert len(trail.ranges) == 4 and trail.ranges[3][0] > gap_end
+
+
+def test_empty_cloudtrail_falls_back_to_cloudwatch(store, backends):
+    trail, logs = backends
+    logs.events = [make_event('from-logs', timedelta(hours=1), source='CloudWatch Logs')]
+
+    store.sync(SESSION, 'alice', days=1)
+
+    assert len(logs.ranges) == 1
+    assert [e['source'] for e in store.query(SESSION, 'alice')] == ['CloudWatch Logs']
+
+
+def test_failing_cloudtrail_falls_back_to_cloudwatch(store, backends):
+    trail, logs = backends
+    trail.fail = 'AccessDenied'
+    logs.events = [make_event('from-logs', timedelta(hours=1), source='CloudWatch Logs')]
+
+    assert store.sync(SESSION, 'alice', days=1) == 1
+
+
+def test_empty_incremental_sync_ignores_cloudwatch(store, backends):
+    trail, logs = backends
+    trail.events = [make_event('old', timedelta(hours=2))]
+    store.sync(SESSION, 'alice', days=1)
+    first_synced_to = store._state('test-region/alice')[1]
+
+    # Nothing new in CloudTrail and no CloudWatch Logs group
+    logs.fail = 'ResourceNotFoundException'
+    assert store.sync(SESSION, 'alice', days=1) == 0
+
+    assert logs.ranges == []
+    assert store._state('test-region/alice')[1] > first_synced_to
+
+
+def test_cloudwatch_failure_after_empty_cloudtrail_is_no_events(store, backends):
+    trail, logs = backends
+    logs.fail = 'AccessDeniedException'
+
+    assert store.sync(SESSION, 'alice', days=1) == 0
+    assert len(logs.ranges) == 1
+    assert store._state('test-region/alice') is not None
+
+
+def test_failed_sync_does_not_advance(store, backends):
+    trail, logs = backends
+    trail.events = [make_event(f"e{i}", timedelta(hours=i)) for i in range(1, 10)]
+    trail.fail_after = 3
+
+    with pytest.raises(Exception, match='connection reset'):
+        store.sync(SESSION, 'alice', days=1)
+    assert store.conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0] == 0
+
+    # The next sync fetches the whole window again
+    trail.fail_after = None
+    store.sync(SESSION, 'alice', days=1)
+    assert trail.ranges[1][1] - trail.ranges[1][0] == timedelta(days=1)
+    assert len(stored_ids(store)) == 9
+
+
+def test_query_filters(store, backends):
+    trail, _ = backends
+    trail.events = [
+        make_event('put', timedelta(hours=1), name='PutObject'),
+        make_event('denied', timedelta(hours=2), name='PutObject', error='AccessDenied'),
+        make_event('get', timedelta(hours=3)),
+        make_event('old', timedelta(days=2), error='NoSuchKey')
+    ]
+    store.sync(SESSION, 'alice', days=3)
+
+    def ids(**kwargs):
+        return [e['event_id'] for e in store.query(SESSION, 'alice', **kwargs)]
+
+    assert ids(days=3) == ['put', 'denied', 'get', 'old']
+    assert ids(days=1) == ['put', 'denied', 'get']
+    assert ids(days=3, event_name='PutObject') == ['put', 'denied']
+    assert ids(days=3, errors_only=True) == ['denied', 'old']
+    assert ids(days=3, event_name='PutObject', errors_only=True, limit=1) == ['denied']
+
+
+def test_scopes_are_separate(store, backends):
+    trail, _ = backends
+    trail.events = [make_event('e1', timedelta(hours=1))]
+    store.sync(SESSION, 'alice', days=1)
+
+    assert store.query(SESSION, 'bob') == []
+    assert [e['event_id'] for e in store.query(SESSION, 'alice')] == ['e1']
+
+
+def test_events_without_id_are_kept(store, backends):
+    trail, logs = backends
+    logs.events = [make_event('N/A', timedelta(hours=h), source='CloudWatch Logs') for h in (1, 2)]
+
+    store.sync(SESSION, 'alice', days=1)
+
+    assert len(store.query(SESSION, 'alice')) == 2
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the IdentityId cache (cca.auth.identity) and its use in the
+credential exchange
+
+The cache file is redirected to a temporary directory and the
+cognito-identity client is replaced by a stub that records its calls.
+"""
+
+import sys
+import json
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+from cca.auth import identity
+from cca.auth.cognito import CognitoAuthenticator
+
+
+POOL = 'us-east-1:pool'
+
+
+def make_id_token(sub='user-sub'):
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    claims = {'sub': sub} if sub else {}
+    return '.'.join([segment({'alg': 'RS256'}), segment(claims), 'c2ln'])
+
+
+class StubIdentityClient:
+    """cognito-identity stub; rejects the IdentityIds in 'rejected' with the given error code"""
+
+    def __init__(self, identity_id='us-east-1:fresh', rejected=(), error='ResourceNotFoundException'):
+        self.identity_id = identity_id
+        self.rejected = set(rejected)
+        self.error = error
+        self.calls = []
+
+    def get_id(self, IdentityPoolId, Logins):
+        self.calls.append(('get_id', IdentityPoolId))
+        return {'IdentityId': self.identity_id}
+
+    def get_credentials_for_identity(self, IdentityId, Logins):
+        self.calls.append(('get_credentials_for_identity', IdentityId))
+        if IdentityId in self.rejected:
+            raise ClientError({'Error': {'Code': self.error, 'Message': 'rejected'},
+                               'ResponseMetadata': {'HTTPStatusCode': 400}}, 'GetCredentialsForIdentity')
+        return {'IdentityId': IdentityId, 'Credentials': {
+            'AccessKeyId': 'ASIAEXAMPLE', 'SecretKey': 'secret', 'SessionToken': 'token',
+            'Expiration': datetime(2099, 1, 1, tzinfo=timezone.utc)}}
+
+
+@pytest.fixture(autouse=True)
+def cache_file(monkeypatch, tmp_path):
+    path = tmp_path / 'identity-ids.json'
+    monkeypatch.setattr(identity, 'IDENTITY_CACHE_FILE', path)
+    monkeypatch.setattr(identity, '_memory', None)
+    return path
+
+
+def make_authenticator(client):
+    auth = CognitoAuthenticator({'user_pool_id': 'us-east-1_test', 'identity_pool_id': POOL, 'region': 'us-east-1'})
+    auth.identity_client = client
+    return auth
+
+
+def test_cache_round_trip(cache_file):
+    assert identity.get_cached_identity_id(POOL, 'sub') is None
+
+    identity.cache_identity_id(POOL, 'sub', 'us-east-1:abc')
+
+    assert identity.get_cached_identity_id(POOL, 'sub') == 'us-east-1:abc'
+    assert json.loads(cache_file.read_text()) == {f'{POOL}|sub': 'us-east-1:abc'}
+
+    identity.forget_identity_id(POOL, 'sub')
+    assert identity.get_cached_identity_id(POOL, 'sub') is None
+
+
+def test_first_exchange_caches_identity_id(cache_file):
+    client = StubIdentityClient()
+
+    identity_id, credentials = make_authenticator(client)._get_aws_credentials(make_id_token())
+
+    assert identity_id == 'us-east-1:fresh'
+    assert [call[0] for call in client.calls] == ['get_id', 'get_credentials_for_identity']
+    assert credentials['Expiration'] == '2099-01-01T00:00:00+00:00'
+    assert json.loads(cache_file.read_text()) == {f'{POOL}|user-sub': 'us-east-1:fresh'}
+
+
+def test_cache_hit_skips_get_id():
+    identity.cache_identity_id(POOL, 'user-sub', 'us-east-1:cached')
+    # A new process starts with an empty in-memory view and reads the file
+    identity._memory = None
+    client = StubIdentityClient()
+
+    identity_id, _ = make_authenticator(client)._get_aws_credentials(make_id_token())
+
+    assert identity_id == 'us-east-1:cached'
+    assert client.calls == [('get_credentials_for_identity', 'us-east-1:cached')]
+
+
+@pytest.mark.parametrize('error', ['ResourceNotFoundException', 'NotAuthorizedException'])
+def test_rejected_identity_id_falls_back_to_get_id(error):
+    identity.cache_identity_id(POOL, 'user-sub', 'us-east-1:stale')
+    client = StubIdentityClient(rejected={'us-east-1:stale'}, error=error)
+
+    identity_id, _ = make_authenticator(client)._get_aws_credentials(make_id_token())
+
+    assert identity_id == 'us-east-1:fresh'
+    assert client.calls == [('get_credentials_for_identity', 'us-east-1:stale'),
+                            ('get_id', POOL),
+                            ('get_credentials_for_identity', 'us-east-1:fresh')]
+    assert identity.get_cached_identity_id(POOL, 'user-sub') == 'us-east-1:fresh'
+
+
+def test_other_errors_keep_the_cached_identity_id():
+    identity.cache_identity_id(POOL, 'user-sub', 'us-east-1:cached')
+    client = StubIdentityClient(rejected={'us-east-1:cached'}, error='InvalidParameterException')
+
+    with pytest.raises(Exception, match='Failed to get AWS credentials'):
+        make_authenticator(client)._get_aws_credentials(make_id_token())
+
+    assert [call[0] for call in client.calls] == ['get_credentials_for_identity']
+    assert identity.get_cached_identity_id(POOL, 'user-sub') == 'us-east-1:cached'
+
+
+def test_token_without_sub_is_not_cached(cache_file):
+    client = StubIdentityClient()
+    auth = make_authenticator(client)
+
+    auth._get_aws_credentials(make_id_token(sub=None))
+    auth._get_aws_credentials(make_id_token(sub=None))
+
+    assert [call[0] for call in client.calls].count('get_id') == 2
+    assert not cache_file.exists()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
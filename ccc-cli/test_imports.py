@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Import-time regression tests for the CCA SDK
+
+Each check runs in a fresh interpreter so that modules loaded by other
+tests (or by pytest itself) do not hide an eager import.
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+HEAVY_MODULES = ('boto3', 'botocore', 'requests')
+
+
+def loaded_modules(code):
+    """Run code in a clean interpreter and return the heavy modules it loaded"""
+    probe = (
+        f"{code}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return [m for m in result.stdout.strip().split(',') if m]
+
+
+def test_import_cca_is_lightweight():
+    """import cca must not load boto3, botocore or requests"""
+    assert loaded_modules("import cca") == []
+
+
+def test_import_subpackages_is_lightweight():
+    """import cca.auth / cca.aws must not load boto3, botocore or requests"""
+    assert loaded_modules("import cca.auth, cca.aws") == []
+
+
+def test_version_and_config_are_lightweight():
+    """Version and configuration access must not load heavy dependencies"""
+    assert loaded_modules("from cca import __version__, load_config") == []
+
+
+def test_lazy_names_resolve():
+    """Every name in __all__ resolves to the real object on first access"""
+    import cca
+    import cca.auth
+    import cca.aws
+    from cca.auth.cognito import CognitoAuthenticator
+    from cca.aws.cloudtrail import get_user_history
+
+    for module in (cca, cca.auth, cca.aws):
+        # Every lazy export is public
+        assert set(module._LAZY_IMPORTS) <= set(module.__all__)
+        for name in module.__all__:
+            assert getattr(module, name) is not None
+            assert name in dir(module)
+
+    assert cca.CognitoAuthenticator is CognitoAuthenticator
+    assert cca.aws.get_user_history is get_user_history
+
+
+def test_touching_auth_api_loads_botocore():
+    """Accessing an API that needs botocore still imports it on demand"""
+    assert 'botocore' in loaded_modules("from cca import CognitoAuthenticator")
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the AWS call timing hooks (cca.instrumentation)
+
+Calls go to a local HTTP stub, so the real botocore event sequence is
+exercised, including retries and connection failures.
+"""
+
+import sys
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import pytest
+from botocore import UNSIGNED
+from botocore.config import Config
+from botocore.exceptions import EndpointConnectionError
+
+from cca import instrumentation
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    statuses = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = json.dumps({'IdentityId': 'us-east-1:abc'} if status == 200 else
+                          {'__type': 'InternalErrorException', 'message': 'boom'}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-amz-json-1.1')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    StubHandler.statuses = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def recording():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def make_client(port, max_attempts=3):
+    client = boto3.client('cognito-identity', region_name='us-east-1', endpoint_url=f"http://127.0.0.1:{port}",
+                          config=Config(signature_version=UNSIGNED,
+                                        retries={'mode': 'standard', 'total_max_attempts': max_attempts}))
+    instrumentation.instrument_client(client)
+    return client
+
+
+def get_id(client):
+    return client.get_id(IdentityPoolId='us-east-1:00000000-0000-0000-0000-000000000000')
+
+
+def test_successful_call(server):
+    get_id(make_client(server.server_port))
+
+    [span] = instrumentation.get_spans()
+    assert (span['service'], span['operation'], span['region']) == ('cognito-identity', 'GetId', 'us-east-1')
+    assert (span['attempts'], span['retries'], span['status'], span['error']) == (1, 0, 200, None)
+    assert span['bytes_sent'] > 0 and span['bytes_received'] > 0
+
+
+def test_retries_are_counted(server):
+    StubHandler.statuses = [500]
+
+    get_id(make_client(server.server_port))
+
+    [span] = instrumentation.get_spans()
+    assert (span['attempts'], span['retries'], span['status']) == (2, 1, 200)
+
+
+def test_failed_call_keeps_operation_and_attempts():
+    # Nothing listens on a freshly closed port
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(EndpointConnectionError):
+        get_id(make_client(port, max_attempts=2))
+
+    [span] = instrumentation.get_spans()
+    assert span['operation'] == 'GetId'
+    assert span['error'] == 'EndpointConnectionError'
+    assert (span['attempts'], span['retries']) == (2, 1)
+    assert instrumentation.summarize()[0]['errors'] == 1
+
+
+def test_nothing_recorded_when_disabled(server):
+    instrumentation.disable()
+
+    get_id(make_client(server.server_port))
+
+    assert instrumentation.get_spans() == []
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
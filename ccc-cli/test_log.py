@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for SDK logging (cca.log)
+"""
+
+import io
+import sys
+import json
+import logging
+from contextlib import redirect_stdout
+
+import pytest
+
+from cca.log import enable_console_logging
+
+
+@pytest.fixture
+def cca_logger(monkeypatch):
+    logger = logging.getLogger('cca')
+    monkeypatch.setattr(logger, 'handlers', [])
+    level = logger.level
+    yield logging.getLogger('cca.auth.test')
+    # setLevel() also clears the cached isEnabledFor() results of child loggers
+    logger.setLevel(level)
+
+
+def test_warnings_and_errors_go_to_stderr(cca_logger, capsys):
+    enable_console_logging()
+
+    cca_logger.info("[OK] done")
+    cca_logger.warning("[WARN] careful")
+    cca_logger.error("[ERROR] failed")
+
+    out, err = capsys.readouterr()
+    assert out == "[OK] done\n"
+    assert err == "[WARN] careful\n[ERROR] failed\n"
+
+
+def test_explicit_stream_gets_everything(cca_logger):
+    stream = io.StringIO()
+    enable_console_logging(stream=stream)
+
+    cca_logger.info("[OK] done")
+    cca_logger.error("[ERROR] failed")
+
+    assert stream.getvalue() == "[OK] done\n[ERROR] failed\n"
+
+
+def test_follows_redirected_stdout(cca_logger, capsys):
+    # credential_process redirects stdout to stderr around a refresh
+    enable_console_logging()
+
+    with redirect_stdout(sys.stderr):
+        cca_logger.info("[AUTH] Refreshing credentials...")
+        cca_logger.warning("[WARN] careful")
+    print('{"Version": 1}')
+
+    out, err = capsys.readouterr()
+    assert out == '{"Version": 1}\n'
+    assert err == "[AUTH] Refreshing credentials...\n[WARN] careful\n"
+
+
+def test_level_filters_messages(cca_logger, capsys):
+    enable_console_logging(logging.WARNING)
+
+    cca_logger.info("[OK] done")
+    cca_logger.warning("[WARN] careful")
+
+    out, err = capsys.readouterr()
+    assert (out, err) == ('', "[WARN] careful\n")
+
+
+def test_json_lines_include_structured_fields(cca_logger):
+    stream = io.StringIO()
+    enable_console_logging(json_format=True, stream=stream)
+
+    cca_logger.info("[OK] Credentials saved to %s", '/tmp/credentials', extra={'profile': 'dev'})
+
+    entry = json.loads(stream.getvalue())
+    assert entry['level'] == 'INFO' and entry['logger'] == 'cca.auth.test'
+    assert entry['message'] == "[OK] Credentials saved to /tmp/credentials"
+    assert entry['profile'] == 'dev'
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
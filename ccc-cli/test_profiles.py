@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for named profiles: 'ccc login --all' and '--profile' on
+refresh and credential-process
+
+Commands run in-process with the config, caches, lock directory and
+~/.aws/credentials redirected to a temporary directory, and Cognito
+replaced by fake authenticators.
+"""
+
+import sys
+import json
+import time
+import base64
+import logging
+from concurrent.futures import Future
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import ccc
+import cca
+import cca.auth
+from cca import config as config_module
+from cca import daemon
+from cca.auth import cache, refresh, cognito
+from cca.auth import credentials as credentials_module
+
+
+def make_id_token(expires_in, sub='user'):
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return '.'.join([segment({'alg': 'RS256'}),
+                     segment({'exp': int(time.time() + expires_in), 'sub': sub}), 'c2ln'])
+
+
+def make_credentials(key, expires_in=3600):
+    return {
+        'AccessKeyId': key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token',
+        'Expiration': (datetime.now(timezone.utc) + timedelta(seconds=expires_in)).isoformat()
+    }
+
+
+class FakeAuthenticator:
+    """Stands in for CognitoAuthenticator; fails for the identity pool named 'broken'"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def authenticate(self, username, password):
+        return {'IdToken': make_id_token(3600, self.config['profile']), 'AccessToken': 'access',
+                'RefreshToken': f"refresh-{self.config['profile']}"}
+
+    def refresh_credentials(self, refresh_token):
+        return {'IdToken': make_id_token(3600, self.config['profile']), 'AccessToken': 'access'}
+
+    def get_aws_credentials(self, id_token):
+        if self.config.get('identity_pool_id') == 'broken':
+            raise Exception("identity pool unavailable")
+        return make_credentials(f"ASIA{self.config['profile'].upper()}")
+
+
+CONFIG = {
+    'user_pool_id': 'pool-a',
+    'app_client_id': 'client',
+    'identity_pool_id': 'identities',
+    'region': 'us-east-1',
+    'profile': 'cca',
+    'profiles': {
+        'dev': {},
+        'prod': {'identity_pool_id': 'broken'},
+        'other': {'user_pool_id': 'pool-b'}
+    }
+}
+
+
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', tmp_path / 'config.json')
+    monkeypatch.setattr(config_module, '_config', config_module.Config(
+        tmp_path / 'config.json', tmp_path / 'default.json'))
+    monkeypatch.setattr(cache, 'CACHE_FILE', tmp_path / 'credentials-cache.json')
+    monkeypatch.setattr(refresh, 'LOCK_DIR', tmp_path / 'locks')
+    monkeypatch.setattr(daemon, 'SOCKET_PATH', tmp_path / 'no-daemon.sock')
+    monkeypatch.setattr(credentials_module, 'CREDENTIALS_FILE', tmp_path / '.aws' / 'credentials')
+    monkeypatch.setattr(cognito, 'CognitoAuthenticator', FakeAuthenticator)
+    monkeypatch.setattr(logging.getLogger('cca'), 'handlers', [])
+    return tmp_path
+
+
+@pytest.fixture
+def login(home, monkeypatch):
+    """Fake the warm-up and the prompts; record prompts and batched writes"""
+    calls = {'prompts': [], 'save_config': 0, 'save_credentials_batch': 0, 'save_cached_credentials_batch': 0}
+
+    def warm_up(settings):
+        future = Future()
+        future.set_result(FakeAuthenticator(settings))
+        return future
+
+    def counting(name, module, func):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return func(*args, **kwargs)
+        monkeypatch.setattr(module, name, wrapper, raising=False)
+
+    counting('save_config', cca, config_module.save_config)
+    counting('save_credentials_batch', cca.auth, credentials_module.save_credentials_batch)
+    counting('save_cached_credentials_batch', cca.auth, cache.save_cached_credentials_batch)
+    monkeypatch.setattr(ccc, 'start_warm_up', warm_up)
+    monkeypatch.setattr('builtins.input', lambda prompt: calls['prompts'].append(prompt) or 'user@example.com')
+    monkeypatch.setattr('getpass.getpass', lambda prompt: 'password')
+    config_module.save_config(CONFIG)
+    return calls
+
+
+def run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['ccc', *argv])
+    ccc.main()
+
+
+def test_login_all_prompts_once_per_pool(login, monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        run(monkeypatch, 'login', '--all')
+
+    assert login['prompts'] == ['Email: ', 'Email: ']
+    out = capsys.readouterr().out
+    assert 'pool-a (dev, prod)' in out and 'pool-b (other)' in out
+
+
+def test_login_all_isolates_failures(login, monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, 'login', '--all')
+
+    out = capsys.readouterr().out
+    assert exit_info.value.code == 1
+    assert '[OK] dev: logged in' in out and '[OK] other: logged in' in out
+    assert '[ERROR] prod: identity pool unavailable' in out
+
+    profiles = config_module.load_config()['profiles']
+    assert profiles['dev']['tokens']['refresh_token'] == 'refresh-dev'
+    assert profiles['other']['tokens']['refresh_token'] == 'refresh-other'
+    assert 'tokens' not in profiles['prod']
+    assert credentials_module.load_credentials('dev')['AccessKeyId'] == 'ASIADEV'
+    assert credentials_module.load_credentials('prod') is None
+    assert cache.load_cached_credentials('other')['AccessKeyId'] == 'ASIAOTHER'
+
+
+def test_login_all_writes_each_file_once(login, monkeypatch):
+    with pytest.raises(SystemExit):
+        run(monkeypatch, 'login', '--all')
+
+    assert (login['save_config'], login['save_credentials_batch'], login['save_cached_credentials_batch']) == (1, 1, 1)
+
+
+def save_profile_tokens(id_token_expires_in=-10):
+    config = json.loads(json.dumps(CONFIG))
+    config['profiles']['dev']['tokens'] = {'id_token': make_id_token(id_token_expires_in, 'dev'),
+                                           'refresh_token': 'refresh-dev'}
+    config_module.save_config(config)
+    return config['profiles']['dev']['tokens']
+
+
+def test_refresh_named_profile(home, monkeypatch, capsys):
+    stale = save_profile_tokens()
+
+    run(monkeypatch, 'refresh', '--profile', 'dev')
+
+    assert '[OK] Credentials refreshed successfully!' in capsys.readouterr().out
+    saved = config_module.load_config()
+    # The new tokens go back into the profile, not the top level
+    assert 'tokens' not in saved
+    assert saved['profiles']['dev']['tokens']['refresh_token'] == 'refresh-dev'
+    assert saved['profiles']['dev']['tokens']['id_token'] != stale['id_token']
+    assert credentials_module.load_credentials('dev')['AccessKeyId'] == 'ASIADEV'
+    assert credentials_module.load_credentials('cca') is None
+
+
+def test_refresh_unknown_profile(home, monkeypatch, capsys):
+    save_profile_tokens()
+
+    with pytest.raises(SystemExit):
+        run(monkeypatch, 'refresh', '--profile', 'missing')
+
+    assert "Unknown profile 'missing'" in capsys.readouterr().out
+
+
+def test_credential_process_named_profile(home, monkeypatch, capsys):
+    save_profile_tokens(id_token_expires_in=3600)
+
+    run(monkeypatch, 'credential-process', '--profile', 'dev')
+
+    assert json.loads(capsys.readouterr().out)['AccessKeyId'] == 'ASIADEV'
+    assert cache.load_cached_credentials('dev')['AccessKeyId'] == 'ASIADEV'
+    assert cache.load_cached_credentials('cca') is None
+
+
+def test_daemon_socket_per_profile(home):
+    assert daemon.socket_path_for() == home / 'no-daemon.sock'
+    assert daemon.socket_path_for('dev') == home / 'daemon-dev.sock'
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
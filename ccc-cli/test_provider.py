@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the botocore credential provider (cca.auth.provider)
+"""
+
+import sys
+import json
+import time
+import base64
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from cca.auth import CognitoCredentialProvider, create_cognito_session
+
+
+def make_id_token(expires_in):
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return '.'.join([segment({'alg': 'RS256'}), segment({'exp': int(time.time() + expires_in)}), 'c2ln'])
+
+
+class FakeAuthenticator:
+    """Hands out credentials with the given lifetimes, one per exchange"""
+
+    region = 'eu-west-1'
+
+    def __init__(self, *lifetimes):
+        self.lifetimes = list(lifetimes) or [3600]
+        self.exchanges = []
+        self.refreshes = []
+
+    def refresh_credentials(self, refresh_token):
+        self.refreshes.append(refresh_token)
+        return {'IdToken': make_id_token(3600), 'AccessToken': 'access', 'RefreshToken': 'rotated'}
+
+    def get_aws_credentials(self, id_token):
+        self.exchanges.append(id_token)
+        lifetime = self.lifetimes.pop(0) if len(self.lifetimes) > 1 else self.lifetimes[0]
+        return {
+            'AccessKeyId': f'ASIA{len(self.exchanges)}',
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token',
+            'Expiration': (datetime.now(timezone.utc) + timedelta(seconds=lifetime)).isoformat()
+        }
+
+
+def test_requires_a_token():
+    with pytest.raises(Exception):
+        CognitoCredentialProvider(FakeAuthenticator())
+
+
+def test_fresh_id_token_skips_refresh():
+    auth = FakeAuthenticator()
+    id_token = make_id_token(3600)
+
+    credentials = CognitoCredentialProvider(auth, refresh_token='refresh', id_token=id_token).load()
+
+    assert credentials.method == 'cca-cognito'
+    assert credentials.get_frozen_credentials().access_key == 'ASIA1'
+    assert auth.refreshes == [] and auth.exchanges == [id_token]
+
+
+def test_expired_id_token_is_refreshed():
+    auth = FakeAuthenticator()
+    provider = CognitoCredentialProvider(auth, refresh_token='refresh', id_token=make_id_token(-10))
+
+    provider.load()
+
+    assert auth.refreshes == ['refresh']
+    assert provider._refresh_token == 'rotated'
+
+
+def test_frozen_credentials_refetched_inside_refresh_window():
+    # Botocore refreshes once fewer than 15 minutes (advisory) remain
+    auth = FakeAuthenticator(5 * 60, 3600)
+    credentials = CognitoCredentialProvider(auth, refresh_token='refresh').load()
+
+    frozen = credentials.get_frozen_credentials()
+
+    assert frozen.access_key == 'ASIA2'
+    assert len(auth.exchanges) == 2
+
+
+def test_frozen_credentials_reused_outside_refresh_window():
+    auth = FakeAuthenticator(3600)
+    credentials = CognitoCredentialProvider(auth, refresh_token='refresh').load()
+
+    for _ in range(3):
+        assert credentials.get_frozen_credentials().access_key == 'ASIA1'
+    assert len(auth.exchanges) == 1
+
+
+def test_create_cognito_session():
+    auth = FakeAuthenticator()
+    config = {'tokens': {'refresh_token': 'refresh', 'id_token': make_id_token(3600)}}
+
+    session = create_cognito_session(config, authenticator=auth)
+
+    credentials = session.get_credentials()
+    assert credentials.method == 'cca-cognito'
+    assert credentials.get_frozen_credentials().access_key == 'ASIA1'
+    assert session.region_name == 'eu-west-1'
+    assert auth.refreshes == []
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the credential refresh engine (cca.auth.refresh)
+
+The config file, credentials cache and lock directory are redirected to a
+temporary directory, and Cognito is replaced by a fake authenticator that
+counts its calls.
+"""
+
+import sys
+import json
+import time
+import base64
+import threading
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from cca import config as config_module
+from cca.auth import cache, refresh
+from cca.auth.refresh import CredentialRefresher
+
+
+def make_id_token(expires_in):
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return '.'.join([segment({'alg': 'RS256'}), segment({'exp': int(time.time() + expires_in)}), 'c2ln'])
+
+
+def make_credentials(expires_in):
+    return {
+        'AccessKeyId': 'ASIAEXAMPLE',
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token',
+        'Expiration': (datetime.now(timezone.utc) + timedelta(seconds=expires_in)).isoformat()
+    }
+
+
+class FakeAuthenticator:
+    """Stands in for CognitoAuthenticator; slow enough for callers to overlap"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.token_refreshes = 0
+        self.exchanges = 0
+        self._lock = threading.Lock()
+
+    def refresh_credentials(self, refresh_token):
+        with self._lock:
+            self.token_refreshes += 1
+        if self.fail:
+            raise Exception("refresh token revoked")
+        return {'IdToken': make_id_token(3600), 'AccessToken': 'access'}
+
+    def get_aws_credentials(self, id_token):
+        time.sleep(self.delay)
+        with self._lock:
+            self.exchanges += 1
+        return make_credentials(3600)
+
+
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', tmp_path / 'config.json')
+    monkeypatch.setattr(config_module, '_config', config_module.Config(
+        tmp_path / 'config.json', tmp_path / 'default.json'))
+    monkeypatch.setattr(cache, 'CACHE_FILE', tmp_path / 'credentials-cache.json')
+    monkeypatch.setattr(refresh, 'LOCK_DIR', tmp_path / 'locks')
+    return tmp_path
+
+
+def make_config(id_token_expires_in=3600):
+    config = {
+        'profile': 'test',
+        'tokens': {'id_token': make_id_token(id_token_expires_in), 'refresh_token': 'refresh'}
+    }
+    config_module.save_config(config)
+    return config
+
+
+def test_valid_credentials_are_not_refreshed(home):
+    cache.save_cached_credentials(make_credentials(3600), profile='test')
+    auth = FakeAuthenticator()
+    refresher = CredentialRefresher(make_config(), refresh_window=300, jitter=0, authenticator=auth)
+
+    assert refresher.get_credentials()['AccessKeyId'] == 'ASIAEXAMPLE'
+    assert auth.exchanges == 0 and auth.token_refreshes == 0
+
+
+def test_due_credentials_reuse_fresh_id_token(home):
+    cache.save_cached_credentials(make_credentials(60), profile='test')
+    auth = FakeAuthenticator()
+    refresher = CredentialRefresher(make_config(), refresh_window=300, jitter=0, authenticator=auth)
+
+    refresher.get_credentials()
+
+    assert auth.exchanges == 1
+    assert auth.token_refreshes == 0
+    assert not refresher.is_due(cache.load_cached_credentials('test'))
+
+
+def test_expired_id_token_is_refreshed_and_saved(home):
+    auth = FakeAuthenticator()
+    refresher = CredentialRefresher(make_config(id_token_expires_in=-10), refresh_window=300, jitter=0,
+                                    authenticator=auth)
+
+    refresher.get_credentials()
+
+    assert auth.token_refreshes == 1 and auth.exchanges == 1
+    saved = json.loads((home / 'config.json').read_text())['tokens']
+    assert saved['access_token'] == 'access' and saved['refresh_token'] == 'refresh'
+
+
+def test_force_skips_id_token_shortcut(home):
+    cache.save_cached_credentials(make_credentials(3600), profile='test')
+    auth = FakeAuthenticator()
+    refresher = CredentialRefresher(make_config(), refresh_window=300, jitter=0, authenticator=auth)
+
+    refresher.get_credentials(force=True)
+
+    assert auth.token_refreshes == 1 and auth.exchanges == 1
+
+
+def test_concurrent_callers_refresh_once(home):
+    auth = FakeAuthenticator(delay=0.2)
+    refresher = CredentialRefresher(make_config(), refresh_window=300, jitter=0, authenticator=auth)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(refresher.get_credentials())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert auth.exchanges == 1
+    assert len(results) == 8 and len({r['Expiration'] for r in results}) == 1
+
+
+def test_separate_refreshers_share_the_result(home):
+    """A second refresher (e.g. another process) picks up the cached result instead of refreshing"""
+    config = make_config()
+    first, second = FakeAuthenticator(), FakeAuthenticator()
+    CredentialRefresher(config, refresh_window=300, jitter=0, authenticator=first).get_credentials()
+    CredentialRefresher(config, refresh_window=300, jitter=0, authenticator=second).get_credentials()
+
+    assert first.exchanges == 1 and second.exchanges == 0
+
+
+def test_failed_refresh_is_reported(home):
+    auth = FakeAuthenticator(fail=True)
+    refresher = CredentialRefresher(make_config(id_token_expires_in=-10), refresh_window=300, jitter=0,
+                                    authenticator=auth)
+
+    with pytest.raises(Exception, match='revoked'):
+        refresher.get_credentials()
+    assert refresher.refresh_errors == 1 and 'revoked' in refresher.last_error
+
+
+def test_jitter_moves_refresh_earlier(home):
+    refresher = CredentialRefresher(make_config(), refresh_window=300, jitter=60, authenticator=FakeAuthenticator())
+    credentials = make_credentials(3600)
+    expiry = datetime.fromisoformat(credentials['Expiration'])
+    lead = (expiry - refresher.refresh_at(credentials)).total_seconds()
+
+    assert 300 <= lead <= 360
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
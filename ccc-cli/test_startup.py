@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget tests for the ccc CLI
+
+Each subcommand runs in a fresh interpreter with HOME pointed at a
+temporary directory. The probe records which heavy modules were loaded
+and how long import + dispatch took, and the test checks both against
+the per-subcommand budget below.
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Subcommand -> (argv, stdin, forbidden modules, budget in seconds)
+STARTUP_BUDGETS = {
+    'version': (['version'], '', ('boto3', 'botocore', 'requests'), 0.25),
+    'configure': (['configure'], '\n' * 5, ('boto3', 'botocore', 'requests'), 0.25),
+    'logout': (['logout'], '', ('boto3', 'botocore', 'requests'), 0.25),
+    'whoami': (['whoami'], '', ('boto3', 'botocore', 'requests'), 0.25),
+    'whoami --offline': (['whoami', '--offline'], '', ('boto3', 'botocore', 'requests'), 0.25),
+    'credential-process': (['credential-process'], '', ('boto3', 'botocore', 'requests'), 0.25),
+}
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+sys.argv = ['ccc'] + json.loads(sys.argv[1])
+import ccc
+try:
+    ccc.main()
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+sys.stderr.write('\\n' + json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}) + '\\n')
+"""
+
+
+def run_subcommand(argv, stdin, home):
+    """Run a ccc subcommand in a clean interpreter and return its probe report"""
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(argv)],
+        cwd=Path(__file__).parent,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+def check_budget(name, tmp_path):
+    argv, stdin, forbidden, budget = STARTUP_BUDGETS[name]
+    report = run_subcommand(argv, stdin, tmp_path)
+
+    loaded = [m for m in forbidden if m in report['modules']]
+    assert loaded == [], f"'ccc {name}' imported {loaded}"
+    assert report['elapsed'] < budget, (
+        f"'ccc {name}' took {report['elapsed'] * 1000:.1f} ms (budget {budget * 1000:.0f} ms)"
+    )
+
+
+def test_version_startup(tmp_path):
+    check_budget('version', tmp_path)
+
+
+def test_configure_startup(tmp_path):
+    check_budget('configure', tmp_path)
+
+
+def test_logout_startup(tmp_path):
+    check_budget('logout', tmp_path)
+
+
+def test_whoami_logged_out_startup(tmp_path):
+    check_budget('whoami', tmp_path)
+
+
+def test_whoami_offline_startup(tmp_path):
+    import base64
+
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+    id_token = '.'.join([
+        segment({'alg': 'RS256', 'kid': 'test'}),
+        segment({'sub': 'abc', 'email': 'user@example.com', 'exp': 4102444800}),
+        'c2lnbmF0dXJl'
+    ])
+    config_dir = tmp_path / '.ccc'
+    config_dir.mkdir()
+    (config_dir / 'config.json').write_text(json.dumps({
+        'tokens': {'id_token': id_token, 'username': 'user@example.com'}
+    }))
+    check_budget('whoami --offline', tmp_path)
+
+
+def test_credential_process_cache_hit_startup(tmp_path):
+    cache_dir = tmp_path / '.ccc'
+    cache_dir.mkdir()
+    (cache_dir / 'credentials-cache.json').write_text(json.dumps({
+        'default': {
+            'AccessKeyId': 'ASIAEXAMPLE',
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token',
+            'Expiration': '2099-01-01T00:00:00+00:00'
+        }
+    }))
+    check_budget('credential-process', tmp_path)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
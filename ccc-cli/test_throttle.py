@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for Cognito rate limiting and retry (cca.auth.throttle)
+"""
+
+import sys
+import threading
+
+import pytest
+from botocore.exceptions import (
+    ClientError, EndpointConnectionError, ConnectionClosedError, ReadTimeoutError
+)
+
+from cca.auth import throttle as throttle_module
+from cca.auth.throttle import TokenBucket, Throttle
+
+
+def client_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, 'InitiateAuth')
+
+
+class FlakyMethod:
+    """Raises the given errors in turn, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'ok': True, 'kwargs': kwargs}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Record backoff delays instead of sleeping through them"""
+    delays = []
+    monkeypatch.setattr(throttle_module.time, 'sleep', delays.append)
+    return delays
+
+
+def test_bucket_allows_burst_then_limits():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1 + 1e-6
+    assert bucket.acquired == 3
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttle_module.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.try_acquire(2)
+
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    now[0] += 0.5
+    assert bucket.try_acquire() == 0.0
+
+
+def test_bucket_acquire_waits_for_tokens(monkeypatch, no_sleep):
+    now = [0.0]
+    monkeypatch.setattr(throttle_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(throttle_module.time, 'sleep', lambda s: (no_sleep.append(s), now.__setitem__(0, now[0] + s)))
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+
+    waited = bucket.acquire()
+
+    assert waited == pytest.approx(0.25)
+    assert bucket.waited == pytest.approx(0.25)
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(Exception):
+        TokenBucket(0)
+
+
+def test_bucket_is_thread_safe(monkeypatch):
+    bucket = TokenBucket(rate=1, capacity=50)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(bucket.try_acquire())) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(0.0) == 50
+    assert bucket.acquired == 50
+
+
+def test_call_passes_through():
+    method = FlakyMethod()
+    assert Throttle().call('initiate_auth', method, AuthFlow='USER_PASSWORD_AUTH')['kwargs'] == {
+        'AuthFlow': 'USER_PASSWORD_AUTH'}
+
+
+@pytest.mark.parametrize('error', [
+    client_error('TooManyRequestsException'),
+    client_error('ThrottlingException'),
+])
+def test_throttling_is_retried(error, no_sleep):
+    throttle = Throttle(max_attempts=3)
+    method = FlakyMethod(error, error)
+
+    assert throttle.call('initiate_auth', method)['ok']
+    metrics = throttle.metrics()['initiate_auth']
+    assert method.calls == 3
+    assert (metrics['throttled'], metrics['retries'], metrics['failures']) == (2, 2, 0)
+    assert len(no_sleep) == 2
+
+
+@pytest.mark.parametrize('error', [
+    EndpointConnectionError(endpoint_url='https://cognito-idp.us-east-1.amazonaws.com/'),
+    ConnectionClosedError(endpoint_url='https://cognito-idp.us-east-1.amazonaws.com/'),
+    ReadTimeoutError(endpoint_url='https://cognito-idp.us-east-1.amazonaws.com/'),
+    client_error('InternalErrorException', status=500),
+    client_error('SomethingNew', status=503),
+])
+def test_transient_errors_are_retried(error):
+    throttle = Throttle(max_attempts=3)
+    method = FlakyMethod(error)
+
+    assert throttle.call('get_id', method)['ok']
+    metrics = throttle.metrics()['get_id']
+    assert (metrics['transient'], metrics['throttled'], metrics['retries']) == (1, 0, 1)
+
+
+def test_client_errors_are_not_retried():
+    throttle = Throttle(max_attempts=5)
+    method = FlakyMethod(client_error('NotAuthorizedException'))
+
+    with pytest.raises(ClientError):
+        throttle.call('initiate_auth', method)
+    assert method.calls == 1
+    assert throttle.metrics()['initiate_auth']['retries'] == 0
+
+
+def test_gives_up_after_max_attempts():
+    throttle = Throttle(max_attempts=3)
+    method = FlakyMethod(*[client_error('ThrottlingException')] * 5)
+
+    with pytest.raises(ClientError):
+        throttle.call('initiate_auth', method)
+    assert method.calls == 3
+    assert throttle.metrics()['initiate_auth']['failures'] == 1
+
+
+def test_backoff_is_capped_full_jitter():
+    throttle = Throttle(base_delay=0.1, max_delay=1.0)
+    for attempt in range(10):
+        delay = throttle.backoff(attempt)
+        assert 0 <= delay <= min(1.0, 0.1 * 2 ** attempt)
+
+
+def test_calls_take_tokens_from_their_category():
+    throttle = Throttle(rate_limits={'GetId': 1000})
+    throttle.call('get_id', FlakyMethod())
+    throttle.call('get_id', FlakyMethod())
+    throttle.call('initiate_auth', FlakyMethod())
+
+    assert throttle.buckets['GetId'].acquired == 2
+    assert throttle.buckets['UserAuthentication'].acquired == 1
+
+
+def test_get_throttle_is_shared_per_region():
+    assert throttle_module.get_throttle('test-region-1') is throttle_module.get_throttle('test-region-1')
+    assert throttle_module.get_throttle('test-region-1') is not throttle_module.get_throttle('test-region-2')
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Tests for local Cognito JWT verification (cca.auth.tokens)
+
+Tokens are signed with a throwaway RSA key whose public half is placed in
+the in-memory JWKS cache, so no network access is needed.
+"""
+
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+
+import pytest
+
+from cca.auth import tokens
+
+REGION = 'us-east-1'
+POOL = 'us-east-1_TestPool'
+CLIENT = 'test-client-id'
+ISSUER = f"https://cognito-idp.{REGION}.amazonaws.com/{POOL}"
+
+
+def _is_probable_prime(n, rng, rounds=20):
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29):
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _prime(bits, rng):
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if _is_probable_prime(candidate, rng):
+            return candidate
+
+
+def _rsa_key(bits=1024, seed=7):
+    rng = random.Random(seed)
+    e = 65537
+    while True:
+        p, q = _prime(bits // 2, rng), _prime(bits // 2, rng)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e:
+            return p * q, e, pow(e, -1, phi)
+
+
+N, E, D = _rsa_key()
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _int_b64(value):
+    return _b64(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+def make_token(kid='key-1', d=D, **overrides):
+    claims = {
+        'iss': ISSUER,
+        'token_use': 'id',
+        'aud': CLIENT,
+        'sub': 'abc',
+        'exp': int(time.time()) + 3600
+    }
+    claims.update(overrides)
+    signing_input = '.'.join([
+        _b64(json.dumps({'alg': 'RS256', 'kid': kid}).encode()),
+        _b64(json.dumps(claims).encode())
+    ])
+    k = (N.bit_length() + 7) // 8
+    digest_info = tokens._SHA256_DIGEST_INFO + hashlib.sha256(signing_input.encode('ascii')).digest()
+    encoded = b'\x00\x01' + b'\xff' * (k - len(digest_info) - 3) + b'\x00' + digest_info
+    signature = pow(int.from_bytes(encoded, 'big'), d, N).to_bytes(k, 'big')
+    return f"{signing_input}.{_b64(signature)}"
+
+
+@pytest.fixture(autouse=True)
+def jwks(monkeypatch, tmp_path):
+    monkeypatch.setattr(tokens, 'JWKS_CACHE_DIR', tmp_path)
+    monkeypatch.setattr(tokens, '_verified_tokens', tokens.OrderedDict())
+    monkeypatch.setitem(tokens._jwks_memory, POOL, (time.time(), {
+        'keys': [{'kid': 'key-1', 'kty': 'RSA', 'alg': 'RS256', 'n': _int_b64(N), 'e': _int_b64(E)}]
+    }))
+
+
+def verify(token, app_client_id=CLIENT):
+    return tokens.verify_jwt(token, REGION, POOL, app_client_id, allow_fetch=False)
+
+
+def test_valid_token_is_verified():
+    assert verify(make_token())['sub'] == 'abc'
+
+
+def test_access_token_checks_client_id():
+    assert verify(make_token(token_use='access', aud=None, client_id=CLIENT))['token_use'] == 'access'
+    with pytest.raises(Exception, match='different app client'):
+        verify(make_token(token_use='access', aud=None, client_id='other-client'))
+
+
+def test_bad_signature_is_rejected():
+    with pytest.raises(Exception, match='Invalid token signature'):
+        verify(make_token(d=D + 2))
+
+
+def test_tampered_claims_are_rejected():
+    header, _, signature = make_token().split('.')
+    forged = _b64(json.dumps({'iss': ISSUER, 'token_use': 'id', 'aud': CLIENT, 'sub': 'admin',
+                              'exp': int(time.time()) + 3600}).encode())
+    with pytest.raises(Exception, match='Invalid token signature'):
+        verify(f"{header}.{forged}.{signature}")
+
+
+def test_unknown_key_is_rejected():
+    with pytest.raises(Exception, match='unknown key'):
+        verify(make_token(kid='key-2'))
+
+
+def test_wrong_issuer_is_rejected():
+    with pytest.raises(Exception, match='different user pool'):
+        verify(make_token(iss=f"https://cognito-idp.{REGION}.amazonaws.com/us-east-1_Other"))
+
+
+def test_wrong_audience_is_rejected():
+    with pytest.raises(Exception, match='different app client'):
+        verify(make_token(aud='other-client'))
+
+
+def test_unexpected_token_use_is_rejected():
+    with pytest.raises(Exception, match='token_use'):
+        verify(make_token(token_use='refresh'))
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(Exception, match='expired'):
+        verify(make_token(exp=int(time.time()) - 10))
+    assert len(tokens._verified_tokens) == 0
+
+
+def test_cached_token_expires(monkeypatch):
+    token = make_token(exp=int(time.time()) + 60)
+    verify(token)
+    monkeypatch.setattr(tokens.time, 'time', lambda: 10 ** 12)
+    with pytest.raises(Exception, match='expired'):
+        verify(token)
+
+
+def test_cache_does_not_skip_audience_check():
+    token = make_token()
+    verify(token)
+    with pytest.raises(Exception, match='different app client'):
+        verify(token, app_client_id='other-client')
+
+
+def test_verified_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(tokens, 'MAX_VERIFIED_TOKENS', 3)
+    issued = [make_token(sub=f"user-{i}") for i in range(5)]
+    for token in issued:
+        verify(token)
+    assert [key[0] for key in tokens._verified_tokens] == issued[-3:]
+
+
+def test_token_expires_in_without_exp():
+    assert tokens.token_expires_in(make_token(exp=None)) is None
+    assert tokens.is_token_fresh(make_token(exp=None)) is False
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for span parenting and export (cca.tracing)
+"""
+
+import sys
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cca.tracing import Tracer, propagate
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    return Tracer(path=tmp_path / 'traces.jsonl')
+
+
+def exported(tracer):
+    spans = []
+    with open(tracer.path) as f:
+        for line in f:
+            spans.extend(json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans'])
+    return {span['name']: span for span in spans}
+
+
+def test_nested_spans_form_one_trace(tracer):
+    with tracer.span('ccc login'):
+        with tracer.span('authenticate'):
+            tracer.add_span('cognito-idp.InitiateAuth', 1.0, 1.5)
+
+    spans = exported(tracer)
+    root, child, call = spans['ccc login'], spans['authenticate'], spans['cognito-idp.InitiateAuth']
+    assert 'parentSpanId' not in root
+    assert child['parentSpanId'] == root['spanId']
+    assert call['parentSpanId'] == child['spanId']
+    assert {root['traceId'], child['traceId'], call['traceId']} == {root['traceId']}
+
+
+def test_error_is_recorded(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span('failing'):
+            raise ValueError("boom")
+
+    assert exported(tracer)['failing']['status']['message'] == 'ValueError: boom'
+
+
+def test_concurrent_threads_get_separate_traces(tracer):
+    barrier = threading.Barrier(2)
+
+    def operation(name):
+        with tracer.span(name):
+            # Both roots are open at the same time
+            barrier.wait()
+            with tracer.span(f"{name}.child"):
+                barrier.wait()
+
+    threads = [threading.Thread(target=operation, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    spans = exported(tracer)
+    for name in ('a', 'b'):
+        assert 'parentSpanId' not in spans[name]
+        assert spans[f"{name}.child"]['parentSpanId'] == spans[name]['spanId']
+    assert spans['a']['traceId'] != spans['b']['traceId']
+
+
+def test_worker_threads_are_independent_unless_propagated(tracer):
+    def work(name):
+        with tracer.span(name):
+            pass
+
+    with tracer.span('batch'):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(work, 'unrelated').result()
+            list(executor.map(propagate(work), [f"login-{i}" for i in range(3)]))
+
+    spans = exported(tracer)
+    assert 'parentSpanId' not in spans['unrelated']
+    assert all(spans[f"login-{i}"]['parentSpanId'] == spans['batch']['spanId'] for i in range(3))
+
+
+def test_asyncio_tasks_get_separate_parents(tracer):
+    async def operation(name):
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+            with tracer.span(f"{name}.child"):
+                await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(operation('a'), operation('b'))
+
+    asyncio.run(main())
+
+    spans = exported(tracer)
+    assert spans['a.child']['parentSpanId'] == spans['a']['spanId']
+    assert spans['b.child']['parentSpanId'] == spans['b']['spanId']
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
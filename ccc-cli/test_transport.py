@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled HTTP transport (cca.transport)
+
+Requests go to a local HTTP stub that records what it received and can be
+told to fail the next few requests.
+"""
+
+import sys
+import gzip
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cca import transport as transport_module
+from cca.transport import HttpTransport, TransportError
+from cca.auth.cognito import CognitoAuthenticator
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        with server.lock:
+            server.received.append({
+                'method': self.command,
+                'path': self.path,
+                'headers': dict(self.headers),
+                'body': json.loads(body) if body else None,
+                'client': self.client_address
+            })
+            status = server.statuses.pop(0) if server.statuses else 200
+        data = json.dumps({'status': status} if status == 200 else {'error': f"HTTP {status}"}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = _reply
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    httpd.lock = threading.Lock()
+    httpd.received = []
+    httpd.statuses = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}/"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def transport():
+    transport = HttpTransport(base_delay=0, max_delay=0)
+    yield transport
+    transport.close()
+
+
+def test_connections_are_kept_alive(server, transport):
+    for _ in range(5):
+        assert transport.request('GET', server.url).status_code == 200
+
+    assert len({request['client'] for request in server.received}) == 1
+
+
+def test_idempotent_post_is_retried_with_one_key(server, transport):
+    server.statuses = [503, 500]
+
+    status, body = transport.post_json(server.url + 'register', {'email': 'a@example.com'}, idempotent=True)
+
+    assert (status, body) == (200, {'status': 200})
+    keys = [request['headers'].get('Idempotency-Key') for request in server.received]
+    assert len(keys) == 3 and keys[0] and len(set(keys)) == 1
+    metrics = transport.metrics()
+    assert (metrics['requests'], metrics['attempts'], metrics['retries'], metrics['failures']) == (1, 3, 2, 0)
+
+
+def test_post_is_not_retried_by_default(server, transport):
+    server.statuses = [503]
+
+    status, body = transport.post_json(server.url + 'register', {'email': 'a@example.com'})
+
+    assert status == 503
+    assert len(server.received) == 1
+    assert 'Idempotency-Key' not in server.received[0]['headers']
+
+
+def test_last_error_response_is_returned(server, transport):
+    server.statuses = [502] * 5
+
+    assert transport.request('GET', server.url).status_code == 502
+    assert len(server.received) == transport.max_attempts
+
+
+def test_connection_errors_raise_after_retries(transport):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+    with pytest.raises(TransportError):
+        transport.request('GET', url)
+    metrics = transport.metrics()
+    assert (metrics['attempts'], metrics['failures']) == (transport.max_attempts, 1)
+
+
+def test_large_bodies_are_gzipped(server):
+    transport = HttpTransport(compress=True, compress_min_size=100)
+    body = {'note': 'x' * 1000}
+
+    transport.post_json(server.url, body)
+    transport.post_json(server.url, {'small': True})
+
+    large, small = server.received
+    assert large['headers'].get('Content-Encoding') == 'gzip' and large['body'] == body
+    assert 'Content-Encoding' not in small['headers']
+    metrics = transport.metrics()
+    assert metrics['bytes_sent'] < metrics['bytes_uncompressed']
+    transport.close()
+
+
+def test_registration_is_sent_once(server, monkeypatch):
+    monkeypatch.setattr(transport_module, '_transport', HttpTransport(base_delay=0, max_delay=0))
+    server.statuses = [503]
+
+    with pytest.raises(Exception, match='HTTP 503'):
+        CognitoAuthenticator({}).register('a@example.com', 'password', lambda_url=server.url)
+    assert len(server.received) == 1
+    assert server.received[0]['body'] == {'email': 'a@example.com', 'password': 'password'}
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))